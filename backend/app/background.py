@@ -0,0 +1,51 @@
+"""
+Lightweight periodic background tasks.
+
+Runs a function on a fixed interval in a daemon thread. Used for work that
+should happen off the request path (e.g. drift monitoring) without adding a
+separate scheduler service.
+"""
+
+from threading import Event, Thread
+from typing import Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run a function every `interval_seconds` until stopped."""
+
+    def __init__(self, name: str, func: Callable[[], None], interval_seconds: float, run_immediately: bool = True):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.run_immediately = run_immediately  # False waits one interval before the first run
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self):
+        """Start the background thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started background task '{self.name}' every {self.interval_seconds}s")
+
+    def stop(self, timeout: float = 5.0):
+        """Signal the thread to stop and wait briefly for it."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self):
+        if not self.run_immediately and self._stop_event.wait(self.interval_seconds):
+            return
+        while not self._stop_event.is_set():
+            try:
+                self.func()
+            except Exception as e:
+                logger.error(f"Background task '{self.name}' failed: {str(e)}", exc_info=True)
+            self._stop_event.wait(self.interval_seconds)
@@ -0,0 +1,238 @@
+"""
+Backtesting of MODEL_PORTFOLIOS and user holdings.
+
+Model portfolios are replayed through their sector funds (see SECTOR_FUNDS);
+user holdings are replayed at their current weights. Between rebalances the
+position units are fixed, so each segment's value is a single matrix-vector
+product of price relatives and target weights. Calendar rules (monthly,
+quarterly) know every rebalance date up front and are fully vectorized;
+threshold rules find their rebalance dates with one pass over the periods and
+then reuse the same vectorized replay.
+
+Results are cached per (strategy, time range, rebalance rule).
+"""
+
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+
+import numpy as np
+
+from .market_data import TTLCache
+from .portfolio import MODEL_PORTFOLIOS
+from .rebalance_solver import SECTOR_FUNDS
+from .risk import build_price_matrix, PERIODS_PER_YEAR
+
+logger = logging.getLogger(__name__)
+
+REBALANCE_RULES = ("none", "monthly", "quarterly", "threshold")
+DEFAULT_THRESHOLD = 5.0  # Rebalance when any weight drifts this many percentage points
+DEFAULT_INITIAL_VALUE = 10000.0
+
+# Backtest cache: (strategy_key, time_range, rule, threshold) -> result
+_backtest_cache = TTLCache()
+
+
+def model_fund_weights(model_type: str) -> Dict[str, float]:
+    """
+    Map a model portfolio's sector targets onto sector funds.
+
+    Args:
+        model_type: "conservative", "balanced", or "growth"
+
+    Returns:
+        Mapping of fund symbol to weight (fractions summing to 1)
+    """
+    model = MODEL_PORTFOLIOS[model_type]
+    weights = {SECTOR_FUNDS[sector]: pct for sector, pct in model.items() if sector in SECTOR_FUNDS}
+    total = sum(weights.values())
+    return {symbol: pct / total for symbol, pct in weights.items()}
+
+
+def find_rebalance_points(
+    dates: List[str],
+    prices: np.ndarray,
+    weights: np.ndarray,
+    rule: str,
+    threshold: float = DEFAULT_THRESHOLD
+) -> np.ndarray:
+    """
+    Get the period indices at which the portfolio is rebalanced.
+
+    Index 0 (initial purchase) is always included.
+
+    Args:
+        dates: (T,) ISO dates
+        prices: (T, N) aligned prices
+        weights: (N,) target weights
+        rule: "none", "monthly", "quarterly", or "threshold"
+        threshold: Drift trigger in percentage points (threshold rule only)
+
+    Returns:
+        Sorted array of rebalance indices
+    """
+    if rule == "none":
+        return np.array([0])
+
+    if rule in ("monthly", "quarterly"):
+        months = np.array([int(d[:4]) * 12 + int(d[5:7]) - 1 for d in dates])
+        buckets = months if rule == "monthly" else months // 3
+        # Rebalance at the first period of each new month/quarter
+        changes = np.flatnonzero(np.diff(buckets) != 0) + 1
+        return np.r_[0, changes]
+
+    # Threshold: walk forward once, vectorized across holdings
+    points = [0]
+    start = 0
+    for t in range(1, len(dates)):
+        drifted = weights * prices[t] / prices[start]
+        drifted /= drifted.sum()
+        if np.abs(drifted - weights).max() * 100 > threshold:
+            points.append(t)
+            start = t
+    return np.array(points)
+
+
+def replay(prices: np.ndarray, weights: np.ndarray, rebalance_points: np.ndarray, initial_value: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Replay a fixed-weight strategy with rebalancing at the given indices.
+
+    Args:
+        prices: (T, N) aligned prices
+        weights: (N,) target weights
+        rebalance_points: Sorted rebalance indices, starting with 0
+        initial_value: Starting portfolio value
+
+    Returns:
+        Tuple of (equity curve (T,), turnover at each rebalance point after the first)
+    """
+    num_periods = prices.shape[0]
+    t = np.arange(num_periods)
+
+    # Segment each period belongs to: the last rebalance strictly before it (period 0 is its own)
+    segment = np.maximum(np.searchsorted(rebalance_points, t, side="left") - 1, 0)
+    base = prices[rebalance_points[segment]]  # (T, N) price at the segment start
+    relatives = prices / base
+    growth = relatives @ weights  # (T,) value multiple since segment start
+    growth[0] = 1.0
+
+    # Portfolio level at each rebalance = product of prior segments' end growth
+    levels = np.cumprod(np.r_[1.0, growth[rebalance_points[1:]]])
+    equity = initial_value * levels[segment] * growth
+
+    # Turnover: half the absolute weight change needed to get back to target
+    if len(rebalance_points) > 1:
+        at_rebalance = rebalance_points[1:]
+        drifted = relatives[at_rebalance] * weights / growth[at_rebalance, None]
+        turnover = 0.5 * np.abs(drifted - weights).sum(axis=1)
+    else:
+        turnover = np.zeros(0)
+
+    return equity, turnover
+
+
+def run_backtest(
+    strategy: str,
+    weights_by_symbol: Dict[str, float],
+    time_range: str = "5y",
+    rule: str = "quarterly",
+    threshold: float = DEFAULT_THRESHOLD,
+    initial_value: float = DEFAULT_INITIAL_VALUE
+) -> Dict:
+    """
+    Backtest one strategy, using the cache when possible.
+
+    Args:
+        strategy: Display name (model type or "current")
+        weights_by_symbol: Mapping of symbol to target weight
+        time_range: "1y", "3y", "5y", or "10y"
+        rule: Rebalance rule
+        threshold: Drift trigger for the threshold rule
+        initial_value: Starting portfolio value
+
+    Returns:
+        Dict with summary statistics and the equity curve
+    """
+    if rule not in REBALANCE_RULES:
+        raise ValueError(f"rebalance must be one of: {', '.join(REBALANCE_RULES)}")
+
+    symbols = sorted(weights_by_symbol)
+    weights = np.array([weights_by_symbol[s] for s in symbols], dtype=float)
+    weights = weights / weights.sum()
+
+    key = (_strategy_key(symbols, weights), time_range, rule, threshold if rule == "threshold" else None, initial_value)
+    cached = _backtest_cache.get(key)
+    if cached is not None:
+        return {**cached, "strategy": strategy}
+
+    dates, prices, granularity = build_price_matrix(symbols, time_range)
+    points = find_rebalance_points(dates, prices, weights, rule, threshold)
+    equity, turnover = replay(prices, weights, points, initial_value)
+
+    periods_per_year = PERIODS_PER_YEAR.get(granularity, 12)
+    period_returns = equity[1:] / equity[:-1] - 1.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0
+    years = (len(equity) - 1) / periods_per_year
+    total_return = equity[-1] / equity[0] - 1.0
+
+    result = {
+        "strategy": strategy,
+        "symbols": symbols,
+        "total_return": round(float(total_return) * 100, 2),
+        "annualized_return": round(float((1 + total_return) ** (1 / years) - 1) * 100, 2) if years > 0 else 0.0,
+        "volatility": round(float(period_returns.std(ddof=1) * np.sqrt(periods_per_year)) * 100, 2),
+        "max_drawdown": round(float(drawdown.min()) * 100, 2),
+        "turnover": round(float(turnover.sum()) * 100, 2),
+        "rebalances": int(len(points) - 1),
+        "equity_curve": [
+            {"date": date, "value": round(float(value), 2), "drawdown": round(float(dd) * 100, 2)}
+            for date, value, dd in zip(dates, equity, drawdown)
+        ]
+    }
+
+    _backtest_cache.set(key, result)
+
+    return result
+
+
+def backtest_strategies(
+    model_types: List[str],
+    holdings_weights: Optional[Dict[str, float]] = None,
+    time_range: str = "5y",
+    rule: str = "quarterly",
+    threshold: float = DEFAULT_THRESHOLD,
+    initial_value: float = DEFAULT_INITIAL_VALUE
+) -> List[Dict]:
+    """
+    Backtest several model portfolios (and optionally the user's holdings).
+
+    Args:
+        model_types: Model portfolios to include
+        holdings_weights: Optional current holdings weights, reported as "current"
+        time_range: "1y", "3y", "5y", or "10y"
+        rule: Rebalance rule
+        threshold: Drift trigger for the threshold rule
+        initial_value: Starting portfolio value
+
+    Returns:
+        One result per strategy
+    """
+    results = [
+        run_backtest(model_type, model_fund_weights(model_type), time_range, rule, threshold, initial_value)
+        for model_type in model_types
+    ]
+    if holdings_weights:
+        results.append(run_backtest("current", holdings_weights, time_range, rule, threshold, initial_value))
+    return results
+
+
+def _strategy_key(symbols: List[str], weights: np.ndarray) -> str:
+    """Stable cache key for a set of symbols and weights."""
+    payload = json.dumps([symbols, np.round(weights, 6).tolist()])
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def clear_backtest_cache():
+    """Clear cached backtest results. Useful for testing."""
+    _backtest_cache.clear()
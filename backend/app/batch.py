@@ -0,0 +1,157 @@
+"""
+Bulk analysis of many portfolios for advisors.
+
+Ticker lookups are resolved once for the whole batch in the server process
+(deduplicated across all portfolios), then each portfolio's valuation, sector
+analysis and rebalance plan runs in the shared process pool with no network
+access. Results are yielded as each portfolio finishes.
+"""
+
+import asyncio
+from typing import AsyncIterator, Dict, List, Tuple
+import logging
+
+from .market_data import get_latest_price
+from .portfolio import (
+    calculate_portfolio_value,
+    analyze_sector_allocation,
+    detect_concentration_risks,
+    calculate_diversification_score,
+    plan_rebalancing,
+    MODEL_PORTFOLIOS
+)
+from .process_pool import get_process_pool
+from .rebalance_solver import SECTOR_FUNDS
+from .schemas import PortfolioHolding
+from .security_master import get_sector_weights_batch
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_PORTFOLIOS = 1000
+
+
+def resolve_batch_lookups(
+    portfolios: List[List[PortfolioHolding]],
+    model_type: str
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float]]:
+    """
+    Resolve every distinct ticker's sector weights and the model's sector fund prices once.
+
+    Args:
+        portfolios: Holdings of every portfolio in the batch
+        model_type: Target model for rebalancing
+
+    Returns:
+        Tuple of (sector_lookup, fund_prices)
+    """
+    tickers = {holding.ticker for holdings in portfolios for holding in holdings}
+
+    sector_lookup = get_sector_weights_batch(list(tickers))
+
+    fund_prices = {}
+    for sector in MODEL_PORTFOLIOS[model_type]:
+        fund = SECTOR_FUNDS.get(sector)
+        if fund:
+            price = get_latest_price(fund)
+            if price:
+                fund_prices[fund] = price
+
+    logger.info(f"Resolved {len(tickers)} unique tickers for {len(portfolios)} portfolios")
+    return sector_lookup, fund_prices
+
+
+def analyze_portfolio_task(
+    portfolio_id: str,
+    holdings: List[Tuple[str, float, float]],
+    sector_lookup: Dict[str, Dict[str, float]],
+    fund_prices: Dict[str, float],
+    model_type: str
+) -> Dict:
+    """
+    Analyze and plan a rebalance for one portfolio (runs in a worker process).
+
+    Args:
+        portfolio_id: Caller-supplied portfolio identifier
+        holdings: (ticker, shares, purchase_price) tuples
+        sector_lookup: Pre-resolved ticker -> sector weights map
+        fund_prices: Pre-fetched sector fund prices
+        model_type: Target model for rebalancing
+
+    Returns:
+        Dict with id, analysis and recommendations (basic reasoning only)
+    """
+    parsed = [
+        PortfolioHolding(ticker=ticker, shares=shares, purchase_price=price)
+        for ticker, shares, price in holdings
+    ]
+    total_value, ticker_details = calculate_portfolio_value(parsed, sector_lookup)
+    sectors = analyze_sector_allocation(ticker_details, total_value)
+
+    return {
+        "id": portfolio_id,
+        "analysis": {
+            "total_value": round(total_value, 2),
+            "sectors": sectors,
+            "concentrated_sectors": detect_concentration_risks(sectors),
+            "diversification_score": calculate_diversification_score(sectors)
+        },
+        "recommendations": plan_rebalancing(ticker_details, model_type, fund_prices)
+    }
+
+
+async def analyze_portfolios(
+    portfolios: List[Tuple[str, List[PortfolioHolding]]],
+    model_type: str = "balanced"
+) -> AsyncIterator[Dict]:
+    """
+    Analyze many portfolios in the process pool, yielding results as they finish.
+
+    Args:
+        portfolios: (portfolio_id, holdings) pairs
+        model_type: Target model for rebalancing
+
+    Yields:
+        Per-portfolio result dicts, in completion order. Failures yield
+        {"id": ..., "error": ...} instead of stopping the batch.
+    """
+    # Lookups are keyed by upper-cased symbol; normalize once so every stage agrees
+    portfolios = [
+        (portfolio_id, [h.model_copy(update={"ticker": h.ticker.strip().upper()}) for h in holdings])
+        for portfolio_id, holdings in portfolios
+    ]
+
+    loop = asyncio.get_running_loop()
+    sector_lookup, fund_prices = await loop.run_in_executor(
+        None, resolve_batch_lookups, [holdings for _, holdings in portfolios], model_type
+    )
+
+    pool = get_process_pool()
+    pending = {}
+    for portfolio_id, holdings in portfolios:
+        # Only ship each worker the lookups it needs
+        tickers = {h.ticker for h in holdings}
+        future = loop.run_in_executor(
+            pool,
+            analyze_portfolio_task,
+            portfolio_id,
+            [(h.ticker, h.shares, h.purchase_price) for h in holdings],
+            {t: sector_lookup[t] for t in tickers},
+            fund_prices,
+            model_type
+        )
+        pending[future] = portfolio_id
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                portfolio_id = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logger.error(f"Batch analysis failed for portfolio {portfolio_id}: {str(e)}")
+                    yield {"id": portfolio_id, "error": str(e)}
+    finally:
+        # Client went away: don't leave queued work in the pool
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,76 @@
+"""
+Circuit breaker for calls to external services.
+
+After a run of consecutive failures the breaker opens and callers skip the
+service for a cool-down period instead of waiting on calls that are likely to
+fail. Once the cool-down passes, calls are let through again; a success closes
+the breaker and another failure reopens it straight away.
+"""
+
+from threading import Lock
+from typing import Dict, Optional
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker."""
+
+    def __init__(self, name: str, failure_threshold: int, cooldown_seconds: float):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.cooldown_seconds = cooldown_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._times_opened = 0
+        self._lock = Lock()
+
+    def allow(self) -> bool:
+        """True if a call may be attempted now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                return False
+            # Cool-down over: let calls through, but the next failure reopens
+            self._opened_at = None
+            self._failures = self.failure_threshold - 1
+            logger.info(f"Circuit '{self.name}' half-open, retrying calls")
+            return True
+
+    def record_success(self):
+        """Reset the failure count."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        """Count a failure, opening the breaker at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is None and self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._times_opened += 1
+                logger.warning(
+                    f"Circuit '{self.name}' opened after {self._failures} consecutive failures; "
+                    f"skipping calls for {self.cooldown_seconds}s"
+                )
+
+    def reset(self):
+        """Close the breaker and clear counters."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._times_opened = 0
+
+    def stats(self) -> Dict:
+        """Current state and counters."""
+        with self._lock:
+            is_open = self._opened_at is not None and time.monotonic() - self._opened_at < self.cooldown_seconds
+            return {
+                "state": "open" if is_open else "closed",
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened
+            }
@@ -0,0 +1,178 @@
+"""
+Return correlation and overlap analysis for holdings.
+
+Sector concentration checks miss holdings that are nominally different but
+move together (SPY and VOO, for example). This module builds the pairwise
+return correlation matrix for a portfolio's holdings and groups symbols whose
+correlation exceeds a threshold into clusters, reporting each cluster's
+combined weight.
+
+The matrix is derived from the cached covariance (see get_return_statistics)
+with one vectorized rescaling, and clusters come from a union-find pass over
+the above-threshold pairs, so hundreds of symbols stay cheap. Matrices are
+cached per (symbol set, time range).
+"""
+
+from typing import Dict, List, Tuple
+import logging
+
+import numpy as np
+
+from .market_data import TTLCache
+from .portfolio import SECTOR_CONCENTRATION_THRESHOLD
+from .risk import get_return_statistics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORRELATION_THRESHOLD = 0.9
+MAX_CORRELATED_PAIRS = 50  # Strongest pairs listed in the response
+
+# Correlation cache: (symbols, time_range) -> (symbols, matrix)
+_correlation_cache = TTLCache()
+
+
+def correlation_from_covariance(cov: np.ndarray) -> np.ndarray:
+    """
+    Convert a covariance matrix to a correlation matrix.
+
+    Symbols with zero variance are reported as uncorrelated with everything
+    (and 1.0 with themselves).
+
+    Args:
+        cov: (N, N) covariance matrix
+
+    Returns:
+        (N, N) correlation matrix
+    """
+    std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+    scale = np.divide(1.0, std, out=np.zeros_like(std), where=std > 0)
+    corr = np.clip(cov * np.outer(scale, scale), -1.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def get_correlation_matrix(symbols: List[str], time_range: str = "1y") -> Tuple[List[str], np.ndarray]:
+    """
+    Get the return correlation matrix for a symbol set, using the cache when possible.
+
+    Args:
+        symbols: Ticker symbols
+        time_range: "1y", "3y", "5y", or "10y"
+
+    Returns:
+        Tuple of (sorted symbols, (N, N) correlation matrix in that order)
+    """
+    key = (tuple(sorted({s.upper() for s in symbols})), time_range)
+
+    cached = _correlation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    stats = get_return_statistics(list(key[0]), time_range)
+    result = (stats["symbols"], correlation_from_covariance(stats["cov"]))
+
+    _correlation_cache.set(key, result)
+
+    return result
+
+
+def find_correlated_clusters(corr: np.ndarray, threshold: float = DEFAULT_CORRELATION_THRESHOLD) -> List[List[int]]:
+    """
+    Group symbols connected by correlations at or above the threshold.
+
+    Clusters are connected components of the above-threshold graph, so A and C
+    share a cluster when both are highly correlated with B.
+
+    Args:
+        corr: (N, N) correlation matrix
+        threshold: Minimum correlation linking two symbols
+
+    Returns:
+        Lists of symbol indices (two or more each), largest cluster first
+    """
+    rows, cols = np.nonzero(np.triu(corr >= threshold, k=1))
+    parent = list(range(corr.shape[0]))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in set(rows.tolist()) | set(cols.tolist()):
+        groups.setdefault(find(i), []).append(i)
+
+    return sorted((sorted(g) for g in groups.values()), key=lambda g: (-len(g), g[0]))
+
+
+def analyze_correlation(
+    position_values: Dict[str, float],
+    time_range: str = "1y",
+    threshold: float = DEFAULT_CORRELATION_THRESHOLD,
+    include_matrix: bool = True
+) -> Dict:
+    """
+    Correlation matrix, highly correlated pairs and clusters for a portfolio.
+
+    Args:
+        position_values: Mapping of ticker to current market value
+        time_range: History window used for estimation
+        threshold: Minimum correlation for a pair to be flagged
+        include_matrix: Include the full matrix in the result (large for big portfolios)
+
+    Returns:
+        Dict with symbols, optional matrix, flagged pairs and clusters
+    """
+    weights_by_symbol: Dict[str, float] = {}
+    for ticker, value in position_values.items():
+        weights_by_symbol[ticker.upper()] = weights_by_symbol.get(ticker.upper(), 0.0) + value
+    total_value = sum(weights_by_symbol.values())
+    if total_value <= 0:
+        raise ValueError("Portfolio has no value")
+    if len(weights_by_symbol) < 2:
+        raise ValueError("Correlation analysis needs at least two holdings")
+
+    symbols, corr = get_correlation_matrix(list(weights_by_symbol), time_range)
+    weights = np.array([weights_by_symbol[s] for s in symbols]) / total_value
+
+    # Strongest above-threshold pairs
+    rows, cols = np.nonzero(np.triu(corr >= threshold, k=1))
+    strongest = np.argsort(-corr[rows, cols], kind="stable")[:MAX_CORRELATED_PAIRS]
+
+    clusters = []
+    for members in find_correlated_clusters(corr, threshold):
+        sub = corr[np.ix_(members, members)]
+        off_diagonal = sub[~np.eye(len(members), dtype=bool)]
+        combined_weight = float(weights[members].sum()) * 100
+        clusters.append({
+            "symbols": [symbols[i] for i in members],
+            "combined_weight": round(combined_weight, 2),
+            "average_correlation": round(float(off_diagonal.mean()), 3),
+            "concentrated": combined_weight > SECTOR_CONCENTRATION_THRESHOLD
+        })
+
+    return {
+        "time_range": time_range,
+        "threshold": threshold,
+        "symbols": symbols,
+        "matrix": np.round(corr, 3).tolist() if include_matrix else None,
+        "correlated_pairs": [
+            {
+                "symbols": [symbols[rows[k]], symbols[cols[k]]],
+                "correlation": round(float(corr[rows[k], cols[k]]), 3)
+            }
+            for k in strongest
+        ],
+        "clusters": clusters
+    }
+
+
+def clear_correlation_cache():
+    """Clear cached correlation matrices. Useful for testing."""
+    _correlation_cache.clear()
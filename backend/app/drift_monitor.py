@@ -0,0 +1,143 @@
+"""
+Scheduled drift monitoring for stored portfolios.
+
+A background task periodically pulls the latest cached quotes for every ticker
+held in a stored portfolio (one lookup per distinct ticker). Only portfolios
+holding a ticker whose price changed since the previous run, or that have not
+been checked since their holdings were edited, are revalued; their sector
+totals are adjusted incrementally and their drift from the target model is
+recomputed. Portfolios drifting past the threshold are flagged so the
+frontend can surface them.
+"""
+
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional
+import os
+import logging
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from .background import PeriodicTask
+from .database import SessionLocal
+from .market_data import get_latest_prices
+from .models import Holding, Portfolio
+from .portfolio import MODEL_PORTFOLIOS
+from .portfolio_store import revalue_holdings
+from .rebalance_solver import DEFAULT_DRIFT_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+DRIFT_MONITOR_INTERVAL_SECONDS = float(os.getenv("DRIFT_MONITOR_INTERVAL_SECONDS", "3600"))  # 0 disables
+DRIFT_ALERT_THRESHOLD = float(os.getenv("DRIFT_ALERT_THRESHOLD", str(DEFAULT_DRIFT_THRESHOLD)))
+
+# Prices seen on the previous run: ticker -> price
+_last_prices: Dict[str, float] = {}
+_last_prices_lock = Lock()
+
+_monitor: Optional[PeriodicTask] = None
+
+
+def calculate_drift(sector_totals: Dict[str, float], total_value: float, model_type: str) -> float:
+    """
+    Largest absolute deviation of any sector from the model target.
+
+    Args:
+        sector_totals: Mapping of sector to market value
+        total_value: Portfolio market value
+        model_type: Target model ("conservative", "balanced", or "growth")
+
+    Returns:
+        Drift in percentage points
+    """
+    if total_value <= 0:
+        return 0.0
+
+    targets = MODEL_PORTFOLIOS.get(model_type, MODEL_PORTFOLIOS["balanced"])
+    sectors = set(targets) | set(sector_totals)
+    return max(
+        abs(sector_totals.get(sector, 0.0) / total_value * 100 - targets.get(sector, 0.0))
+        for sector in sectors
+    )
+
+
+def run_drift_check(db: Session, threshold: float = DRIFT_ALERT_THRESHOLD) -> Dict:
+    """
+    Revalue stale portfolios at the latest quotes and flag those that drifted.
+
+    Args:
+        db: Database session
+        threshold: Drift in percentage points above which a portfolio is flagged
+
+    Returns:
+        Dict with counts of tickers checked and changed, portfolios revalued and flagged
+    """
+    tickers = [ticker for (ticker,) in db.query(Holding.ticker).distinct()]
+    prices = get_latest_prices(tickers)
+
+    with _last_prices_lock:
+        changed = [t for t, price in prices.items() if _last_prices.get(t) != price]
+
+    conditions = [Portfolio.drift_checked_at.is_(None)]
+    if changed:
+        conditions.append(Portfolio.holdings.any(Holding.ticker.in_(changed)))
+    portfolios = db.query(Portfolio).filter(or_(*conditions)).all()
+
+    checked_at = datetime.utcnow()
+    flagged = 0
+    for portfolio in portfolios:
+        revalue_holdings(portfolio, prices)
+        portfolio.drift = round(
+            calculate_drift(portfolio.sector_totals or {}, portfolio.total_value, portfolio.model_type), 2
+        )
+        portfolio.drift_flagged = portfolio.drift > threshold
+        portfolio.drift_checked_at = checked_at
+        flagged += portfolio.drift_flagged
+
+    db.commit()
+
+    with _last_prices_lock:
+        _last_prices.update(prices)
+
+    summary = {
+        "tickers_checked": len(tickers),
+        "tickers_changed": len(changed),
+        "portfolios_revalued": len(portfolios),
+        "portfolios_flagged": flagged
+    }
+    if portfolios:
+        logger.info(f"Drift check: {summary}")
+    return summary
+
+
+def _scheduled_drift_check():
+    """Run one drift check with its own database session."""
+    db = SessionLocal()
+    try:
+        run_drift_check(db)
+    finally:
+        db.close()
+
+
+def start_drift_monitor():
+    """Start the periodic drift monitor unless disabled by configuration."""
+    global _monitor
+    if DRIFT_MONITOR_INTERVAL_SECONDS <= 0:
+        logger.info("Drift monitor disabled")
+        return
+    if _monitor is None:
+        _monitor = PeriodicTask("drift-monitor", _scheduled_drift_check, DRIFT_MONITOR_INTERVAL_SECONDS)
+    _monitor.start()
+
+
+def stop_drift_monitor():
+    """Stop the periodic drift monitor if it is running."""
+    if _monitor is not None:
+        _monitor.stop()
+
+
+def clear_drift_state():
+    """Forget prices seen on previous runs. Useful for testing."""
+    with _last_prices_lock:
+        _last_prices.clear()
@@ -0,0 +1,224 @@
+"""
+Mean-variance efficient frontier for model portfolio suggestions.
+
+Computes the long-only efficient frontier over a user's holdings plus the
+candidate sector funds (see SECTOR_FUNDS) from cached historical returns, and
+picks the frontier portfolio nearest each MODEL_PORTFOLIOS risk level. A
+model's risk level is the historical volatility of its sector-fund mix, so
+"balanced" means "about as volatile as the balanced model".
+
+Each frontier point minimizes t * variance - (1 - t) * return on the simplex
+(weights >= 0, summing to 1) for one trade-off t. All points are solved
+together with accelerated projected gradient descent, so every iteration is a
+single (points x N) @ (N x N) product.
+
+Results are cached per (universe, time range, number of points). The
+funds-only universe is precomputed in the background for common time ranges.
+"""
+
+from typing import Dict, List, Optional
+import os
+import logging
+
+import numpy as np
+
+from .background import PeriodicTask
+from .backtest import model_fund_weights
+from .market_data import TTLCache
+from .portfolio import MODEL_PORTFOLIOS
+from .rebalance_solver import SECTOR_FUNDS
+from .risk import get_return_statistics
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_FUNDS = sorted(set(SECTOR_FUNDS.values()))
+DEFAULT_FRONTIER_POINTS = 25
+FRONTIER_ITERATIONS = 500
+MIN_REPORTED_WEIGHT = 1e-4  # Weights below 0.01% are dropped from the response
+
+# Background precompute of the funds-only frontier (0 disables)
+FRONTIER_PRECOMPUTE_INTERVAL_SECONDS = float(os.getenv("FRONTIER_PRECOMPUTE_INTERVAL_SECONDS", "86400"))
+FRONTIER_PRECOMPUTE_RANGES = [
+    r.strip() for r in os.getenv("FRONTIER_PRECOMPUTE_RANGES", "1y,5y").split(",") if r.strip()
+]
+
+# Frontier cache: (universe, time_range, num_points) -> result
+_frontier_cache = TTLCache()
+
+_precompute_task: Optional[PeriodicTask] = None
+
+
+def project_to_simplex(weights: np.ndarray) -> np.ndarray:
+    """
+    Euclidean projection of each row onto the probability simplex.
+
+    Args:
+        weights: (K, N) matrix
+
+    Returns:
+        (K, N) matrix whose rows are non-negative and sum to 1
+    """
+    k, n = weights.shape
+    ordered = -np.sort(-weights, axis=1)
+    cumulative = np.cumsum(ordered, axis=1) - 1.0
+    positive = ordered - cumulative / np.arange(1, n + 1) > 0
+    # Last index where the condition holds
+    rho = n - 1 - np.argmax(positive[:, ::-1], axis=1)
+    theta = cumulative[np.arange(k), rho] / (rho + 1)
+    return np.maximum(weights - theta[:, None], 0.0)
+
+
+def solve_frontier(
+    mean: np.ndarray,
+    cov: np.ndarray,
+    num_points: int = DEFAULT_FRONTIER_POINTS,
+    iterations: int = FRONTIER_ITERATIONS
+) -> np.ndarray:
+    """
+    Long-only mean-variance efficient portfolios for a grid of risk trade-offs.
+
+    Args:
+        mean: (N,) expected periodic returns
+        cov: (N, N) covariance of periodic returns
+        num_points: Number of trade-offs, from maximum return to minimum variance
+        iterations: Projected gradient iterations
+
+    Returns:
+        (num_points, N) weights, one efficient portfolio per row
+    """
+    n = len(mean)
+    # Scale both terms to order one so a fixed step size works for any universe
+    cov_scale = max(float(np.linalg.eigvalsh(cov)[-1]), 1e-12)
+    mean_scale = max(float(np.abs(mean).max()), 1e-12)
+    # More points toward the low-risk end, where the frontier bends fastest
+    t = 1.0 - (1.0 - np.linspace(0.0, 1.0, num_points)) ** 3
+    t = t[:, None]
+
+    scaled_cov = cov / cov_scale
+    linear = (1.0 - t) * (mean / mean_scale)[None, :]
+    step = 0.5  # 1 / Lipschitz constant of the gradient (2 * t * scaled_cov)
+
+    weights = np.full((num_points, n), 1.0 / n)
+    momentum = weights
+    previous = 1.0
+    for _ in range(iterations):
+        gradient = 2.0 * t * (momentum @ scaled_cov) - linear
+        updated = project_to_simplex(momentum - step * gradient)
+        current = (1.0 + np.sqrt(1.0 + 4.0 * previous * previous)) / 2.0
+        momentum = updated + ((previous - 1.0) / current) * (updated - weights)
+        weights, previous = updated, current
+
+    return weights
+
+
+def compute_frontier(
+    holdings: Optional[List[str]] = None,
+    time_range: str = "5y",
+    num_points: int = DEFAULT_FRONTIER_POINTS
+) -> Dict:
+    """
+    Efficient frontier over holdings plus candidate funds, using the cache when possible.
+
+    Args:
+        holdings: Ticker symbols held by the user (optional)
+        time_range: "1y", "3y", "5y", or "10y"
+        num_points: Number of frontier points to compute
+
+    Returns:
+        Dict with the universe, frontier points (lowest risk first) and the
+        point nearest each model portfolio's risk level
+    """
+    universe = tuple(sorted({s.upper() for s in holdings or []} | set(CANDIDATE_FUNDS)))
+    key = (universe, time_range, num_points)
+
+    cached = _frontier_cache.get(key)
+    if cached is not None:
+        return cached
+
+    stats = get_return_statistics(list(universe), time_range)
+    symbols = stats["symbols"]
+    mean, cov, periods = stats["mean"], stats["cov"], stats["periods_per_year"]
+
+    weights = solve_frontier(mean, cov, num_points)
+    returns = weights @ mean * periods
+    volatility = np.sqrt(np.clip(np.einsum("kn,nm,km->k", weights, cov, weights), 0.0, None) * periods)
+
+    # Lowest risk first; drop points that converged to the same portfolio
+    order = np.argsort(volatility, kind="stable")
+    keep = [order[0]] + [
+        k for prev, k in zip(order[:-1], order[1:])
+        if abs(volatility[k] - volatility[prev]) > 1e-6 or abs(returns[k] - returns[prev]) > 1e-6
+    ]
+    points = [_frontier_point(symbols, weights[k], returns[k], volatility[k]) for k in keep]
+    point_vols = volatility[keep]
+
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    suggestions = []
+    for model_type in MODEL_PORTFOLIOS:
+        model_weights = np.zeros(len(symbols))
+        for symbol, weight in model_fund_weights(model_type).items():
+            model_weights[index[symbol]] = weight
+        model_vol = float(np.sqrt(max(model_weights @ cov @ model_weights, 0.0) * periods))
+        nearest = int(np.argmin(np.abs(point_vols - model_vol)))
+        suggestions.append({
+            "model_type": model_type,
+            "target_volatility": round(model_vol * 100, 2),
+            "model_expected_return": round(float(model_weights @ mean * periods) * 100, 2),
+            "portfolio": points[nearest]
+        })
+
+    result = {
+        "time_range": time_range,
+        "symbols": symbols,
+        "frontier": points,
+        "suggestions": suggestions
+    }
+
+    _frontier_cache.set(key, result)
+
+    return result
+
+
+def precompute_frontiers():
+    """Warm the cache with the funds-only frontier for common time ranges."""
+    for time_range in FRONTIER_PRECOMPUTE_RANGES:
+        compute_frontier(None, time_range)
+    logger.info(f"Precomputed efficient frontiers for {', '.join(FRONTIER_PRECOMPUTE_RANGES)}")
+
+
+def start_frontier_precompute():
+    """Start the periodic frontier precompute unless disabled by configuration."""
+    global _precompute_task
+    if FRONTIER_PRECOMPUTE_INTERVAL_SECONDS <= 0:
+        logger.info("Frontier precompute disabled")
+        return
+    if _precompute_task is None:
+        # Not on startup: the first run fetches every fund's history, which would compete for
+        # the market data quota with the other startup tasks. Until then /frontier computes on demand.
+        _precompute_task = PeriodicTask(
+            "frontier-precompute", precompute_frontiers, FRONTIER_PRECOMPUTE_INTERVAL_SECONDS, run_immediately=False
+        )
+    _precompute_task.start()
+
+
+def stop_frontier_precompute():
+    """Stop the periodic frontier precompute if it is running."""
+    if _precompute_task is not None:
+        _precompute_task.stop()
+
+
+def clear_frontier_cache():
+    """Clear cached frontiers. Useful for testing."""
+    _frontier_cache.clear()
+
+
+def _frontier_point(symbols: List[str], weights: np.ndarray, expected_return: float, volatility: float) -> Dict:
+    return {
+        "expected_return": round(float(expected_return) * 100, 2),
+        "volatility": round(float(volatility) * 100, 2),
+        "weights": {
+            symbol: round(float(w) * 100, 2)
+            for symbol, w in zip(symbols, weights)
+            if w >= MIN_REPORTED_WEIGHT
+        }
+    }
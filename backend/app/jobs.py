@@ -0,0 +1,373 @@
+"""
+Background job queue for long-running analyses.
+
+Heavy requests (rebalancing with AI reasoning, projections, backtests) are
+stored as Job rows and executed by an in-process thread pool, so the HTTP
+request returns a job ID immediately. Handlers publish partial results as they
+go (e.g. the deterministic rebalance plan before any AI reasoning) and check
+for cancellation between steps.
+
+Job state lives in the application database, so status and results survive a
+restart; jobs that were running when the process stopped are marked failed and
+queued jobs are resubmitted on startup.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+import os
+import uuid
+import logging
+
+from sqlalchemy.orm import Session
+
+from .backtest import model_fund_weights, run_backtest
+from .database import SessionLocal
+from .models import Job, User
+from .portfolio import (
+    calculate_portfolio_value,
+    analyze_sector_allocation,
+    plan_rebalancing,
+    build_portfolio_context,
+    build_target_allocation,
+    attach_ai_reasoning
+)
+from .schemas import PortfolioHolding
+from .simulation import project_portfolio
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Recommendations per reasoning call in rebalance jobs; each chunk is reasoned
+# concurrently/batched by the LLM service and reported as progress when it finishes
+JOB_REASONING_CHUNK_SIZE = int(os.getenv("JOB_REASONING_CHUNK_SIZE", "5"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_futures: Dict[str, Future] = {}
+_lock = Lock()
+
+# Session factory used by worker threads (overridable for tests)
+_session_factory: Callable[[], Session] = SessionLocal
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled."""
+
+
+class JobContext:
+    """Handle passed to job handlers for reporting progress and checking cancellation."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested."""
+        db = _session_factory()
+        try:
+            job = db.get(Job, self.job_id)
+            if job is None or job.cancel_requested:
+                raise JobCancelled()
+        finally:
+            db.close()
+
+    def report_progress(self, completed: int, total: int, partial_result: Optional[Dict] = None):
+        """
+        Store progress and, optionally, the latest partial result.
+
+        Args:
+            completed: Steps finished so far
+            total: Total number of steps
+            partial_result: Result so far (JSON-serializable)
+        """
+        db = _session_factory()
+        try:
+            job = db.get(Job, self.job_id)
+            if job is None:
+                return
+            job.progress_completed = completed
+            job.progress_total = total
+            if partial_result is not None:
+                # Assign a copy so SQLAlchemy sees a new value for the JSON column
+                job.partial_result = _copy_json(partial_result)
+            db.commit()
+        finally:
+            db.close()
+
+
+def configure_job_store(session_factory: Callable[[], Session]):
+    """Use a different session factory for worker threads. Useful for testing."""
+    global _session_factory
+    _session_factory = session_factory
+
+
+def submit_job(db: Session, user: User, kind: str, payload: Dict) -> Job:
+    """
+    Store a new job and queue it for execution.
+
+    Args:
+        db: Database session
+        user: Owner of the job
+        kind: Handler name (see JOB_HANDLERS)
+        payload: JSON-serializable handler input
+
+    Returns:
+        The queued Job
+
+    Raises:
+        ValueError: If the job kind is unknown
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+
+    job = Job(id=str(uuid.uuid4()), user_id=user.id, kind=kind, status="queued", payload=payload)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _enqueue(job.id)
+    return job
+
+
+def get_user_job(db: Session, user: User, job_id: str) -> Optional[Job]:
+    """Get a job owned by the user, or None."""
+    return db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+
+
+def list_user_jobs(db: Session, user: User, limit: int = 50) -> List[Job]:
+    """Get the user's most recent jobs, newest first."""
+    return (
+        db.query(Job)
+        .filter(Job.user_id == user.id)
+        .order_by(Job.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def cancel_job(db: Session, job: Job) -> Job:
+    """
+    Cancel a job.
+
+    Queued jobs are cancelled immediately; running jobs stop at their next
+    cancellation check. Finished jobs are left unchanged.
+
+    Args:
+        db: Database session
+        job: Job to cancel
+
+    Returns:
+        The updated Job
+    """
+    if job.status in FINISHED_STATUSES:
+        return job
+
+    job.cancel_requested = True
+    with _lock:
+        future = _futures.get(job.id)
+    if job.status == "queued" and (future is None or future.cancel()):
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def recover_jobs():
+    """Fail jobs interrupted by a restart and resubmit queued ones."""
+    db = _session_factory()
+    try:
+        interrupted = db.query(Job).filter(Job.status == "running").all()
+        for job in interrupted:
+            job.status = "failed"
+            job.error = "Interrupted by server restart"
+            job.finished_at = datetime.utcnow()
+        queued = [job.id for job in db.query(Job).filter(Job.status == "queued")]
+        db.commit()
+    finally:
+        db.close()
+
+    for job_id in queued:
+        _enqueue(job_id)
+    if interrupted or queued:
+        logger.info(f"Recovered jobs: {len(interrupted)} failed, {len(queued)} resubmitted")
+
+
+def shutdown_job_queue():
+    """Stop the worker pool, cancelling jobs that have not started."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _futures.clear()
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared worker pool, creating it on first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job-worker")
+        return _executor
+
+
+def _enqueue(job_id: str):
+    """Submit a stored job to the worker pool."""
+    future = _get_executor().submit(_run_job, job_id)
+    with _lock:
+        _futures[job_id] = future
+    future.add_done_callback(lambda _: _forget(job_id))
+
+
+def _forget(job_id: str):
+    with _lock:
+        _futures.pop(job_id, None)
+
+
+def _run_job(job_id: str):
+    """Execute one job in a worker thread and record its outcome."""
+    db = _session_factory()
+    try:
+        job = db.get(Job, job_id)
+        if job is None or job.status != "queued" or job.cancel_requested:
+            if job is not None and job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = datetime.utcnow()
+                db.commit()
+            return
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        db.commit()
+        kind, payload = job.kind, job.payload
+    finally:
+        db.close()
+
+    status, result, error = "succeeded", None, None
+    try:
+        result = JOB_HANDLERS[kind](JobContext(job_id), payload)
+    except JobCancelled:
+        status = "cancelled"
+    except Exception as e:
+        logger.error(f"Job {job_id} ({kind}) failed: {str(e)}", exc_info=True)
+        status, error = "failed", str(e)
+
+    db = _session_factory()
+    try:
+        job = db.get(Job, job_id)
+        if job is None:
+            return
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _copy_json(value):
+    """Shallow-copy nested dicts/lists so JSON column changes are detected."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _holdings(payload: Dict) -> List[PortfolioHolding]:
+    return [PortfolioHolding(**h) for h in payload.get("holdings") or []]
+
+
+def _run_rebalance_job(context: JobContext, payload: Dict) -> Dict:
+    """
+    Rebalance with AI reasoning, publishing the deterministic plan first.
+
+    Payload: {"holdings": [...], "model_type": "balanced"}
+    """
+    model_type = payload.get("model_type", "balanced")
+    total_value, ticker_details = calculate_portfolio_value(_holdings(payload))
+    current_sectors = analyze_sector_allocation(ticker_details, total_value)
+    recommendations = plan_rebalancing(ticker_details, model_type)
+
+    response = {
+        "model_type": model_type,
+        "current_allocation": current_sectors,
+        "target_allocation": build_target_allocation(model_type, total_value),
+        "recommendations": recommendations
+    }
+    context.report_progress(0, len(recommendations), response)
+
+    portfolio_context = build_portfolio_context(current_sectors, ticker_details, total_value)
+    for start in range(0, len(recommendations), JOB_REASONING_CHUNK_SIZE):
+        context.check_cancelled()
+        chunk = recommendations[start:start + JOB_REASONING_CHUNK_SIZE]
+        attach_ai_reasoning(chunk, ticker_details, model_type, portfolio_context)
+        context.report_progress(start + len(chunk), len(recommendations), response)
+
+    return response
+
+
+def _run_projection_job(context: JobContext, payload: Dict) -> Dict:
+    """
+    Monte Carlo projection.
+
+    Payload: ProjectionRequest fields
+    """
+    _, ticker_details = calculate_portfolio_value(_holdings(payload))
+    context.report_progress(0, 1)
+    context.check_cancelled()
+
+    result = project_portfolio(
+        {ticker: d["value"] for ticker, d in ticker_details.items()},
+        years=payload["years"],
+        num_paths=payload["num_paths"],
+        time_range=payload["time_range"],
+        seed=payload.get("seed"),
+        parallel=payload.get("parallel", False),
+        latency_budget_ms=payload["latency_budget_ms"]
+    )
+    context.report_progress(1, 1)
+    return result
+
+
+def _run_backtest_job(context: JobContext, payload: Dict) -> Dict:
+    """
+    Backtest strategies one at a time, publishing each result as it finishes.
+
+    Payload: BacktestRequest fields
+    """
+    strategies = [(m, model_fund_weights(m)) for m in payload["model_types"]]
+    holdings = _holdings(payload)
+    if holdings:
+        _, ticker_details = calculate_portfolio_value(holdings)
+        strategies.append(("current", {ticker: d["value"] for ticker, d in ticker_details.items()}))
+
+    response = {"time_range": payload["time_range"], "rebalance": payload["rebalance"], "results": []}
+    context.report_progress(0, len(strategies), response)
+
+    for i, (strategy, weights) in enumerate(strategies):
+        context.check_cancelled()
+        response["results"].append(run_backtest(
+            strategy,
+            weights,
+            time_range=payload["time_range"],
+            rule=payload["rebalance"],
+            threshold=payload["threshold"],
+            initial_value=payload["initial_value"]
+        ))
+        context.report_progress(i + 1, len(strategies), response)
+
+    return response
+
+
+JOB_HANDLERS: Dict[str, Callable[[JobContext, Dict], Dict]] = {
+    "rebalance": _run_rebalance_job,
+    "projection": _run_projection_job,
+    "backtest": _run_backtest_job
+}
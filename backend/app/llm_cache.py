@@ -0,0 +1,293 @@
+"""
+Bounded cache for LLM-generated reasoning.
+
+Entries are keyed on a fingerprint of everything that shapes the prompt
+(recommendation, model, portfolio context), with numbers bucketed so small
+share or value changes still hit. The in-memory tier is an LRU with a TTL;
+an optional SQLite file tier (LLM_CACHE_PATH) survives restarts and refills
+the memory tier on a hit. Hit and miss counts are tracked per tier.
+
+Reasoning precomputed offline for common recommendation shapes (see
+reasoning_precompute.py) is held in PrecomputedReasoning, which also counts
+how often each shape is requested.
+"""
+
+from collections import Counter, OrderedDict
+from contextlib import closing
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")  # Empty disables the disk tier
+
+PERCENT_BUCKET = 1.0  # Allocation percentages to the nearest point
+SCORE_BUCKET = 0.05  # Diversification score
+MAGNITUDE_RATIO = 1.1  # Shares, amounts and portfolio value: ~10% wide log buckets
+SHAPE_PERCENT_BUCKET = 5.0  # Allocations in a recommendation shape, e.g. "~45% -> 25%"
+
+
+def bucket_magnitude(value: float, ratio: float = MAGNITUDE_RATIO) -> int:
+    """Logarithmic bucket index, so values within a few percent share a bucket."""
+    if not value:
+        return 0
+    index = int(round(math.log(abs(value)) / math.log(ratio)))
+    return index if value > 0 else -index
+
+
+def bucket_step(value: float, step: float) -> float:
+    """Round to the nearest multiple of step."""
+    return round(round(value / step) * step, 6)
+
+
+def reasoning_fingerprint(recommendation: Dict, model_type: str, portfolio_context: Dict, variant: str = "") -> str:
+    """
+    Fingerprint of the inputs that shape a reasoning prompt.
+
+    Args:
+        recommendation: Recommendation details
+        model_type: Portfolio model
+        portfolio_context: Portfolio metadata included in the prompt
+        variant: Extra discriminator (e.g. prompt style or model route)
+
+    Returns:
+        Hex digest
+    """
+    normalized = {
+        "ticker": recommendation["ticker"].upper(),
+        "action": recommendation["action"],
+        "sector": recommendation["sector"],
+        # The trade amount follows from shares at the ticker's price, so it is not keyed separately
+        "shares": bucket_magnitude(recommendation["shares"]),
+        "current": bucket_step(recommendation["current_percentage"], PERCENT_BUCKET),
+        "target": bucket_step(recommendation["target_percentage"], PERCENT_BUCKET),
+        "model_type": model_type,
+        "total_value": bucket_magnitude(portfolio_context["total_value"]),
+        "total_holdings": portfolio_context["total_holdings"],
+        "diversification": bucket_step(portfolio_context["diversification_score"], SCORE_BUCKET),
+        "concentrated": sorted(portfolio_context["concentrated_sectors"]),
+        "variant": variant
+    }
+    payload = json.dumps(normalized, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def recommendation_shape(recommendation: Dict, model_type: str) -> Tuple[str, str, float, float, str]:
+    """
+    Portfolio-independent shape of a recommendation.
+
+    Args:
+        recommendation: Recommendation details
+        model_type: Portfolio model
+
+    Returns:
+        (sector, action, current %, target %, model_type) with allocations
+        rounded to SHAPE_PERCENT_BUCKET
+    """
+    return (
+        recommendation["sector"],
+        recommendation["action"],
+        bucket_step(recommendation["current_percentage"], SHAPE_PERCENT_BUCKET),
+        bucket_step(recommendation["target_percentage"], SHAPE_PERCENT_BUCKET),
+        model_type
+    )
+
+
+class PrecomputedReasoning:
+    """Thread-safe lookup of precomputed reasoning by recommendation shape, with usage counts."""
+
+    def __init__(self):
+        self._reasoning: Dict[tuple, str] = {}
+        self._usage: Counter = Counter()  # Requests per shape since the last take_usage()
+        self._hits = 0
+        self._lock = Lock()
+
+    def record(self, shape: tuple):
+        """Count one request for a shape."""
+        with self._lock:
+            self._usage[shape] += 1
+
+    def get(self, shape: tuple) -> Optional[str]:
+        """Precomputed reasoning for a shape, or None."""
+        with self._lock:
+            reasoning = self._reasoning.get(shape)
+            if reasoning:
+                self._hits += 1
+            return reasoning
+
+    def take_usage(self) -> Counter:
+        """Return and reset the usage counts."""
+        with self._lock:
+            usage, self._usage = self._usage, Counter()
+            return usage
+
+    def replace(self, reasoning_by_shape: Dict[tuple, str]):
+        """Swap in a freshly loaded table."""
+        with self._lock:
+            self._reasoning = dict(reasoning_by_shape)
+
+    def clear(self):
+        """Drop the table, usage counts and statistics."""
+        with self._lock:
+            self._reasoning.clear()
+            self._usage.clear()
+            self._hits = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"precomputed_shapes": len(self._reasoning), "precomputed_hits": self._hits}
+
+
+# Shared by every LLMService instance and the precompute job
+precomputed_reasoning = PrecomputedReasoning()
+
+
+class ReasoningCache:
+    """Thread-safe LRU/TTL cache with an optional SQLite tier."""
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        path: str = LLM_CACHE_PATH
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path or None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, stored_at)
+        self._lock = Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS reasoning_cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_reasoning_cache_stored_at ON reasoning_cache (stored_at)")
+                self._prune(conn, time.time())
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached value, or None on a miss or expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self._memory_hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+
+        if self.path:
+            row = self._disk_get(key, now)
+            if row:
+                with self._lock:
+                    self._disk_hits += 1
+                    self._store(key, row[0], row[1])
+                return row[0]
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def set(self, key: str, value: str):
+        """Store a value in memory and, if enabled, on disk."""
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO reasoning_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                        (key, value, now)
+                    )
+                    self._prune(conn, now)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not write LLM cache entry to disk: {str(e)}")
+
+    def clear(self):
+        """Drop all entries (both tiers) and reset statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._memory_hits = self._disk_hits = self._misses = self._evictions = 0
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM reasoning_cache")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "disk_enabled": self.path is not None
+            }
+
+    def _store(self, key: str, value: str, stored_at: float):
+        """Insert into the memory tier, evicting the least recently used entry. Caller holds the lock."""
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[tuple]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, stored_at FROM reasoning_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read LLM cache entry from disk: {str(e)}")
+            return None
+        if row and now - row[1] < self.ttl_seconds:
+            return row
+        return None
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """Delete expired rows from the SQLite tier and keep at most max_entries, newest first."""
+        conn.execute("DELETE FROM reasoning_cache WHERE stored_at <= ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM reasoning_cache WHERE stored_at < "
+            "(SELECT stored_at FROM reasoning_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries - 1,)
+        )
+
+    def _connect(self):
+        """Connection that commits on success and is always closed."""
+        return _Connection(self.path)
+
+
+class _Connection:
+    """sqlite3 connection context manager that also closes the connection on exit."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=5)
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        with closing(self._conn):
+            return self._conn.__exit__(*exc)
@@ -6,27 +6,165 @@ intelligent, contextual reasoning for rebalancing recommendations.
 """
 
 import os
-from typing import Dict, Optional
-from anthropic import Anthropic
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+from queue import Empty, Queue
+from threading import Event, Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+from anthropic import Anthropic, APITimeoutError, AsyncAnthropic, Timeout
 import logging
 
+from .circuit_breaker import CircuitBreaker
+from .llm_cache import ReasoningCache, precomputed_reasoning, reasoning_fingerprint, recommendation_shape
+from .llm_telemetry import llm_telemetry
+
 logger = logging.getLogger(__name__)
 
+# Reasoning calls run concurrently on a shared pool so slow calls don't serialize a response
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "10"))
+LLM_TOTAL_TIMEOUT_SECONDS = float(os.getenv("LLM_TOTAL_TIMEOUT_SECONDS", "15"))
+
+# Client-level limits: LLM_CALL_TIMEOUT_SECONDS is the read timeout, connecting gets less
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "3"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+
+# Skip the API for a cool-down after this many consecutive failed calls
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "60"))
+
+# One structured prompt per model instead of one call per recommendation
+LLM_BATCH_REASONING = os.getenv("LLM_BATCH_REASONING", "true").lower() == "true"
+BATCH_MAX_TOKENS = 4000
+
+# Model and output budget (per recommendation) by portfolio complexity: short
+# explanations for simple portfolios go to a faster, cheaper model
+LLM_ROUTES = {
+    "simple": {
+        "model": os.getenv("LLM_MODEL_SIMPLE", "claude-haiku-4-5-20251001"),
+        "max_tokens": int(os.getenv("LLM_MAX_TOKENS_SIMPLE", "250"))
+    },
+    "medium": {
+        "model": os.getenv("LLM_MODEL_MEDIUM", "claude-sonnet-4-5-20250929"),
+        "max_tokens": int(os.getenv("LLM_MAX_TOKENS_MEDIUM", "350"))
+    },
+    "complex": {
+        "model": os.getenv("LLM_MODEL_COMPLEX", "claude-sonnet-4-5-20250929"),
+        "max_tokens": int(os.getenv("LLM_MAX_TOKENS_COMPLEX", "500"))
+    }
+}
+
+# Telemetry feature tags
+FEATURE_REBALANCE = "rebalance"
+FEATURE_REBALANCE_STREAM = "rebalance_stream"
+
+# Stable advisor instructions sent as the system prompt. Routes whose model can
+# cache it get a longer prefix (instructions plus model strategies and output rules)
+# with prompt caching, so repeated calls only pay full price for the variable
+# portfolio/recommendation suffix. Below the model's minimum cacheable length the
+# API silently sends a prefix uncached, so those routes keep the short prompt.
+LLM_PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "true").lower() == "true"
+SYSTEM_PROMPT = """You are a professional financial advisor helping with portfolio rebalancing.
+
+You will be given the current portfolio context, the target model portfolio (conservative, balanced or growth) and one or more rebalancing recommendations. Explain why each recommendation makes sense. Focus on:
+
+1. Why this allocation adjustment improves the portfolio
+2. How it addresses risk management (concentration, diversification)
+3. How it aligns with the target model's investment strategy
+
+Be professional, clear, and actionable. Do not include disclaimers or legal warnings. Just provide the investment reasoning."""
+PROMPT_GUIDE = """## Model portfolios
+
+Every recommendation moves the portfolio toward one of three model portfolios. Each model is a set of target sector weights; a holding's sector weight is its share of total portfolio value. Recommendations buy broad sector funds for underweight sectors and sell holdings in overweight sectors.
+
+Conservative: capital preservation and steady income for investors with a shorter horizon or a low tolerance for drawdowns. Targets: Technology 15%, Healthcare 15%, Financials 15%, Consumer Discretionary 10%, Consumer Staples 10%, Industrials 10%, Materials 5%, Energy 5%, Utilities 5%, Real Estate 5%, Communication Services 5%. No sector dominates; defensive sectors (Consumer Staples, Utilities, Healthcare, Real Estate) cushion market declines, and the spread across all eleven sectors keeps any single industry shock small. When explaining a conservative recommendation, emphasise lower volatility, dependable cash flows and protection against large losses rather than upside.
+
+Balanced: long-term growth with moderate volatility for investors who can ride out ordinary market cycles. Targets: Technology 25%, Healthcare 15%, Financials 15%, Consumer Discretionary 15%, Industrials 10%, Communication Services 10%, Consumer Staples 5%, Energy 5%. Growth sectors carry most of the weight, while Healthcare, Financials, Industrials and small defensive positions keep the portfolio from moving with a single theme. When explaining a balanced recommendation, weigh the growth it keeps against the risk it removes.
+
+Growth: maximum long-term appreciation for investors with a long horizon and a high tolerance for volatility. Targets: Technology 40%, Healthcare 20%, Consumer Discretionary 20%, Communication Services 10%, Financials 10%. The portfolio deliberately leans on innovation-driven sectors and accepts larger swings in exchange for higher expected returns. Even here, targets cap each sector, so trimming a holding that has grown well past its target is still part of the strategy. When explaining a growth recommendation, focus on compounding, exposure to secular trends and keeping the intended tilt without letting one position take over.
+
+## Sector roles
+
+- Technology: the main growth engine; high expected returns, high valuation risk and sensitivity to interest rates.
+- Healthcare: steady demand regardless of the economy, with growth from innovation; a bridge between growth and defence.
+- Financials: tied to interest rates and credit conditions; banks and insurers add income and cyclical exposure.
+- Consumer Discretionary: follows consumer spending; strong in expansions, weak in recessions.
+- Consumer Staples: everyday goods with stable demand; a defensive holding that tends to fall less in downturns.
+- Industrials: capital goods, transport and infrastructure; cyclical exposure to economic growth.
+- Communication Services: media, telecom and internet platforms; a mix of growth and steady subscription income.
+- Energy: oil, gas and related services; cyclical, commodity-driven and a partial hedge against inflation.
+- Materials: chemicals, metals and mining; cyclical and sensitive to commodity prices and global demand.
+- Utilities: regulated electricity, gas and water; stable dividends, defensive, sensitive to interest rates.
+- Real Estate: property trusts with rental income; an income source and partial inflation hedge, sensitive to rates.
+
+## Risk concepts
+
+- A sector above 30% of the portfolio is concentrated: a single sector downturn would do outsized damage, so selling down toward the target lowers the chance of a large loss. Name the concentrated sector when a recommendation reduces it.
+- A well diversified portfolio holds at least 5 sectors. The diversification score runs from 0 to 1 and rises as holdings spread more evenly across sectors; buying a missing or underweight sector raises it.
+- A recommendation that reduces an overweight sector also frees capital for underweight sectors; mention this when it is the main benefit.
+- Rebalancing is a discipline, not a market forecast: it sells what has grown beyond its target and buys what has fallen behind, which keeps risk in line with the chosen model.
+- Each recommendation is one step toward the target, so an allocation that stays above or below target after the trade is still moving in the right direction.
+
+## Output rules
+
+- Write plain prose in the second person ("your portfolio"). Do not use headings, bullet points, bold text or other markdown.
+- Keep to the requested length: concise means 50-100 words, balanced 100-150 words and comprehensive 150-300 words.
+- Refer to the sector, the current and target allocation, and the target model by name. Use the ticker, share count and dollar amount only when they are given in the recommendation.
+- Do not repeat the portfolio context back, restate the instructions or add a closing summary.
+- Do not predict prices, promise returns or recommend securities other than those in the recommendation.
+- Do not include disclaimers, legal warnings or advice to consult a professional.
+- When asked for several recommendations at once, explain each one on its own so it reads correctly when shown separately, and respond with only the requested JSON object: keys are the recommendation numbers as strings, values are the explanations, with no text before or after the object."""
+
+# Shortest prefix (tokens) the API caches, by model family; other models use the default
+PROMPT_CACHE_MIN_TOKENS = {"haiku": 4096, "opus": 4096}
+PROMPT_CACHE_DEFAULT_MIN_TOKENS = 1024
+CACHED_SYSTEM_PROMPT = f"{SYSTEM_PROMPT}\n\n{PROMPT_GUIDE}"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
 
 class LLMService:
     """Service for generating AI-powered rebalancing reasoning."""
 
-    def __init__(self):
-        """Initialize the Anthropic client."""
-        api_key = os.getenv("ANTHROPIC_API_KEY")
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        """
+        Initialize the Anthropic client.
+
+        Args:
+            api_key: API key (default: ANTHROPIC_API_KEY)
+            base_url: API base URL, e.g. a local stand-in server for load tests
+                (default: ANTHROPIC_BASE_URL, else the Anthropic API)
+        """
+        api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        base_url = base_url or os.getenv("ANTHROPIC_BASE_URL")
         if not api_key:
             logger.warning("ANTHROPIC_API_KEY not set. AI features will be disabled.")
             self.client = None
+            self.async_client = None
         else:
-            self.client = Anthropic(api_key=api_key)
+            client_options = {
+                "api_key": api_key,
+                "timeout": _request_timeout(LLM_CALL_TIMEOUT_SECONDS),
+                "max_retries": LLM_MAX_RETRIES
+            }
+            if base_url:
+                client_options["base_url"] = base_url
+                logger.info(f"Using Anthropic API base URL {base_url}")
+            self.client = Anthropic(**client_options)
+            # Used by async routes so waiting on the API doesn't hold a worker thread
+            self.async_client = AsyncAnthropic(**client_options)
+
+        self._breaker = CircuitBreaker("anthropic", LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN_SECONDS)
 
-        # Simple in-memory cache for responses (could be enhanced with Redis/etc)
-        self._cache = {}
+        # Bounded LRU/TTL cache keyed on a bucketed prompt fingerprint
+        self._cache = ReasoningCache()
+
+        # Model -> token count of CACHED_SYSTEM_PROMPT, counted once through the API
+        self._prefix_tokens: Dict[str, int] = {}
+        self._prefix_lock = Lock()
 
     def _get_portfolio_complexity(self, total_holdings: int) -> str:
         """
@@ -70,7 +208,10 @@ class LLMService:
         portfolio_context: Dict
     ) -> str:
         """
-        Build the prompt for Claude based on portfolio context.
+        Build the variable part of the prompt for Claude.
+
+        The advisor instructions live in SYSTEM_PROMPT; this is the per-call
+        user message.
 
         Args:
             holding: Current holding information
@@ -80,44 +221,275 @@ class LLMService:
         Returns:
             Formatted prompt string
         """
-        complexity = self._get_portfolio_complexity(portfolio_context["total_holdings"])
-        detail_level = self._get_detail_level(complexity)
+        detail_level = self._get_detail_level(
+            self._get_portfolio_complexity(portfolio_context["total_holdings"])
+        )
 
-        # Build concentrated sectors string
-        concentrated_str = ", ".join(portfolio_context["concentrated_sectors"]) if portfolio_context["concentrated_sectors"] else "None"
+        prompt = f"""{self._format_context(model_type, portfolio_context)}
+
+Rebalancing Recommendation:
+{self._format_recommendation(recommendation)}
 
-        prompt = f"""You are a professional financial advisor helping with portfolio rebalancing.
+Please provide a {detail_level} explanation for why this rebalancing recommendation makes sense for the {model_type} strategy."""
 
-Current Portfolio Context:
+        return prompt
+
+    def _build_batch_prompt(
+        self,
+        recommendations: List[Dict],
+        model_type: str,
+        portfolio_context: Dict
+    ) -> str:
+        """
+        Build one prompt covering several recommendations.
+
+        The portfolio context is included once and the model is asked for a
+        JSON object keyed by recommendation number.
+
+        Args:
+            recommendations: Recommendation details, in order
+            model_type: Portfolio model
+            portfolio_context: Portfolio metadata
+
+        Returns:
+            Formatted prompt string
+        """
+        detail_level = self._get_detail_level(
+            self._get_portfolio_complexity(portfolio_context["total_holdings"])
+        )
+        numbered = "\n\n".join(
+            f"Recommendation {i}:\n{self._format_recommendation(r)}"
+            for i, r in enumerate(recommendations, start=1)
+        )
+
+        return f"""{self._format_context(model_type, portfolio_context)}
+
+{numbered}
+
+For each recommendation, provide a {detail_level} explanation for why it makes sense for the {model_type} strategy.
+
+Respond with only a JSON object mapping each recommendation number to its explanation, for example {{"1": "...", "2": "..."}}."""
+
+    def _format_context(self, model_type: str, portfolio_context: Dict) -> str:
+        """Portfolio context block shared by single and batched prompts."""
+        concentrated_str = ", ".join(portfolio_context["concentrated_sectors"]) if portfolio_context["concentrated_sectors"] else "None"
+
+        return f"""Current Portfolio Context:
 - Total Value: ${portfolio_context['total_value']:,.2f}
 - Number of Holdings: {portfolio_context['total_holdings']}
 - Diversification Score: {portfolio_context['diversification_score']:.2f}/1.0
 - Concentrated Sectors (>30%): {concentrated_str}
-- Target Model: {model_type.capitalize()}
+- Target Model: {model_type.capitalize()}"""
 
-Rebalancing Recommendation:
-- Action: {recommendation['action'].upper()} {recommendation['shares']} shares of {recommendation['ticker']}
+    def _format_recommendation(self, recommendation: Dict) -> str:
+        """Recommendation detail lines shared by single and batched prompts."""
+        return f"""- Action: {recommendation['action'].upper()} {recommendation['shares']} shares of {recommendation['ticker']}
 - Sector: {recommendation['sector']}
 - Current {recommendation['sector']} Allocation: {recommendation['current_percentage']:.1f}%
 - Target {recommendation['sector']} Allocation: {recommendation['target_percentage']:.1f}%
-- Transaction Amount: ${recommendation['amount']:,.2f}
+- Transaction Amount: ${recommendation['amount']:,.2f}"""
 
-Please provide a {detail_level} explanation for why this rebalancing recommendation makes sense. Focus on:
+    def _system_prompt(self, route: str):
+        """
+        System prompt for a route.
 
-1. Why this allocation adjustment improves the portfolio
-2. How it addresses risk management (concentration, diversification)
-3. How it aligns with the {model_type} investment strategy
+        The long prefix is sent, marked for prompt caching, only when caching is
+        enabled and the prefix reaches the route model's minimum cacheable length;
+        otherwise the short prompt is sent uncached.
+        """
+        if not LLM_PROMPT_CACHING:
+            return SYSTEM_PROMPT
+        model = LLM_ROUTES[route]["model"]
+        tokens = self._cached_prefix_tokens(model)
+        if tokens is None or tokens < _prompt_cache_min_tokens(model):
+            return SYSTEM_PROMPT
+        return [{"type": "text", "text": CACHED_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
 
-Be professional, clear, and actionable. Do not include disclaimers or legal warnings. Just provide the investment reasoning."""
+    def _cached_prefix_tokens(self, model: str) -> Optional[int]:
+        """
+        Token count of CACHED_SYSTEM_PROMPT for a model, from the token counting API.
 
-        return prompt
+        Counted once per model (the first call for a model waits for it) as the
+        difference between a request with and without the prefix.
+
+        Returns:
+            Token count, or None if it could not be counted
+        """
+        with self._prefix_lock:
+            if model not in self._prefix_tokens:
+                if self.client is None:
+                    return None
+                try:
+                    def count(**system) -> int:
+                        return self.client.messages.count_tokens(
+                            model=model,
+                            messages=[{"role": "user", "content": "."}],
+                            timeout=LLM_CALL_TIMEOUT_SECONDS,
+                            **system
+                        ).input_tokens
+
+                    self._prefix_tokens[model] = count(system=CACHED_SYSTEM_PROMPT) - count()
+                    logger.info(f"Cached system prefix is {self._prefix_tokens[model]} tokens for {model}")
+                except Exception as e:
+                    logger.warning(f"Could not count system prefix tokens for {model}: {e}")
+                    return None
+            return self._prefix_tokens[model]
+
+    def _available(self, client) -> bool:
+        """True if the client is configured and the circuit breaker allows calls."""
+        return client is not None and self._breaker.allow()
+
+    def _route(self, portfolio_context: Dict) -> str:
+        """Route (a key of LLM_ROUTES) for a portfolio, by complexity."""
+        return self._get_portfolio_complexity(portfolio_context["total_holdings"])
+
+    def _message_params(self, prompt: str, route: str, max_tokens: int, timeout: float) -> Dict:
+        """Messages API arguments shared by the sync, async and streaming calls."""
+        return {
+            "model": LLM_ROUTES[route]["model"],
+            "max_tokens": max_tokens,
+            "system": self._system_prompt(route),
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "timeout": _request_timeout(timeout)
+        }
+
+    def _create_message(self, prompt: str, route: str, max_tokens: int, timeout: float, label: str):
+        """Call the Messages API with the cached system prefix and record usage and latency."""
+        start = time.perf_counter()
+        try:
+            message = self.client.messages.create(**self._message_params(prompt, route, max_tokens, timeout))
+        except Exception as e:
+            self._record_call(route, start, label, error=e)
+            raise
+        self._record_call(route, start, label, usage=getattr(message, "usage", None))
+        return message
+
+    async def _acreate_message(self, prompt: str, route: str, max_tokens: int, timeout: float, label: str):
+        """Async counterpart of _create_message() using the async client."""
+        start = time.perf_counter()
+        try:
+            message = await self.async_client.messages.create(**self._message_params(prompt, route, max_tokens, timeout))
+        except (Exception, asyncio.CancelledError) as e:
+            self._record_call(route, start, label, error=e)
+            raise
+        self._record_call(route, start, label, usage=getattr(message, "usage", None))
+        return message
+
+    def _record_call(
+        self,
+        route: str,
+        start: float,
+        label: str,
+        usage=None,
+        error: Optional[BaseException] = None,
+        feature: str = FEATURE_REBALANCE
+    ):
+        """
+        Record one finished API call with the circuit breaker and in telemetry.
+
+        Args:
+            route: Route the call used
+            start: time.perf_counter() when the call started
+            label: What the call was for, used in the usage log line
+            usage: Usage block from the response, if the call succeeded
+            error: Exception the call ended with, if any
+            feature: Telemetry feature tag
+        """
+        seconds = time.perf_counter() - start
+        outcome = _call_outcome(error)
+        if outcome == "success":
+            self._breaker.record_success()
+        elif outcome != "cancelled":
+            # A call we abandoned at a deadline says nothing about the API's health
+            self._breaker.record_failure()
+
+        if usage is not None:
+            self._log_usage(usage, label)
+        llm_telemetry.record_call(feature, LLM_ROUTES[route]["model"], outcome, seconds * 1000, usage, route=route)
+
+    def _log_usage(self, usage, label: str):
+        """
+        Log one call's input tokens split by prompt-cache status.
+
+        Args:
+            usage: Usage block from the API response (may be missing)
+            label: What the call was for, used in the log line
+        """
+        if usage is None:
+            return
+        counts = {
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0
+        }
+        logger.info(
+            f"LLM usage for {label}: {counts['input_tokens']} uncached input, "
+            f"{counts['cache_read_input_tokens']} cache read, "
+            f"{counts['cache_creation_input_tokens']} cache write, "
+            f"{counts['output_tokens']} output tokens"
+        )
+
+    def _cache_key(self, recommendation: Dict, model_type: str, portfolio_context: Dict) -> str:
+        # Keyed on the routed model too, so changing a route's model regenerates its answers
+        model = LLM_ROUTES[self._route(portfolio_context)]["model"]
+        return reasoning_fingerprint(recommendation, model_type, portfolio_context, variant=model)
+
+    def _lookup(
+        self,
+        cache_key: str,
+        recommendation: Dict,
+        model_type: str,
+        feature: str = FEATURE_REBALANCE
+    ) -> Optional[str]:
+        """
+        Reasoning available without a live call: the response cache first, then
+        reasoning precomputed for the recommendation's shape.
+        """
+        cached = self._cache.get(cache_key)
+        if cached:
+            llm_telemetry.record_cache(feature, "hit")
+            return cached
+        precomputed = precomputed_reasoning.get(recommendation_shape(recommendation, model_type))
+        if precomputed:
+            llm_telemetry.record_cache(feature, "precomputed")
+        return precomputed
+
+    def shape_request(self, shape: Tuple[str, str, float, float, str]) -> Dict:
+        """
+        Messages API parameters for portfolio-independent reasoning about a recommendation shape.
+
+        Used by the offline precompute job, which submits them through the
+        Message Batches API.
+
+        Args:
+            shape: (sector, action, current %, target %, model_type) from recommendation_shape()
+
+        Returns:
+            Request parameters (model, max_tokens, system, messages)
+        """
+        sector, action, current, target, model_type = shape
+        prompt = f"""Rebalancing Recommendation (applies to any holding in the sector):
+- Action: {action.upper()} {sector} holdings
+- Current {sector} Allocation: about {current:.0f}%
+- Target {sector} Allocation: about {target:.0f}%
+- Target Model: {model_type.capitalize()}
+
+Please provide a {self._get_detail_level("medium")} explanation for why this rebalancing recommendation makes sense for the {model_type} strategy. Do not mention specific tickers, share counts or dollar amounts."""
+
+        params = self._message_params(prompt, "medium", _max_tokens("medium"), LLM_CALL_TIMEOUT_SECONDS)
+        del params["timeout"]
+        return params
 
     def generate_rebalancing_reasoning(
         self,
         holding: Dict,
         recommendation: Dict,
         model_type: str,
-        portfolio_context: Dict
+        portfolio_context: Dict,
+        timeout: float = LLM_CALL_TIMEOUT_SECONDS
     ) -> Optional[str]:
         """
         Generate AI-powered reasoning for a rebalancing recommendation.
@@ -132,44 +504,38 @@ Be professional, clear, and actionable. Do not include disclaimers or legal warn
                 'concentrated_sectors': List[str],
                 'total_value': float
             }
+            timeout: Deadline for the API call in seconds
 
         Returns:
             AI-generated reasoning string, or None if generation fails
         """
-        if not self.client:
-            logger.debug("Anthropic client not initialized. Skipping AI generation.")
-            return None
-
         try:
             # Build cache key
-            cache_key = (
-                f"{recommendation['ticker']}_{recommendation['action']}_"
-                f"{recommendation['shares']}_{model_type}"
-            )
+            cache_key = self._cache_key(recommendation, model_type, portfolio_context)
+
+            # Check cache and precomputed reasoning; neither needs the API
+            cached = self._lookup(cache_key, recommendation, model_type)
+            if cached:
+                logger.debug(f"Cache hit for {recommendation['ticker']}")
+                return cached
 
-            # Check cache
-            if cache_key in self._cache:
-                logger.debug(f"Cache hit for {cache_key}")
-                return self._cache[cache_key]
+            if not self._available(self.client):
+                logger.debug("Anthropic client not initialized or circuit open. Skipping AI generation.")
+                return None
 
             # Build prompt
             prompt = self._build_prompt(holding, recommendation, model_type, portfolio_context)
 
             # Call Claude
             logger.info(f"Generating AI reasoning for {recommendation['ticker']}")
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=500,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            route = self._route(portfolio_context)
+            message = self._create_message(prompt, route, _max_tokens(route), timeout, recommendation['ticker'])
 
             # Extract response
             reasoning = message.content[0].text.strip()
 
             # Cache the response
-            self._cache[cache_key] = reasoning
+            self._cache.set(cache_key, reasoning)
 
             logger.info(f"Successfully generated AI reasoning for {recommendation['ticker']}")
             return reasoning
@@ -178,11 +544,666 @@ Be professional, clear, and actionable. Do not include disclaimers or legal warn
             logger.error(f"Error generating AI reasoning: {str(e)}", exc_info=True)
             return None
 
+    def generate_batch_reasoning(
+        self,
+        items: List[Dict],
+        model_type: str,
+        portfolio_context: Dict,
+        timeout: float = LLM_CALL_TIMEOUT_SECONDS
+    ) -> List[Optional[str]]:
+        """
+        Generate reasoning for several recommendations of one model in a single call.
+
+        Cached recommendations are answered from the cache; the rest share one
+        prompt. Items missing from the structured response come back as None.
+
+        Args:
+            items: Dicts with 'holding' and 'recommendation'
+            model_type: Portfolio model (conservative/balanced/growth)
+            portfolio_context: Portfolio metadata
+            timeout: Deadline for the API call in seconds
+
+        Returns:
+            Reasoning (or None) for each item, in order
+        """
+        results, uncached = self._cached_results(items, model_type, portfolio_context)
+        if not uncached or not self._available(self.client):
+            return results
+
+        try:
+            recommendations = [items[i]["recommendation"] for i in uncached]
+            logger.info(f"Generating batched AI reasoning for {len(recommendations)} recommendations")
+            route = self._route(portfolio_context)
+            message = self._create_message(
+                self._build_batch_prompt(recommendations, model_type, portfolio_context),
+                route,
+                _max_tokens(route, len(recommendations)),
+                timeout,
+                f"batch of {len(recommendations)}"
+            )
+        except Exception as e:
+            logger.error(f"Error generating batched AI reasoning: {str(e)}", exc_info=True)
+            return results
+
+        return self._apply_batch_response(message, items, uncached, results, model_type, portfolio_context)
+
+    def _cached_results(
+        self,
+        items: List[Dict],
+        model_type: str,
+        portfolio_context: Dict
+    ) -> Tuple[List[Optional[str]], List[int]]:
+        """Cached reasoning (or None) for each item, plus the indices that still need a call."""
+        results: List[Optional[str]] = [None] * len(items)
+        uncached = []
+        for i, item in enumerate(items):
+            cached = self._lookup(
+                self._cache_key(item["recommendation"], model_type, portfolio_context),
+                item["recommendation"],
+                model_type
+            )
+            if cached:
+                results[i] = cached
+            else:
+                uncached.append(i)
+        return results, uncached
+
+    def _record_shapes(self, items: List[Dict]):
+        """Count each item's recommendation shape once, for choosing shapes to precompute."""
+        for item in items:
+            precomputed_reasoning.record(recommendation_shape(item["recommendation"], item["model_type"]))
+
+    def _lookup_items(
+        self,
+        items: List[Dict],
+        portfolio_context: Dict,
+        feature: str = FEATURE_REBALANCE
+    ) -> List[Optional[str]]:
+        """Cached or precomputed reasoning (or None) for each item, for when no live call can be made."""
+        return [
+            self._lookup(
+                self._cache_key(item["recommendation"], item["model_type"], portfolio_context),
+                item["recommendation"],
+                item["model_type"],
+                feature
+            )
+            for item in items
+        ]
+
+    def _apply_batch_response(
+        self,
+        message,
+        items: List[Dict],
+        uncached: List[int],
+        results: List[Optional[str]],
+        model_type: str,
+        portfolio_context: Dict
+    ) -> List[Optional[str]]:
+        """Fill results from a batched response and cache each parsed item."""
+        parsed = _parse_batch_response(message.content[0].text, len(uncached))
+        for i, reasoning in zip(uncached, parsed):
+            if reasoning:
+                results[i] = reasoning
+                self._cache.set(self._cache_key(items[i]["recommendation"], model_type, portfolio_context), reasoning)
+        return results
+
+    def generate_reasoning(
+        self,
+        items: List[Dict],
+        portfolio_context: Dict,
+        total_timeout: float = LLM_TOTAL_TIMEOUT_SECONDS
+    ) -> List[Optional[str]]:
+        """
+        Generate reasoning for a set of recommendations, batched when enabled.
+
+        With LLM_BATCH_REASONING, each model's recommendations go out as one
+        structured prompt (models in parallel); only items that fail to parse
+        are retried individually, within the same overall deadline.
+
+        Args:
+            items: Dicts with 'holding', 'recommendation' and 'model_type'
+            portfolio_context: Portfolio metadata shared by all items
+            total_timeout: Deadline for the whole set in seconds
+
+        Returns:
+            Reasoning (or None) for each item, in order
+        """
+        self._record_shapes(items)
+        if not items or not self._available(self.client):
+            return self._lookup_items(items, portfolio_context)
+        if not LLM_BATCH_REASONING or len(items) == 1:
+            return self.generate_reasoning_concurrently(items, portfolio_context, total_timeout=total_timeout)
+
+        deadline = time.monotonic() + total_timeout
+        groups: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            groups.setdefault(item["model_type"], []).append(i)
+
+        executor = _get_executor()
+        futures = {
+            executor.submit(
+                self.generate_batch_reasoning,
+                [items[i] for i in indices],
+                model_type,
+                portfolio_context
+            ): indices
+            for model_type, indices in groups.items()
+        }
+        _, pending = wait(futures, timeout=total_timeout)
+
+        results: List[Optional[str]] = [None] * len(items)
+        for future, indices in futures.items():
+            if future in pending:
+                future.cancel()
+                continue
+            for i, reasoning in zip(indices, future.result()):
+                results[i] = reasoning
+
+        # Per-item fallback for anything the batched responses did not cover
+        missing = [i for i, reasoning in enumerate(results) if reasoning is None]
+        remaining = deadline - time.monotonic()
+        if missing and remaining > 0:
+            logger.info(f"Retrying {len(missing)} recommendations individually")
+            retried = self.generate_reasoning_concurrently(
+                [items[i] for i in missing],
+                portfolio_context,
+                call_timeout=min(LLM_CALL_TIMEOUT_SECONDS, remaining),
+                total_timeout=remaining
+            )
+            for i, reasoning in zip(missing, retried):
+                results[i] = reasoning
+
+        return results
+
+    def generate_reasoning_concurrently(
+        self,
+        items: List[Dict],
+        portfolio_context: Dict,
+        call_timeout: float = LLM_CALL_TIMEOUT_SECONDS,
+        total_timeout: float = LLM_TOTAL_TIMEOUT_SECONDS
+    ) -> List[Optional[str]]:
+        """
+        Generate reasoning for several recommendations at once.
+
+        Calls run on a shared pool of LLM_MAX_CONCURRENCY workers. Each call
+        has its own deadline, and results not ready by the overall deadline
+        are returned as None (callers keep their basic reasoning).
+
+        Args:
+            items: Dicts with 'holding', 'recommendation' and 'model_type'
+            portfolio_context: Portfolio metadata shared by all items
+            call_timeout: Deadline for each API call in seconds
+            total_timeout: Deadline for the whole set in seconds
+
+        Returns:
+            Reasoning (or None) for each item, in order
+        """
+        if not items or not self._available(self.client):
+            return self._lookup_items(items, portfolio_context)
+
+        executor = _get_executor()
+        futures = [
+            executor.submit(
+                self.generate_rebalancing_reasoning,
+                item["holding"],
+                item["recommendation"],
+                item["model_type"],
+                portfolio_context,
+                call_timeout
+            )
+            for item in items
+        ]
+        _, pending = wait(futures, timeout=total_timeout)
+        for future in pending:
+            future.cancel()
+        if pending:
+            logger.warning(f"{len(pending)} of {len(items)} AI reasoning calls missed the {total_timeout}s deadline")
+
+        return [
+            future.result() if future.done() and not future.cancelled() else None
+            for future in futures
+        ]
+
+    async def agenerate_rebalancing_reasoning(
+        self,
+        holding: Dict,
+        recommendation: Dict,
+        model_type: str,
+        portfolio_context: Dict,
+        timeout: float = LLM_CALL_TIMEOUT_SECONDS
+    ) -> Optional[str]:
+        """
+        Async counterpart of generate_rebalancing_reasoning().
+
+        Returns:
+            AI-generated reasoning string, or None if generation fails
+        """
+        cache_key = self._cache_key(recommendation, model_type, portfolio_context)
+        cached = self._lookup(cache_key, recommendation, model_type)
+        if cached or not self._available(self.async_client):
+            return cached
+
+        try:
+            logger.info(f"Generating AI reasoning for {recommendation['ticker']}")
+            route = self._route(portfolio_context)
+            message = await self._acreate_message(
+                self._build_prompt(holding, recommendation, model_type, portfolio_context),
+                route,
+                _max_tokens(route),
+                timeout,
+                recommendation['ticker']
+            )
+        except Exception as e:
+            logger.error(f"Error generating AI reasoning: {str(e)}", exc_info=True)
+            return None
+
+        reasoning = message.content[0].text.strip()
+        self._cache.set(cache_key, reasoning)
+        return reasoning
+
+    async def agenerate_batch_reasoning(
+        self,
+        items: List[Dict],
+        model_type: str,
+        portfolio_context: Dict,
+        timeout: float = LLM_CALL_TIMEOUT_SECONDS
+    ) -> List[Optional[str]]:
+        """
+        Async counterpart of generate_batch_reasoning().
+
+        Returns:
+            Reasoning (or None) for each item, in order
+        """
+        results, uncached = self._cached_results(items, model_type, portfolio_context)
+        if not uncached or not self._available(self.async_client):
+            return results
+
+        try:
+            recommendations = [items[i]["recommendation"] for i in uncached]
+            logger.info(f"Generating batched AI reasoning for {len(recommendations)} recommendations")
+            route = self._route(portfolio_context)
+            message = await self._acreate_message(
+                self._build_batch_prompt(recommendations, model_type, portfolio_context),
+                route,
+                _max_tokens(route, len(recommendations)),
+                timeout,
+                f"batch of {len(recommendations)}"
+            )
+        except Exception as e:
+            logger.error(f"Error generating batched AI reasoning: {str(e)}", exc_info=True)
+            return results
+
+        return self._apply_batch_response(message, items, uncached, results, model_type, portfolio_context)
+
+    async def agenerate_reasoning(
+        self,
+        items: List[Dict],
+        portfolio_context: Dict,
+        total_timeout: float = LLM_TOTAL_TIMEOUT_SECONDS
+    ) -> List[Optional[str]]:
+        """
+        Async counterpart of generate_reasoning() using the async client.
+
+        Calls run on the event loop rather than the worker pool, and calls
+        still in flight at the deadline are cancelled instead of left running.
+        While the circuit breaker is open only cached or precomputed reasoning
+        is returned, without waiting.
+
+        Args:
+            items: Dicts with 'holding', 'recommendation' and 'model_type'
+            portfolio_context: Portfolio metadata shared by all items
+            total_timeout: Deadline for the whole set in seconds
+
+        Returns:
+            Reasoning (or None) for each item, in order
+        """
+        self._record_shapes(items)
+        if not items or not self._available(self.async_client):
+            return self._lookup_items(items, portfolio_context)
+
+        results: List[Optional[str]] = [None] * len(items)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + total_timeout
+
+        if LLM_BATCH_REASONING and len(items) > 1:
+            groups: Dict[str, List[int]] = {}
+            for i, item in enumerate(items):
+                groups.setdefault(item["model_type"], []).append(i)
+            await _gather_until(
+                {
+                    asyncio.ensure_future(
+                        self.agenerate_batch_reasoning([items[i] for i in indices], model_type, portfolio_context)
+                    ): indices
+                    for model_type, indices in groups.items()
+                },
+                deadline,
+                results
+            )
+
+        # Per-item calls, or the fallback for anything the batched responses did not cover
+        missing = [i for i, reasoning in enumerate(results) if reasoning is None]
+        remaining = deadline - loop.time()
+        if missing and remaining > 0 and self._available(self.async_client):
+            semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+            async def limited(item: Dict) -> Optional[str]:
+                async with semaphore:
+                    return await self.agenerate_rebalancing_reasoning(
+                        item["holding"],
+                        item["recommendation"],
+                        item["model_type"],
+                        portfolio_context,
+                        min(LLM_CALL_TIMEOUT_SECONDS, remaining)
+                    )
+
+            await _gather_until(
+                {asyncio.ensure_future(limited(items[i])): [i] for i in missing},
+                deadline,
+                results
+            )
+
+        return results
+
+    def stream_rebalancing_reasoning(
+        self,
+        holding: Dict,
+        recommendation: Dict,
+        model_type: str,
+        portfolio_context: Dict,
+        timeout: float = LLM_CALL_TIMEOUT_SECONDS
+    ) -> Iterator[str]:
+        """
+        Stream AI reasoning for one recommendation as text deltas.
+
+        Cached reasoning is yielded as a single chunk. The full text is cached
+        once the stream completes.
+
+        Args:
+            holding: Current holding info (ticker, shares, value, sector)
+            recommendation: Suggested action (buy/sell, shares, target allocation)
+            model_type: Portfolio model (conservative/balanced/growth)
+            portfolio_context: Portfolio metadata
+            timeout: Deadline for the API call in seconds
+
+        Yields:
+            Text deltas as they arrive
+
+        Raises:
+            Exception: API errors are propagated to the caller
+        """
+        cache_key = self._cache_key(recommendation, model_type, portfolio_context)
+        cached = self._lookup(cache_key, recommendation, model_type, FEATURE_REBALANCE_STREAM)
+        if cached:
+            yield cached
+            return
+        if not self._available(self.client):
+            return
+
+        prompt = self._build_prompt(holding, recommendation, model_type, portfolio_context)
+        route = self._route(portfolio_context)
+        parts = []
+        start = time.perf_counter()
+        label = recommendation['ticker']
+        try:
+            with self.client.messages.stream(**self._message_params(prompt, route, _max_tokens(route), timeout)) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    yield text
+                final_message = stream.get_final_message()
+        except (Exception, GeneratorExit) as e:
+            self._record_call(route, start, label, error=e, feature=FEATURE_REBALANCE_STREAM)
+            raise
+        self._record_call(
+            route, start, label, usage=getattr(final_message, "usage", None), feature=FEATURE_REBALANCE_STREAM
+        )
+
+        reasoning = "".join(parts).strip()
+        if reasoning:
+            self._cache.set(cache_key, reasoning)
+
+    def stream_reasoning(
+        self,
+        items: List[Dict],
+        portfolio_context: Dict,
+        call_timeout: float = LLM_CALL_TIMEOUT_SECONDS,
+        total_timeout: float = LLM_TOTAL_TIMEOUT_SECONDS
+    ) -> Iterator[Tuple[str, int, Optional[str]]]:
+        """
+        Stream reasoning for several recommendations concurrently.
+
+        Streams run on the shared pool and their deltas are interleaved as
+        they arrive. Items still streaming at the overall deadline (or that
+        fail) finish with None so callers can keep their basic reasoning.
+
+        Args:
+            items: Dicts with 'holding', 'recommendation' and 'model_type'
+            portfolio_context: Portfolio metadata shared by all items
+            call_timeout: Deadline for each API call in seconds
+            total_timeout: Deadline for the whole set in seconds
+
+        Yields:
+            ("delta", index, text) for each chunk and ("done", index, full_text_or_None)
+            once per item
+        """
+        self._record_shapes(items)
+        if not self._available(self.client):
+            for i, reasoning in enumerate(self._lookup_items(items, portfolio_context, FEATURE_REBALANCE_STREAM)):
+                if reasoning:
+                    yield "delta", i, reasoning
+                yield "done", i, reasoning
+            return
+
+        events: Queue = Queue()
+        stop = Event()
+
+        def run(index: int, item: Dict):
+            parts = []
+            try:
+                for text in self.stream_rebalancing_reasoning(
+                    item["holding"], item["recommendation"], item["model_type"], portfolio_context, call_timeout
+                ):
+                    if stop.is_set():
+                        return
+                    parts.append(text)
+                    events.put(("delta", index, text))
+                events.put(("done", index, "".join(parts).strip() or None))
+            except Exception as e:
+                logger.error(f"Error streaming AI reasoning for {item['recommendation']['ticker']}: {str(e)}")
+                events.put(("done", index, None))
+
+        executor = _get_executor()
+        futures = [executor.submit(run, i, item) for i, item in enumerate(items)]
+        deadline = time.monotonic() + total_timeout
+        finished = set()
+
+        try:
+            while len(finished) < len(items):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    kind, index, text = events.get(timeout=remaining)
+                except Empty:
+                    break
+                if kind == "done":
+                    finished.add(index)
+                yield kind, index, text
+
+            if len(finished) < len(items):
+                logger.warning(f"{len(items) - len(finished)} of {len(items)} AI reasoning streams missed the {total_timeout}s deadline")
+            for i in range(len(items)):
+                if i not in finished:
+                    yield "done", i, None
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+
     def clear_cache(self):
         """Clear the response cache."""
         self._cache.clear()
         logger.info("LLM cache cleared")
 
+    def cache_stats(self) -> Dict:
+        """Response cache and precomputed-reasoning statistics plus prompt-cache token usage."""
+        return {**self._cache.stats(), **precomputed_reasoning.stats(), "prompt_cache": self.usage_stats()}
+
+    def breaker_stats(self) -> Dict:
+        """Circuit breaker state and counters."""
+        return self._breaker.stats()
+
+    def route_stats(self) -> List[Dict]:
+        """
+        Configuration and recent latency for each model route, from llm_telemetry.
+
+        Returns:
+            One dict per route with its model, token budget, call and failure
+            counts, and latency percentiles (ms) over the telemetry window
+        """
+        summaries = _route_summaries()
+        stats = []
+        for route, config in LLM_ROUTES.items():
+            summary = summaries.get(route)
+            calls = summary["requests"] if summary else 0
+            latency = summary["latency_ms"] if summary else {}
+            stats.append({
+                "route": route,
+                "model": config["model"],
+                "max_tokens": config["max_tokens"],
+                "calls": calls,
+                "failures": calls - summary["outcomes"].get("success", 0) if summary else 0,
+                "latency_ms_p50": latency.get("p50"),
+                "latency_ms_p95": latency.get("p95"),
+                "latency_ms_mean": latency.get("mean")
+            })
+        return stats
+
+    def usage_stats(self) -> Dict:
+        """
+        Input token totals of live calls split by prompt-cache status, from llm_telemetry.
+
+        Returns:
+            Dict of token counters over the telemetry window plus the share of
+            input tokens read from the prompt cache
+        """
+        summaries = _route_summaries().values()
+        usage = {"calls": sum(summary["outcomes"].get("success", 0) for summary in summaries)}
+        for name in ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens", "output_tokens"):
+            usage[name] = sum(summary[name] for summary in summaries)
+        total_input = usage["input_tokens"] + usage["cache_read_input_tokens"] + usage["cache_creation_input_tokens"]
+        usage["cached_input_ratio"] = round(usage["cache_read_input_tokens"] / total_input, 4) if total_input else 0.0
+        return usage
+
+
+def _route_summaries() -> Dict[str, Dict]:
+    """Telemetry for LLMService's live calls, grouped by route."""
+    return llm_telemetry.summarize(lambda record: record.route)
+
+
+def _parse_batch_response(text: str, count: int) -> List[Optional[str]]:
+    """
+    Extract per-recommendation reasoning from a batched JSON response.
+
+    Tolerates surrounding prose or code fences; anything unparseable comes
+    back as None so the caller can retry those items individually.
+
+    Args:
+        text: Raw model output
+        count: Number of recommendations in the prompt
+
+    Returns:
+        Reasoning (or None) for recommendations 1..count
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return [None] * count
+    try:
+        parsed = json.loads(text[start:end + 1])
+    except ValueError:
+        return [None] * count
+    if not isinstance(parsed, dict):
+        return [None] * count
+
+    results = []
+    for i in range(1, count + 1):
+        value = parsed.get(str(i))
+        results.append(value.strip() if isinstance(value, str) and value.strip() else None)
+    return results
+
+
+def _request_timeout(seconds: float) -> Timeout:
+    """Per-call timeout: `seconds` to read, at most LLM_CONNECT_TIMEOUT_SECONDS to connect."""
+    # The SDK's re-exported Timeout, so it matches whichever HTTP client the SDK is built on
+    return Timeout(seconds, connect=min(LLM_CONNECT_TIMEOUT_SECONDS, seconds))
+
+
+def _call_outcome(error: Optional[BaseException]) -> str:
+    """Telemetry outcome for a call that ended with `error` (None on success)."""
+    if error is None:
+        return "success"
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    if isinstance(error, (APITimeoutError, TimeoutError)):
+        return "timeout"
+    return "error"
+
+
+def _max_tokens(route: str, count: int = 1) -> int:
+    """Output budget for `count` recommendations on a route, capped at BATCH_MAX_TOKENS for batches."""
+    budget = LLM_ROUTES[route]["max_tokens"] * count
+    return budget if count == 1 else min(BATCH_MAX_TOKENS, budget)
+
+
+def _prompt_cache_min_tokens(model: str) -> int:
+    """Minimum cacheable prompt length for a model name."""
+    for family, minimum in PROMPT_CACHE_MIN_TOKENS.items():
+        if family in model:
+            return minimum
+    return PROMPT_CACHE_DEFAULT_MIN_TOKENS
+
+
+async def _gather_until(tasks: Dict, deadline: float, results: List[Optional[str]]):
+    """
+    Wait for reasoning tasks until the deadline, writing their output into results.
+
+    Args:
+        tasks: Task -> indices into results it answers
+        deadline: Event-loop time to stop waiting at
+        results: Reasoning per item, filled in place
+    """
+    loop = asyncio.get_running_loop()
+    done, pending = await asyncio.wait(tasks, timeout=max(deadline - loop.time(), 0))
+    if pending:
+        logger.warning(f"{len(pending)} of {len(tasks)} AI reasoning calls missed the deadline")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in done:
+        output = task.result()
+        for i, reasoning in zip(tasks[task], output if isinstance(output, list) else [output]):
+            if reasoning:
+                results[i] = reasoning
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared reasoning pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+        return _executor
+
+
+def shutdown_llm_executor():
+    """Stop the shared reasoning pool, cancelling calls that have not started."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 
 # Global LLM service instance
 _llm_service = None
@@ -0,0 +1,241 @@
+"""
+Telemetry for LLM calls.
+
+Every reasoning request is recorded with the calling feature (e.g. rebalance,
+rebalance_stream, precompute, rag), the model, token counts, latency, outcome
+and how it was answered: a live call ("miss"), the response cache ("hit") or
+precomputed reasoning ("precomputed"). Records are kept for a rolling window
+(LLM_TELEMETRY_WINDOW_SECONDS) and aggregated on read per (feature, model)
+into counters, token and cost totals, and a latency histogram, so the slowest
+and most expensive paths stand out. LLMService derives its per-route and
+prompt-cache statistics from the same records.
+"""
+
+from collections import deque
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+LLM_TELEMETRY_WINDOW_SECONDS = float(os.getenv("LLM_TELEMETRY_WINDOW_SECONDS", "3600"))
+MAX_RECORDS = 50000  # Oldest records are dropped first if the window holds more
+
+# Upper bounds (ms) of the latency histogram buckets; slower calls fall in a final overflow bucket
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# USD per million tokens (input, output). Cache writes cost 1.25x input, cache reads 0.1x,
+# and Message Batches requests half price.
+MODEL_PRICING = {
+    "claude-sonnet-4-5-20250929": (3.0, 15.0),
+    "claude-haiku-4-5-20251001": (1.0, 5.0)
+}
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+BATCH_DISCOUNT = 0.5
+
+
+class CallRecord(NamedTuple):
+    timestamp: float
+    feature: str
+    model: Optional[str]  # None when answered without a call
+    cache: str  # "miss", "hit" or "precomputed"
+    outcome: str  # "success", "error", "timeout" or "cancelled"
+    latency_ms: Optional[float]  # None for batch requests
+    input_tokens: int
+    output_tokens: int
+    cache_read_input_tokens: int
+    cache_creation_input_tokens: int
+    cost_usd: float
+    route: Optional[str] = None  # LLMService model route, for its live calls
+
+
+def estimate_cost(
+    model: Optional[str],
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_input_tokens: int = 0,
+    cache_creation_input_tokens: int = 0,
+    batch: bool = False
+) -> float:
+    """
+    Estimated USD cost of one call from MODEL_PRICING (0 for unknown models).
+
+    Args:
+        model: Model name
+        input_tokens: Uncached input tokens
+        output_tokens: Output tokens
+        cache_read_input_tokens: Input tokens read from the prompt cache
+        cache_creation_input_tokens: Input tokens written to the prompt cache
+        batch: Whether the call went through the Message Batches API
+
+    Returns:
+        Cost in USD
+    """
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    cost = (
+        input_tokens * input_price
+        + cache_creation_input_tokens * input_price * CACHE_WRITE_MULTIPLIER
+        + cache_read_input_tokens * input_price * CACHE_READ_MULTIPLIER
+        + output_tokens * output_price
+    ) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+class LLMTelemetry:
+    """Thread-safe rolling store of LLM call records."""
+
+    def __init__(self, window_seconds: float = LLM_TELEMETRY_WINDOW_SECONDS, max_records: int = MAX_RECORDS):
+        self.window_seconds = window_seconds
+        self._records: deque = deque(maxlen=max_records)
+        self._lock = Lock()
+
+    def record_call(
+        self,
+        feature: str,
+        model: Optional[str],
+        outcome: str,
+        latency_ms: Optional[float],
+        usage=None,
+        cache: str = "miss",
+        batch: bool = False,
+        route: Optional[str] = None
+    ):
+        """
+        Record one API call, or one request answered from a cache (cache="hit"/"precomputed").
+
+        Args:
+            feature: Calling feature
+            model: Model called
+            outcome: "success", "error", "timeout" or "cancelled"
+            latency_ms: Wall-clock duration of the call
+            usage: Usage block from the API response, if any
+            cache: How the request was answered
+            batch: Whether the call went through the Message Batches API
+            route: LLMService model route the call used, if any
+        """
+        tokens = {
+            name: getattr(usage, name, 0) or 0
+            for name in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+        }
+        record = CallRecord(
+            timestamp=time.time(),
+            feature=feature,
+            model=model,
+            cache=cache,
+            outcome=outcome,
+            latency_ms=latency_ms,
+            cost_usd=estimate_cost(model, batch=batch, **tokens),
+            route=route,
+            **tokens
+        )
+        with self._lock:
+            self._records.append(record)
+
+    def record_cache(self, feature: str, cache: str):
+        """Record a request answered without an API call."""
+        self.record_call(feature, None, "success", None, cache=cache)
+
+    def snapshot(self) -> Dict:
+        """
+        Aggregate the records in the window per (feature, model).
+
+        Returns:
+            Dict with the window length and one entry per group, highest p95
+            latency first
+        """
+        records = self._window()
+        summaries = [
+            {"feature": feature, "model": model, **summary}
+            for (feature, model), summary in self.summarize(lambda r: (r.feature, r.model), records).items()
+        ]
+        summaries.sort(key=lambda g: (g["latency_ms"]["p95"] is None, -(g["latency_ms"]["p95"] or 0.0)))
+        return {
+            "window_seconds": self.window_seconds,
+            "total_requests": len(records),
+            "total_cost_usd": round(sum(r.cost_usd for r in records), 6),
+            "groups": summaries
+        }
+
+    def summarize(
+        self,
+        key: Callable[[CallRecord], Optional[Hashable]],
+        records: Optional[List[CallRecord]] = None
+    ) -> Dict[Hashable, Dict]:
+        """
+        Aggregate the records in the window by a grouping key.
+
+        Args:
+            key: Group for a record; records mapped to None are skipped
+            records: Records to aggregate (default: the current window)
+
+        Returns:
+            Mapping of group to its counters, token and cost totals and latency summary
+        """
+        groups: Dict[Hashable, List[CallRecord]] = {}
+        for record in self._window() if records is None else records:
+            group = key(record)
+            if group is not None:
+                groups.setdefault(group, []).append(record)
+        return {group: _summarize(group_records) for group, group_records in groups.items()}
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def _window(self) -> List[CallRecord]:
+        """Records within the window, dropping older ones."""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            while self._records and self._records[0].timestamp < cutoff:
+                self._records.popleft()
+            return list(self._records)
+
+
+def _summarize(records: List[CallRecord]) -> Dict:
+    latencies = sorted(r.latency_ms for r in records if r.latency_ms is not None)
+    histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for latency in latencies:
+        histogram[next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency <= bound), len(LATENCY_BUCKETS_MS))] += 1
+
+    outcomes: Dict[str, int] = {}
+    cache: Dict[str, int] = {}
+    for record in records:
+        outcomes[record.outcome] = outcomes.get(record.outcome, 0) + 1
+        cache[record.cache] = cache.get(record.cache, 0) + 1
+
+    return {
+        "requests": len(records),
+        "outcomes": outcomes,
+        "cache": cache,
+        "input_tokens": sum(r.input_tokens for r in records),
+        "output_tokens": sum(r.output_tokens for r in records),
+        "cache_read_input_tokens": sum(r.cache_read_input_tokens for r in records),
+        "cache_creation_input_tokens": sum(r.cache_creation_input_tokens for r in records),
+        "cost_usd": round(sum(r.cost_usd for r in records), 6),
+        "latency_ms": {
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "max": round(latencies[-1], 1) if latencies else None,
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else None
+        },
+        "latency_histogram": [
+            {"le_ms": bound, "count": count}
+            for bound, count in zip(list(LATENCY_BUCKETS_MS) + [None], histogram)
+        ]
+    }
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return round(sorted_values[index], 1)
+
+
+# Shared by every LLMService instance and other LLM callers
+llm_telemetry = LLMTelemetry()
@@ -1,7 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .database import engine, Base
-from .routers import auth, onboarding, market, portfolio, rag
+from .routers import auth, onboarding, market, portfolio, rag, jobs, admin
+from .process_pool import shutdown_process_pool
+from .llm_service import shutdown_llm_executor
+from .drift_monitor import start_drift_monitor, stop_drift_monitor
+from .security_master import start_security_master_refresh, stop_security_master_refresh
+from .jobs import recover_jobs, shutdown_job_queue
+from .frontier import start_frontier_precompute, stop_frontier_precompute
+from .reasoning_precompute import start_reasoning_precompute, stop_reasoning_precompute
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -23,6 +30,26 @@ app.include_router(onboarding.router)
 app.include_router(market.router)
 app.include_router(portfolio.router)
 app.include_router(rag.router)
+app.include_router(jobs.router)
+app.include_router(admin.router)
+
+@app.on_event("startup")
+def start_background_tasks():
+    start_security_master_refresh()
+    start_drift_monitor()
+    start_frontier_precompute()
+    start_reasoning_precompute()
+    recover_jobs()
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    stop_drift_monitor()
+    stop_frontier_precompute()
+    stop_reasoning_precompute()
+    stop_security_master_refresh()
+    shutdown_job_queue()
+    shutdown_llm_executor()
+    shutdown_process_pool()
 
 @app.get("/health")
 def health_check():
@@ -9,30 +9,57 @@ import os
 import requests
 from typing import Optional, List, Dict
 from datetime import datetime, timedelta
+from threading import Lock
 import json
 
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "")
 ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co/query"
 
-# Simple in-memory cache (would use Redis in production)
-_cache = {}
 CACHE_TTL = timedelta(hours=24)
 
 
+class TTLCache:
+    """Thread-safe in-memory cache whose entries expire after a TTL (would use Redis in production)."""
+
+    def __init__(self, ttl: timedelta = CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        """Cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, timestamp = entry
+            if datetime.utcnow() - timestamp < self.ttl:
+                return value
+            del self._entries[key]
+            return None
+
+    def set(self, key, value):
+        """Store a value, timestamped now."""
+        with self._lock:
+            self._entries[key] = (value, datetime.utcnow())
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = TTLCache()
+
+
 def _get_from_cache(key: str) -> Optional[Dict]:
     """Get data from cache if not expired."""
-    if key in _cache:
-        data, timestamp = _cache[key]
-        if datetime.utcnow() - timestamp < CACHE_TTL:
-            return data
-        else:
-            del _cache[key]
-    return None
+    return _cache.get(key)
 
 
 def _set_cache(key: str, data: Dict):
     """Set data in cache with timestamp."""
-    _cache[key] = (data, datetime.utcnow())
+    _cache.set(key, data)
 
 
 def search_ticker(query: str) -> List[Dict]:
@@ -136,6 +163,55 @@ def get_ticker_overview(symbol: str) -> Optional[Dict]:
         return _mock_ticker_overview(symbol)
 
 
+def get_etf_profile(symbol: str) -> Optional[Dict]:
+    """
+    Get the sector breakdown of an ETF's holdings.
+
+    Args:
+        symbol: ETF ticker symbol (e.g., "SPY")
+
+    Returns:
+        Dict with symbol and sector_weights (raw sector name -> fraction),
+        or None if unavailable (no API key, not an ETF, or API error)
+    """
+    cache_key = f"etf_profile:{symbol.upper()}"
+    cached = _get_from_cache(cache_key)
+    if cached:
+        return cached
+
+    if not ALPHA_VANTAGE_API_KEY:
+        return None
+
+    try:
+        params = {
+            "function": "ETF_PROFILE",
+            "symbol": symbol,
+            "apikey": ALPHA_VANTAGE_API_KEY
+        }
+        response = requests.get(ALPHA_VANTAGE_BASE_URL, params=params, timeout=10)
+        response.raise_for_status()
+
+        data = response.json()
+        if not data.get("sectors") or "Note" in data or "Error Message" in data:
+            return None
+
+        result = {
+            "symbol": symbol.upper(),
+            "sector_weights": {
+                entry["sector"]: float(entry.get("weight", 0))
+                for entry in data["sectors"]
+                if entry.get("sector")
+            }
+        }
+
+        _set_cache(cache_key, result)
+        return result
+
+    except Exception as e:
+        print(f"Error fetching ETF profile for {symbol}: {e}")
+        return None
+
+
 def get_sector_allocation(tickers: List[str]) -> Dict[str, float]:
     """
     Get sector allocation for a list of tickers based on equal weighting.
@@ -279,7 +355,10 @@ def get_historical_data(symbol: str, time_range: str = "1y") -> Optional[Dict]:
     granularity = "weekly" if time_range == "1y" else "monthly"
 
     if not ALPHA_VANTAGE_API_KEY:
-        return _mock_historical_data(symbol, time_range, granularity)
+        # Cache mock series too so repeated lookups (prices, returns) stay consistent
+        result = _mock_historical_data(symbol, time_range, granularity)
+        _set_cache(cache_key, result)
+        return result
 
     try:
         # Use TIME_SERIES_WEEKLY for 1 year, TIME_SERIES_MONTHLY for others
@@ -354,6 +433,45 @@ def get_historical_data(symbol: str, time_range: str = "1y") -> Optional[Dict]:
         return _mock_historical_data(symbol, time_range, granularity)
 
 
+def get_latest_price(symbol: str) -> Optional[float]:
+    """
+    Get the most recent closing price for a ticker.
+
+    Uses the cached 1-year weekly series, so repeated lookups are free.
+
+    Args:
+        symbol: Ticker symbol (e.g., "XLK")
+
+    Returns:
+        Latest close, or None if no data is available
+    """
+    historical = get_historical_data(symbol.upper(), "1y")
+    if not historical or not historical.get("data"):
+        return None
+    return historical["data"][-1]["close"]
+
+
+def get_latest_prices(symbols: List[str]) -> Dict[str, float]:
+    """
+    Get the most recent closing prices for a batch of tickers.
+
+    Each symbol is looked up once and served from the cached 1-year series
+    when available; symbols without data are omitted.
+
+    Args:
+        symbols: Ticker symbols
+
+    Returns:
+        Mapping of upper-cased symbol to latest close
+    """
+    prices = {}
+    for symbol in {s.upper() for s in symbols}:
+        price = get_latest_price(symbol)
+        if price is not None:
+            prices[symbol] = price
+    return prices
+
+
 def _get_cutoff_date(time_range: str) -> datetime:
     """Calculate the cutoff date based on time range."""
     now = datetime.utcnow()
@@ -447,5 +565,4 @@ def _mock_historical_data(symbol: str, time_range: str, granularity: str) -> Dic
 
 def clear_cache():
     """Clear the entire cache. Useful for testing."""
-    global _cache
-    _cache = {}
+    _cache.clear()
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, JSON, Boolean, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -11,6 +12,62 @@ class User(Base):
     persona = Column(String, nullable=True)  # "A", "B", or "C"
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    portfolios = relationship("Portfolio", back_populates="user", cascade="all, delete-orphan")
+
+class Portfolio(Base):
+    __tablename__ = "portfolios"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    name = Column(String, nullable=False, default="My Portfolio")
+    model_type = Column(String, nullable=False, default="balanced")  # "conservative", "balanced", or "growth"
+    # Running aggregates maintained incrementally as holdings change
+    total_value = Column(Float, nullable=False, default=0.0)
+    sector_totals = Column(JSON, nullable=False, default=dict)  # {"Technology": 12345.0, ...}
+    # Set by the drift monitor: largest sector deviation from the model, in percentage points
+    drift = Column(Float, nullable=True)
+    drift_flagged = Column(Boolean, nullable=False, default=False)
+    drift_checked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    user = relationship("User", back_populates="portfolios")
+    holdings = relationship("Holding", back_populates="portfolio", cascade="all, delete-orphan")
+
+class Holding(Base):
+    __tablename__ = "holdings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    portfolio_id = Column(Integer, ForeignKey("portfolios.id"), index=True, nullable=False)
+    ticker = Column(String, index=True, nullable=False)
+    shares = Column(Float, nullable=False)
+    purchase_price = Column(Float, nullable=False)
+    # Valuation snapshot used to update the portfolio aggregates without a full re-analysis
+    current_price = Column(Float, nullable=False)
+    value = Column(Float, nullable=False)
+    sector = Column(String, nullable=False, default="Unknown")
+    sector_weights = Column(JSON, nullable=True)  # Look-through weights, e.g. {"Technology": 0.3, ...} for funds
+
+    portfolio = relationship("Portfolio", back_populates="holdings")
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)  # UUID
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    kind = Column(String, nullable=False)  # "rebalance", "projection", or "backtest"
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    payload = Column(JSON, nullable=False)
+    progress_completed = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=False, default=0)
+    partial_result = Column(JSON, nullable=True)  # Updated while running
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
 class ResearchDoc(Base):
     __tablename__ = "research_docs"
 
@@ -20,3 +77,18 @@ class ResearchDoc(Base):
     category = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class ReasoningTemplate(Base):
+    __tablename__ = "reasoning_templates"
+    __table_args__ = (UniqueConstraint("sector", "action", "current_bucket", "target_bucket", "model_type"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    sector = Column(String, nullable=False)
+    action = Column(String, nullable=False)  # "buy" or "sell"
+    current_bucket = Column(Float, nullable=False)  # Current allocation, rounded to 5 points
+    target_bucket = Column(Float, nullable=False)
+    model_type = Column(String, nullable=False)
+    usage_count = Column(Integer, nullable=False, default=0)
+    reasoning = Column(Text, nullable=True)  # Null until precomputed
+    batch_id = Column(String, nullable=True, index=True)  # Message batch still generating the reasoning
+    generated_at = Column(DateTime(timezone=True), nullable=True)
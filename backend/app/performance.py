@@ -0,0 +1,109 @@
+"""
+Historical performance of a portfolio's current holdings.
+
+Combines the holdings' cached historical series (see get_historical_data) into
+a portfolio value and return series. Prices are aligned on common dates into a
+(T, N) matrix and the share counts form the weight vector, so the whole value
+series is a single matrix-vector product.
+
+Results are cached per (portfolio hash, time range).
+"""
+
+from typing import Dict, List
+import hashlib
+import json
+import logging
+
+import numpy as np
+
+from .market_data import TTLCache
+from .risk import build_price_matrix
+
+logger = logging.getLogger(__name__)
+
+# Performance cache: (portfolio_hash, time_range) -> result
+_performance_cache = TTLCache()
+
+
+def portfolio_hash(shares_by_symbol: Dict[str, float]) -> str:
+    """
+    Stable hash of a portfolio's positions, independent of holding order.
+
+    Args:
+        shares_by_symbol: Mapping of ticker to shares held
+
+    Returns:
+        Hex digest identifying the portfolio
+    """
+    payload = json.dumps(sorted((s, round(float(n), 6)) for s, n in shares_by_symbol.items()))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def aggregate_shares(holdings: List) -> Dict[str, float]:
+    """Total shares per ticker, merging repeated lots of the same ticker."""
+    shares: Dict[str, float] = {}
+    for holding in holdings:
+        ticker = holding.ticker.strip().upper()
+        shares[ticker] = shares.get(ticker, 0.0) + holding.shares
+    return shares
+
+
+def calculate_performance(shares_by_symbol: Dict[str, float], time_range: str = "1y") -> Dict:
+    """
+    Value and return series for holding the given shares over the history window.
+
+    Args:
+        shares_by_symbol: Mapping of ticker to shares held
+        time_range: "1y", "3y", "5y", or "10y"
+
+    Returns:
+        Dict with summary returns and the per-date value series
+
+    Raises:
+        ValueError: If the portfolio is empty or history is unavailable
+    """
+    if not shares_by_symbol:
+        raise ValueError("Portfolio has no holdings")
+
+    key = (portfolio_hash(shares_by_symbol), time_range)
+    cached = _performance_cache.get(key)
+    if cached is not None:
+        return cached
+
+    symbols = sorted(shares_by_symbol)
+    shares = np.array([shares_by_symbol[s] for s in symbols], dtype=float)
+    dates, prices, granularity = build_price_matrix(symbols, time_range)
+
+    values = prices @ shares  # (T,)
+    period_returns = np.empty_like(values)
+    period_returns[0] = 0.0
+    period_returns[1:] = values[1:] / values[:-1] - 1.0
+    cumulative = values / values[0] - 1.0
+
+    result = {
+        "portfolio_hash": key[0],
+        "time_range": time_range,
+        "granularity": granularity,
+        "symbols": symbols,
+        "start_value": round(float(values[0]), 2),
+        "end_value": round(float(values[-1]), 2),
+        "total_return": round(float(cumulative[-1]) * 100, 2),
+        "series": [
+            {
+                "date": date,
+                "value": round(float(value), 2),
+                "period_return": round(float(ret) * 100, 2),
+                "cumulative_return": round(float(cum) * 100, 2)
+            }
+            for date, value, ret, cum in zip(dates, values, period_returns, cumulative)
+        ]
+    }
+
+    _performance_cache.set(key, result)
+
+    return result
+
+
+def clear_performance_cache():
+    """Clear cached performance series. Useful for testing."""
+    _performance_cache.clear()
@@ -9,14 +9,18 @@ This module handles:
 - Rebalancing recommendations
 """
 
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
+import asyncio
+import numpy as np
 import pandas as pd
 from io import StringIO
 import logging
 
-from .market_data import get_ticker_overview, get_sector_allocation
+from .market_data import get_sector_allocation, get_latest_price
 from .schemas import PortfolioHolding
 from .llm_service import get_llm_service
+from .rebalance_solver import SECTOR_FUNDS, solve_rebalance
+from .security_master import get_sector_weights, primary_sector, sector_exposure
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +59,16 @@ MODEL_PORTFOLIOS = {
     }
 }
 
+# Sectors the model portfolios are defined over; other sectors (e.g. "Unknown") are never traded
+SECTOR_UNIVERSE = list(SECTOR_FUNDS.keys())
+
+# Target matrix (models x SECTOR_UNIVERSE, percent) so every model is evaluated in one pass
+MODEL_NAMES = list(MODEL_PORTFOLIOS.keys())
+MODEL_TARGET_MATRIX = np.array([
+    [MODEL_PORTFOLIOS[name].get(sector, 0.0) for sector in SECTOR_UNIVERSE]
+    for name in MODEL_NAMES
+])
+
 # Concentration thresholds
 SECTOR_CONCENTRATION_THRESHOLD = 30.0  # Single sector > 30% is concentrated
 DIVERSIFICATION_TARGET_SECTORS = 5  # Aim for at least 5 sectors
@@ -112,12 +126,55 @@ def parse_csv_portfolio(csv_content: str) -> List[PortfolioHolding]:
         raise ValueError(f"Invalid CSV format: {str(e)}")
 
 
-def calculate_portfolio_value(holdings: List[PortfolioHolding]) -> Tuple[float, Dict[str, Dict]]:
+def value_holding(
+    holding: PortfolioHolding,
+    sector_weights: Optional[Dict[str, float]] = None,
+    current_price: Optional[float] = None
+) -> Dict:
+    """
+    Value a single holding and classify it by sector.
+
+    Args:
+        holding: Portfolio holding
+        sector_weights: Known sector weights for the ticker; skips the security master when given
+        current_price: Known market price; mock pricing from purchase_price when omitted
+
+    Returns:
+        Ticker detail dict (shares, current_price, value, cost_basis, gain_loss,
+        sector, sector_weights). Funds spread over several sectors have sector
+        "Diversified" and their look-through weights in sector_weights.
+    """
+    if sector_weights is None:
+        sector_weights = get_sector_weights(holding.ticker)
+
+    if current_price is None:
+        # For MVP, use purchase_price as current_price (would use real-time data in production)
+        current_price = holding.purchase_price * 1.1  # Mock 10% gain
+    value = holding.shares * current_price
+    cost_basis = holding.shares * holding.purchase_price
+    gain_loss = value - cost_basis
+
+    return {
+        "shares": holding.shares,
+        "current_price": current_price,
+        "value": value,
+        "cost_basis": cost_basis,
+        "gain_loss": gain_loss,
+        "sector": primary_sector(sector_weights),
+        "sector_weights": sector_weights
+    }
+
+
+def calculate_portfolio_value(
+    holdings: List[PortfolioHolding],
+    sector_lookup: Optional[Dict[str, Dict[str, float]]] = None
+) -> Tuple[float, Dict[str, Dict]]:
     """
     Calculate current portfolio value and per-ticker breakdown.
 
     Args:
         holdings: List of portfolio holdings
+        sector_lookup: Optional pre-resolved ticker -> sector weights map
 
     Returns:
         Tuple of (total_value, ticker_details)
@@ -128,7 +185,8 @@ def calculate_portfolio_value(holdings: List[PortfolioHolding]) -> Tuple[float,
                 "value": 18000.0,
                 "cost_basis": 15000.0,
                 "gain_loss": 3000.0,
-                "sector": "Technology"
+                "sector": "Technology",
+                "sector_weights": {"Technology": 1.0}
             }
         }
     """
@@ -136,25 +194,10 @@ def calculate_portfolio_value(holdings: List[PortfolioHolding]) -> Tuple[float,
     ticker_details = {}
 
     for holding in holdings:
-        # Get ticker overview for sector info
-        overview = get_ticker_overview(holding.ticker)
-
-        # For MVP, use purchase_price as current_price (would use real-time data in production)
-        current_price = holding.purchase_price * 1.1  # Mock 10% gain
-        value = holding.shares * current_price
-        cost_basis = holding.shares * holding.purchase_price
-        gain_loss = value - cost_basis
-
-        ticker_details[holding.ticker] = {
-            "shares": holding.shares,
-            "current_price": current_price,
-            "value": value,
-            "cost_basis": cost_basis,
-            "gain_loss": gain_loss,
-            "sector": overview.get("sector", "Unknown") if overview else "Unknown"
-        }
-
-        total_value += value
+        sector_weights = sector_lookup.get(holding.ticker) if sector_lookup is not None else None
+        details = value_holding(holding, sector_weights)
+        ticker_details[holding.ticker] = details
+        total_value += details["value"]
 
     return total_value, ticker_details
 
@@ -163,24 +206,37 @@ def analyze_sector_allocation(ticker_details: Dict[str, Dict], total_value: floa
     """
     Analyze sector allocation from ticker details.
 
+    Funds are looked through to their constituent sectors, so allocation is
+    the sparse product of holding values and sector weights.
+
     Args:
-        ticker_details: Ticker breakdown with sector info
+        ticker_details: Ticker breakdown with sector weights
         total_value: Total portfolio value
 
     Returns:
         List of sector allocations with percentage and amount
     """
-    sector_totals = {}
+    weights = [details["sector_weights"] for details in ticker_details.values()]
+    sectors = list(dict.fromkeys(sector for w in weights for sector in w))
+    values = np.array([details["value"] for details in ticker_details.values()], dtype=float)
+
+    exposure = sector_exposure(values, weights, sectors)
+    sector_totals = {sector: float(amount) for sector, amount in zip(sectors, exposure)}
 
-    for ticker, details in ticker_details.items():
-        sector = details["sector"]
-        value = details["value"]
+    return build_sector_allocation(sector_totals, total_value)
 
-        if sector not in sector_totals:
-            sector_totals[sector] = 0.0
-        sector_totals[sector] += value
 
-    # Convert to list with percentages
+def build_sector_allocation(sector_totals: Dict[str, float], total_value: float) -> List[Dict]:
+    """
+    Convert per-sector dollar totals into the sector allocation list.
+
+    Args:
+        sector_totals: Mapping of sector name to total value held in it
+        total_value: Total portfolio value
+
+    Returns:
+        List of sector allocations with percentage and amount, largest first
+    """
     sectors = []
     for sector, amount in sector_totals.items():
         percentage = (amount / total_value * 100) if total_value > 0 else 0
@@ -232,13 +288,30 @@ def calculate_diversification_score(sectors: List[Dict]) -> float:
     if not sectors:
         return 0.0
 
+    # Calculate Herfindahl index (sum of squared percentages)
+    herfindahl = sum((s["percentage"] / 100) ** 2 for s in sectors)
+
+    return diversification_score_from(len(sectors), herfindahl)
+
+
+def diversification_score_from(num_sectors: int, herfindahl: float) -> float:
+    """
+    Diversification score from a sector count and Herfindahl index.
+
+    Args:
+        num_sectors: Number of sectors held
+        herfindahl: Sum of squared sector weights (fractions)
+
+    Returns:
+        Diversification score between 0 and 1
+    """
+    if num_sectors == 0:
+        return 0.0
+
     # Factor 1: Number of sectors (target: 5+)
-    num_sectors = len(sectors)
     sector_score = min(1.0, num_sectors / DIVERSIFICATION_TARGET_SECTORS)
 
     # Factor 2: Concentration (lower is better)
-    # Calculate Herfindahl index (sum of squared percentages)
-    herfindahl = sum((s["percentage"] / 100) ** 2 for s in sectors)
     # Normalize: 1.0 is perfectly concentrated, 0.0 is perfectly diversified
     # For 10 equal sectors, herfindahl = 0.1, for 1 sector = 1.0
     concentration_score = 1.0 - min(1.0, herfindahl)
@@ -249,6 +322,347 @@ def calculate_diversification_score(sectors: List[Dict]) -> float:
     return round(score, 2)
 
 
+def _build_rebalance_positions(
+    ticker_details: Dict[str, Dict],
+    candidate_sectors: List[str],
+    fund_prices: Optional[Dict[str, float]] = None
+) -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lay out holdings plus sector-fund candidates as solver input arrays.
+
+    Sector funds are only added for candidate sectors the portfolio does not
+    already hold directly, so the solver has somewhere to put money for those
+    sectors. Diversified funds are positions of an untracked sector (never
+    traded) but still count toward every sector they are exposed to.
+
+    Args:
+        ticker_details: Ticker breakdown with sector info
+        candidate_sectors: Sectors that may need a fund to buy into
+        fund_prices: Optional pre-fetched fund prices (avoids price lookups)
+
+    Returns:
+        Tuple of (tickers, sectors, values, prices, sector_index, exposure) where
+        sectors lists the tracked sectors first, then any untracked sectors, and
+        exposure is the look-through value in each sector
+    """
+    held_sectors = {details["sector"] for details in ticker_details.values()}
+    exposed_sectors = {s for details in ticker_details.values() for s in details["sector_weights"]}
+    sectors = list(SECTOR_UNIVERSE) + sorted((held_sectors | exposed_sectors) - set(SECTOR_UNIVERSE))
+    sector_ids = {sector: i for i, sector in enumerate(sectors)}
+    exposure = sector_exposure(
+        np.array([details["value"] for details in ticker_details.values()], dtype=float),
+        [details["sector_weights"] for details in ticker_details.values()],
+        sectors
+    )
+
+    tickers = list(ticker_details.keys())
+    values = [ticker_details[t]["value"] for t in tickers]
+    prices = [ticker_details[t]["current_price"] for t in tickers]
+    position_sectors = [sector_ids[ticker_details[t]["sector"]] for t in tickers]
+
+    for sector in candidate_sectors:
+        fund = SECTOR_FUNDS.get(sector)
+        if sector in held_sectors or not fund or fund in ticker_details:
+            continue
+        price = fund_prices.get(fund) if fund_prices is not None else get_latest_price(fund)
+        if not price:
+            continue
+        tickers.append(fund)
+        values.append(0.0)
+        prices.append(price)
+        position_sectors.append(sector_ids[sector])
+
+    return (
+        tickers,
+        sectors,
+        np.array(values, dtype=float),
+        np.array(prices, dtype=float),
+        np.array(position_sectors, dtype=np.intp),
+        exposure
+    )
+
+
+def _model_target_vector(model: Dict[str, float], sectors: List[str]) -> np.ndarray:
+    """Target weights (percent) for each sector, 0 for sectors the model omits."""
+    return np.array([model.get(sector, 0.0) for sector in sectors], dtype=float)
+
+
+def _model_target_matrix(sectors: List[str]) -> np.ndarray:
+    """MODEL_TARGET_MATRIX padded with zero columns for untracked sectors."""
+    padding = np.zeros((len(MODEL_NAMES), len(sectors) - len(SECTOR_UNIVERSE)))
+    return np.hstack([MODEL_TARGET_MATRIX, padding])
+
+
+def _solution_to_recommendations(
+    solution: Dict[str, np.ndarray],
+    row: int,
+    tickers: List[str],
+    sectors: List[str],
+    sector_index: np.ndarray
+) -> List[Dict]:
+    """Turn one row of a solver result into recommendation dicts with basic reasoning."""
+    shares_row = solution["shares"][row]
+    amounts_row = solution["amounts"][row]
+    current_pct = solution["current_percentage"]
+    target_pct = solution["target_percentage"][row]
+
+    recommendations = []
+    for i in np.flatnonzero(shares_row):
+        sector_id = sector_index[i]
+        sector = sectors[sector_id]
+        current = float(current_pct[sector_id])
+        target = float(target_pct[sector_id])
+
+        if shares_row[i] > 0:  # Need to buy
+            action = "buy"
+            basic_reasoning = f"Increase {sector} allocation from {current:.1f}% to target {target:.1f}%"
+        else:  # Need to sell
+            action = "sell"
+            basic_reasoning = f"Reduce {sector} allocation from {current:.1f}% to target {target:.1f}%"
+
+        recommendations.append({
+            "ticker": tickers[i],
+            "sector": sector,
+            "action": action,
+            "shares": int(abs(shares_row[i])),
+            "amount": round(float(abs(amounts_row[i])), 2),
+            "current_percentage": round(current, 2),
+            "target_percentage": round(target, 2),
+            "reasoning": basic_reasoning,
+            "ai_generated": False,
+            "confidence_score": None
+        })
+
+    # Largest trades first
+    recommendations.sort(key=lambda r: r["amount"], reverse=True)
+    return recommendations
+
+
+def plan_rebalancing(
+    ticker_details: Dict[str, Dict],
+    model_type: str = "balanced",
+    fund_prices: Optional[Dict[str, float]] = None,
+    **solver_options
+) -> List[Dict]:
+    """
+    Compute rebalancing trades with the optimization solver.
+
+    Trades are deterministic and carry basic reasoning only; see
+    recommend_rebalancing() for AI-generated explanations.
+
+    Args:
+        ticker_details: Ticker breakdown
+        model_type: "conservative", "balanced", or "growth"
+        fund_prices: Optional pre-fetched sector fund prices
+        **solver_options: Overrides passed to solve_rebalance() (drift_threshold,
+            turnover_penalty, transaction_cost_bps, lot_size, min_trade_amount)
+
+    Returns:
+        List of recommendations, largest trade first
+    """
+    model = MODEL_PORTFOLIOS.get(model_type, MODEL_PORTFOLIOS["balanced"])
+
+    tickers, sectors, values, prices, sector_index, exposure = _build_rebalance_positions(
+        ticker_details, list(model.keys()), fund_prices
+    )
+    tracked = np.array([sector in SECTOR_UNIVERSE for sector in sectors])
+
+    solution = solve_rebalance(
+        values,
+        prices,
+        sector_index,
+        _model_target_vector(model, sectors),
+        num_sectors=len(sectors),
+        tracked_sectors=tracked,
+        sector_values=exposure,
+        **solver_options
+    )
+
+    return _solution_to_recommendations(solution, 0, tickers, sectors, sector_index)
+
+
+def plan_rebalancing_all(
+    ticker_details: Dict[str, Dict],
+    fund_prices: Optional[Dict[str, float]] = None,
+    **solver_options
+) -> Dict[str, List[Dict]]:
+    """
+    Compute rebalancing trades against every model portfolio in one solve.
+
+    Positions are laid out once and the solver runs on the full
+    MODEL_TARGET_MATRIX, so the cost is roughly that of a single plan.
+
+    Args:
+        ticker_details: Ticker breakdown
+        fund_prices: Optional pre-fetched sector fund prices
+        **solver_options: Overrides passed to solve_rebalance()
+
+    Returns:
+        Dict mapping model type to its recommendations, largest trade first
+    """
+    candidate_sectors = [
+        sector for i, sector in enumerate(SECTOR_UNIVERSE)
+        if MODEL_TARGET_MATRIX[:, i].any()
+    ]
+    tickers, sectors, values, prices, sector_index, exposure = _build_rebalance_positions(
+        ticker_details, candidate_sectors, fund_prices
+    )
+    tracked = np.array([sector in SECTOR_UNIVERSE for sector in sectors])
+
+    solution = solve_rebalance(
+        values,
+        prices,
+        sector_index,
+        _model_target_matrix(sectors),
+        num_sectors=len(sectors),
+        tracked_sectors=tracked,
+        sector_values=exposure,
+        **solver_options
+    )
+
+    return {
+        model_type: _solution_to_recommendations(solution, row, tickers, sectors, sector_index)
+        for row, model_type in enumerate(MODEL_NAMES)
+    }
+
+
+def build_target_allocation(model_type: str, total_value: float) -> List[Dict]:
+    """
+    Target sector allocation for a model portfolio at the given portfolio value.
+
+    Args:
+        model_type: "conservative", "balanced", or "growth"
+        total_value: Total portfolio value
+
+    Returns:
+        List of sector allocations with percentage and amount
+    """
+    return [
+        {"sector": sector, "percentage": pct, "amount": total_value * pct / 100}
+        for sector, pct in MODEL_PORTFOLIOS[model_type].items()
+    ]
+
+
+def build_portfolio_context(
+    current_sectors: List[Dict],
+    ticker_details: Dict[str, Dict],
+    total_value: float
+) -> Dict:
+    """
+    Build the portfolio summary passed to the LLM alongside each recommendation.
+
+    Args:
+        current_sectors: Current sector allocations
+        ticker_details: Ticker breakdown
+        total_value: Total portfolio value
+
+    Returns:
+        Dict with total_holdings, diversification_score, concentrated_sectors, total_value
+    """
+    return {
+        "total_holdings": len(ticker_details),
+        "diversification_score": calculate_diversification_score(current_sectors),
+        "concentrated_sectors": detect_concentration_risks(current_sectors),
+        "total_value": total_value
+    }
+
+
+def attach_ai_reasoning(
+    recommendations: List[Dict],
+    ticker_details: Dict[str, Dict],
+    model_type: str,
+    portfolio_context: Dict
+) -> List[Dict]:
+    """
+    Replace basic reasoning with AI-generated reasoning where available.
+
+    Recommendations keep their basic reasoning if the LLM is unavailable, fails,
+    or misses its deadline.
+
+    Args:
+        recommendations: Recommendations from plan_rebalancing()
+        ticker_details: Ticker breakdown
+        model_type: "conservative", "balanced", or "growth"
+        portfolio_context: Output of build_portfolio_context()
+
+    Returns:
+        The same recommendations, updated in place
+    """
+    _attach_reasoning([(r, model_type) for r in recommendations], ticker_details, portfolio_context)
+    return recommendations
+
+
+def _attach_reasoning(
+    pairs: List[Tuple[Dict, str]],
+    ticker_details: Dict[str, Dict],
+    portfolio_context: Dict
+):
+    """Fan out reasoning for (recommendation, model_type) pairs and apply the results."""
+    if not pairs:
+        return
+
+    items = _reasoning_items(pairs, ticker_details)
+
+    try:
+        results = get_llm_service().generate_reasoning(items, portfolio_context)
+    except Exception as e:
+        # Fallback to basic reasoning on error
+        logger.error(f"Error generating AI reasoning: {str(e)}")
+        return
+
+    _apply_reasoning(pairs, results)
+
+
+async def _attach_reasoning_async(
+    pairs: List[Tuple[Dict, str]],
+    ticker_details: Dict[str, Dict],
+    portfolio_context: Dict
+):
+    """Async counterpart of _attach_reasoning() using the async LLM client."""
+    if not pairs:
+        return
+
+    items = _reasoning_items(pairs, ticker_details)
+
+    try:
+        results = await get_llm_service().agenerate_reasoning(items, portfolio_context)
+    except Exception as e:
+        # Fallback to basic reasoning on error
+        logger.error(f"Error generating AI reasoning: {str(e)}")
+        return
+
+    _apply_reasoning(pairs, results)
+
+
+def _apply_reasoning(pairs: List[Tuple[Dict, str]], results: List[Optional[str]]):
+    """Replace basic reasoning with AI reasoning where one was generated."""
+    for (recommendation, _), ai_reasoning in zip(pairs, results):
+        if ai_reasoning:
+            recommendation["reasoning"] = ai_reasoning
+            recommendation["ai_generated"] = True
+        else:
+            # Keep basic reasoning
+            logger.debug(f"Using basic reasoning for {recommendation['ticker']}")
+
+
+def _reasoning_items(pairs: List[Tuple[Dict, str]], ticker_details: Dict[str, Dict]) -> List[Dict]:
+    """LLM request items for (recommendation, model_type) pairs."""
+    items = []
+    for recommendation, model_type in pairs:
+        details = ticker_details.get(recommendation["ticker"], {})
+        items.append({
+            "holding": {
+                "ticker": recommendation["ticker"],
+                "shares": details.get("shares", 0),
+                "value": details.get("value", 0.0),
+                "sector": recommendation["sector"]
+            },
+            "recommendation": recommendation,
+            "model_type": model_type
+        })
+    return items
+
+
 def recommend_rebalancing(
     current_sectors: List[Dict],
     ticker_details: Dict[str, Dict],
@@ -267,102 +681,175 @@ def recommend_rebalancing(
     Returns:
         List of rebalancing recommendations with AI-generated reasoning
     """
-    model = MODEL_PORTFOLIOS.get(model_type, MODEL_PORTFOLIOS["balanced"])
-    recommendations = []
+    recommendations = plan_rebalancing(ticker_details, model_type)
+    portfolio_context = build_portfolio_context(current_sectors, ticker_details, total_value)
 
-    # Build current allocation map
-    current_allocation = {s["sector"]: s["percentage"] for s in current_sectors}
+    return attach_ai_reasoning(recommendations, ticker_details, model_type, portfolio_context)
 
-    # Calculate portfolio context for AI
-    diversification_score = calculate_diversification_score(current_sectors)
-    concentrated_sectors = detect_concentration_risks(current_sectors)
-    total_holdings = len(ticker_details)
 
-    portfolio_context = {
-        "total_holdings": total_holdings,
-        "diversification_score": diversification_score,
-        "concentrated_sectors": concentrated_sectors,
-        "total_value": total_value
-    }
+async def recommend_rebalancing_async(
+    current_sectors: List[Dict],
+    ticker_details: Dict[str, Dict],
+    total_value: float,
+    model_type: str = "balanced"
+) -> List[Dict]:
+    """
+    Async variant of recommend_rebalancing() for async routes.
 
-    # Get LLM service
-    llm_service = get_llm_service()
-
-    # Find sectors to adjust
-    for target_sector, target_pct in model.items():
-        current_pct = current_allocation.get(target_sector, 0.0)
-        diff = target_pct - current_pct
-
-        if abs(diff) > 5.0:  # Only recommend if difference > 5%
-            # Find tickers in this sector
-            sector_tickers = [
-                ticker for ticker, details in ticker_details.items()
-                if details["sector"] == target_sector
-            ]
-
-            if diff > 0:  # Need to buy
-                action = "buy"
-                basic_reasoning = f"Increase {target_sector} allocation from {current_pct:.1f}% to target {target_pct:.1f}%"
-            else:  # Need to sell
-                action = "sell"
-                basic_reasoning = f"Reduce {target_sector} allocation from {current_pct:.1f}% to target {target_pct:.1f}%"
-
-            # Calculate shares (simplified - would be more sophisticated in production)
-            target_value = total_value * (target_pct / 100)
-            current_value = total_value * (current_pct / 100)
-            value_diff = abs(target_value - current_value)
-
-            # Pick a representative ticker
-            if sector_tickers:
-                ticker = sector_tickers[0]
-                current_price = ticker_details[ticker]["current_price"]
-                shares = int(value_diff / current_price)
-                amount = shares * current_price
-
-                if shares > 0:
-                    # Build recommendation
-                    recommendation = {
-                        "ticker": ticker,
-                        "sector": target_sector,
-                        "action": action,
-                        "shares": shares,
-                        "amount": round(amount, 2),
-                        "current_percentage": round(current_pct, 2),
-                        "target_percentage": round(target_pct, 2)
-                    }
-
-                    # Try to generate AI reasoning
-                    try:
-                        holding = {
-                            "ticker": ticker,
-                            "shares": ticker_details[ticker]["shares"],
-                            "value": ticker_details[ticker]["value"],
-                            "sector": target_sector
-                        }
-
-                        ai_reasoning = llm_service.generate_rebalancing_reasoning(
-                            holding=holding,
-                            recommendation=recommendation,
-                            model_type=model_type,
-                            portfolio_context=portfolio_context
-                        )
-
-                        if ai_reasoning:
-                            recommendation["reasoning"] = ai_reasoning
-                            recommendation["ai_generated"] = True
-                            logger.info(f"AI reasoning generated for {ticker}")
-                        else:
-                            # Fallback to basic reasoning
-                            recommendation["reasoning"] = basic_reasoning
-                            recommendation["ai_generated"] = False
-                            logger.debug(f"Using basic reasoning for {ticker}")
-
-                    except Exception as e:
-                        # Fallback to basic reasoning on error
-                        logger.error(f"Error generating AI reasoning for {ticker}: {str(e)}")
-                        recommendation["reasoning"] = basic_reasoning
-                        recommendation["ai_generated"] = False
-
-                    recommendations.append(recommendation)
+    Planning runs in the default executor and reasoning on the async LLM
+    client, so no worker thread is held while waiting on the API.
 
+    Args:
+        current_sectors: Current sector allocations
+        ticker_details: Ticker breakdown
+        total_value: Total portfolio value
+        model_type: "conservative", "balanced", or "growth"
+
+    Returns:
+        List of rebalancing recommendations with AI-generated reasoning
+    """
+    loop = asyncio.get_running_loop()
+    recommendations = await loop.run_in_executor(None, plan_rebalancing, ticker_details, model_type)
+    portfolio_context = build_portfolio_context(current_sectors, ticker_details, total_value)
+
+    await _attach_reasoning_async([(r, model_type) for r in recommendations], ticker_details, portfolio_context)
     return recommendations
+
+
+def stream_rebalancing(
+    current_sectors: List[Dict],
+    ticker_details: Dict[str, Dict],
+    total_value: float,
+    model_type: str = "balanced"
+) -> Iterator[Dict]:
+    """
+    Rebalance with AI reasoning streamed as it is generated.
+
+    The deterministic plan (allocations and trades with basic reasoning) is
+    yielded first, then reasoning deltas for all recommendations interleaved
+    as they arrive, a final reasoning event per recommendation, and "done".
+
+    Args:
+        current_sectors: Current sector allocations
+        ticker_details: Ticker breakdown
+        total_value: Total portfolio value
+        model_type: "conservative", "balanced", or "growth"
+
+    Yields:
+        Event dicts with a "type" of "plan", "reasoning_delta", "reasoning" or "done"
+    """
+    recommendations = plan_rebalancing(ticker_details, model_type)
+    yield {
+        "type": "plan",
+        "model_type": model_type,
+        "current_allocation": current_sectors,
+        "target_allocation": build_target_allocation(model_type, total_value),
+        "recommendations": recommendations
+    }
+
+    portfolio_context = build_portfolio_context(current_sectors, ticker_details, total_value)
+    items = _reasoning_items([(r, model_type) for r in recommendations], ticker_details)
+
+    for kind, index, text in get_llm_service().stream_reasoning(items, portfolio_context):
+        recommendation = recommendations[index]
+        if kind == "delta":
+            yield {"type": "reasoning_delta", "index": index, "ticker": recommendation["ticker"], "text": text}
+            continue
+
+        if text:
+            recommendation["reasoning"] = text
+            recommendation["ai_generated"] = True
+        yield {
+            "type": "reasoning",
+            "index": index,
+            "ticker": recommendation["ticker"],
+            "reasoning": recommendation["reasoning"],
+            "ai_generated": recommendation["ai_generated"]
+        }
+
+    yield {"type": "done"}
+
+
+def recommend_rebalancing_all(
+    current_sectors: List[Dict],
+    ticker_details: Dict[str, Dict],
+    total_value: float
+) -> Dict[str, List[Dict]]:
+    """
+    Generate recommendations with AI reasoning for every model portfolio.
+
+    Valuation, current sectors and portfolio context are shared across all
+    models, and trades for all models come from a single solver pass.
+
+    Args:
+        current_sectors: Current sector allocations
+        ticker_details: Ticker breakdown
+        total_value: Total portfolio value
+
+    Returns:
+        Dict mapping model type to its recommendations
+    """
+    plans = plan_rebalancing_all(ticker_details)
+    portfolio_context = build_portfolio_context(current_sectors, ticker_details, total_value)
+
+    # One fan-out across every model so all reasoning calls share the deadline
+    _attach_reasoning(
+        [(r, model_type) for model_type, recommendations in plans.items() for r in recommendations],
+        ticker_details,
+        portfolio_context
+    )
+
+    return plans
+
+
+async def recommend_rebalancing_all_async(
+    current_sectors: List[Dict],
+    ticker_details: Dict[str, Dict],
+    total_value: float
+) -> Dict[str, List[Dict]]:
+    """
+    Async variant of recommend_rebalancing_all() for async routes.
+
+    Args:
+        current_sectors: Current sector allocations
+        ticker_details: Ticker breakdown
+        total_value: Total portfolio value
+
+    Returns:
+        Dict mapping model type to its recommendations
+    """
+    loop = asyncio.get_running_loop()
+    plans = await loop.run_in_executor(None, plan_rebalancing_all, ticker_details)
+    portfolio_context = build_portfolio_context(current_sectors, ticker_details, total_value)
+
+    await _attach_reasoning_async(
+        [(r, model_type) for model_type, recommendations in plans.items() for r in recommendations],
+        ticker_details,
+        portfolio_context
+    )
+
+    return plans
+
+
+def summarize_sector_totals(sector_totals: Dict[str, float], total_value: float) -> Dict:
+    """
+    Build a full portfolio analysis from running sector totals.
+
+    The cost depends only on the number of sectors, not the number of holdings,
+    so stored portfolios can be re-scored after every change.
+
+    Args:
+        sector_totals: Mapping of sector name to total value held in it
+        total_value: Total portfolio value
+
+    Returns:
+        Dict matching the PortfolioAnalysis schema
+    """
+    sectors = build_sector_allocation(sector_totals, total_value)
+
+    return {
+        "total_value": round(total_value, 2),
+        "sectors": sectors,
+        "concentrated_sectors": detect_concentration_risks(sectors),
+        "diversification_score": calculate_diversification_score(sectors)
+    }
@@ -0,0 +1,281 @@
+"""
+Persisted portfolios with incremental re-analysis for Persona B.
+
+Each stored portfolio keeps a running total value and per-sector totals next to
+its holdings. Applying a delta (add, remove, change shares) only revalues the
+touched holdings and adjusts the sectors they are exposed to (funds through
+their stored look-through weights), so re-scoring a large
+portfolio after a small change costs O(changes + sectors) instead of a full
+re-analysis.
+
+Stored holdings are priced at the latest close from get_latest_prices, both
+when deltas are applied and when the drift monitor revalues them, so the
+running totals never mix price sources. Tickers without a quote fall back to
+value_holding's mock pricing.
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+from sqlalchemy.orm import Session
+
+from .market_data import get_latest_prices
+from .models import Holding, Portfolio, User
+from .portfolio import MODEL_PORTFOLIOS, summarize_sector_totals, value_holding
+from .schemas import HoldingDelta, PortfolioHolding
+
+logger = logging.getLogger(__name__)
+
+DELTA_ACTIONS = ("add", "remove", "set")
+
+# Sector totals below this are treated as empty (float residue after removals)
+_EMPTY_SECTOR_EPSILON = 1e-6
+
+
+def create_portfolio(
+    db: Session,
+    user: User,
+    holdings: List[PortfolioHolding],
+    name: str = "My Portfolio",
+    model_type: str = "balanced"
+) -> Portfolio:
+    """
+    Store a new portfolio for a user.
+
+    Duplicate tickers are merged as if they had been added one after another.
+
+    Args:
+        db: Database session
+        user: Owner of the portfolio
+        holdings: Initial holdings
+        name: Display name
+        model_type: Target model used for rebalancing and drift checks
+
+    Returns:
+        The persisted Portfolio
+
+    Raises:
+        ValueError: If the model type or holdings are invalid
+    """
+    if model_type not in MODEL_PORTFOLIOS:
+        raise ValueError("model_type must be 'conservative', 'balanced', or 'growth'")
+
+    portfolio = Portfolio(
+        user_id=user.id,
+        name=name,
+        model_type=model_type,
+        total_value=0.0,
+        sector_totals={}
+    )
+    db.add(portfolio)
+
+    deltas = [
+        HoldingDelta(
+            ticker=h.ticker,
+            action="add",
+            shares=h.shares,
+            purchase_price=h.purchase_price
+        )
+        for h in holdings
+    ]
+    _apply_deltas(portfolio, deltas)
+
+    db.commit()
+    db.refresh(portfolio)
+    return portfolio
+
+
+def get_user_portfolio(db: Session, user: User, portfolio_id: int) -> Optional[Portfolio]:
+    """Get a stored portfolio owned by the user, or None."""
+    return db.query(Portfolio).filter(
+        Portfolio.id == portfolio_id,
+        Portfolio.user_id == user.id
+    ).first()
+
+
+def apply_holding_deltas(db: Session, portfolio: Portfolio, deltas: List[HoldingDelta]) -> Portfolio:
+    """
+    Apply holding changes and incrementally update the portfolio aggregates.
+
+    Args:
+        db: Database session
+        portfolio: Stored portfolio to modify
+        deltas: Changes to apply, in order
+
+    Returns:
+        The updated Portfolio
+
+    Raises:
+        ValueError: If a delta is invalid (nothing is committed in that case)
+    """
+    try:
+        _apply_deltas(portfolio, deltas)
+    except ValueError:
+        db.rollback()
+        raise
+
+    db.commit()
+    db.refresh(portfolio)
+    return portfolio
+
+
+def portfolio_analysis(portfolio: Portfolio) -> Dict:
+    """
+    Get the analysis for a stored portfolio from its running sector totals.
+
+    Args:
+        portfolio: Stored portfolio
+
+    Returns:
+        Dict matching the PortfolioAnalysis schema
+    """
+    return summarize_sector_totals(portfolio.sector_totals or {}, portfolio.total_value)
+
+
+def portfolio_holdings(portfolio: Portfolio) -> List[PortfolioHolding]:
+    """Convert stored holdings back into PortfolioHolding objects."""
+    return [
+        PortfolioHolding(ticker=h.ticker, shares=h.shares, purchase_price=h.purchase_price)
+        for h in sorted(portfolio.holdings, key=lambda h: h.ticker)
+    ]
+
+
+def revalue_holdings(portfolio: Portfolio, prices: Dict[str, float]) -> int:
+    """
+    Revalue holdings at new prices, adjusting only the affected sector totals.
+
+    Args:
+        portfolio: Stored portfolio to update (not committed)
+        prices: Mapping of ticker to latest price; other tickers are left as-is
+
+    Returns:
+        Number of holdings revalued
+    """
+    sector_totals = dict(portfolio.sector_totals or {})
+    total_value = portfolio.total_value or 0.0
+    revalued = 0
+
+    for holding in portfolio.holdings:
+        price = prices.get(holding.ticker)
+        if price is None or price == holding.current_price:
+            continue
+
+        new_value = holding.shares * price
+        change = new_value - holding.value
+        _add_exposure(sector_totals, holding, change)
+        total_value += change
+
+        holding.current_price = price
+        holding.value = new_value
+        revalued += 1
+
+    if revalued:
+        portfolio.sector_totals = sector_totals
+        portfolio.total_value = max(total_value, 0.0)
+
+    return revalued
+
+
+def _apply_deltas(portfolio: Portfolio, deltas: List[HoldingDelta]):
+    """Apply deltas to the portfolio in memory, adjusting only touched sectors."""
+    holdings_by_ticker = {h.ticker: h for h in portfolio.holdings}
+    # Copy so SQLAlchemy sees a new value for the JSON column
+    sector_totals = dict(portfolio.sector_totals or {})
+    total_value = portfolio.total_value or 0.0
+    # Same quotes the drift monitor revalues at
+    prices = get_latest_prices([delta.ticker.strip() for delta in deltas])
+
+    for delta in deltas:
+        ticker = delta.ticker.strip().upper()
+        if delta.action not in DELTA_ACTIONS:
+            raise ValueError(f"Invalid action '{delta.action}' for {ticker}; must be 'add', 'remove', or 'set'")
+
+        existing = holdings_by_ticker.get(ticker)
+
+        if delta.action == "remove":
+            if existing is None:
+                raise ValueError(f"{ticker} is not in this portfolio")
+            if delta.shares is not None and delta.shares <= 0:
+                raise ValueError(f"'remove' for {ticker} requires a positive number of shares")
+            shares = 0.0 if delta.shares is None else existing.shares - delta.shares
+            purchase_price = existing.purchase_price
+        elif delta.action == "add":
+            if delta.shares is None or delta.shares <= 0:
+                raise ValueError(f"'add' for {ticker} requires a positive number of shares")
+            if existing is None:
+                if delta.purchase_price is None:
+                    raise ValueError(f"purchase_price is required when adding new ticker {ticker}")
+                shares = delta.shares
+                purchase_price = delta.purchase_price
+            else:
+                shares = existing.shares + delta.shares
+                # Blend cost basis across lots
+                added_price = delta.purchase_price if delta.purchase_price is not None else existing.purchase_price
+                purchase_price = (
+                    existing.shares * existing.purchase_price + delta.shares * added_price
+                ) / shares
+        else:  # set
+            if delta.shares is None or delta.shares < 0:
+                raise ValueError(f"'set' for {ticker} requires a non-negative number of shares")
+            if existing is None and delta.purchase_price is None and delta.shares > 0:
+                raise ValueError(f"purchase_price is required when adding new ticker {ticker}")
+            shares = delta.shares
+            if delta.purchase_price is not None:
+                purchase_price = delta.purchase_price
+            else:
+                purchase_price = existing.purchase_price if existing else 0.0
+
+        if shares < 0:
+            raise ValueError(f"Cannot remove more shares of {ticker} than are held")
+
+        # Back out the old contribution
+        if existing is not None:
+            total_value -= existing.value
+            _add_exposure(sector_totals, existing, -existing.value)
+
+        if shares == 0:
+            if existing is not None:
+                portfolio.holdings.remove(existing)
+                del holdings_by_ticker[ticker]
+            continue
+
+        details = value_holding(
+            PortfolioHolding(ticker=ticker, shares=shares, purchase_price=purchase_price),
+            current_price=prices.get(ticker)
+        )
+
+        if existing is None:
+            existing = Holding(ticker=ticker)
+            portfolio.holdings.append(existing)
+            holdings_by_ticker[ticker] = existing
+
+        existing.shares = shares
+        existing.purchase_price = purchase_price
+        existing.current_price = details["current_price"]
+        existing.value = details["value"]
+        existing.sector = details["sector"]
+        existing.sector_weights = details["sector_weights"]
+
+        total_value += details["value"]
+        _add_exposure(sector_totals, existing, details["value"])
+
+    portfolio.sector_totals = sector_totals
+    portfolio.total_value = max(total_value, 0.0) if portfolio.holdings else 0.0
+    # Holdings changed: have the drift monitor re-check this portfolio on its next run
+    portfolio.drift_checked_at = None
+
+
+def _add_exposure(sector_totals: Dict[str, float], holding: Holding, amount: float):
+    """Spread a change in a holding's value over the sectors it is exposed to."""
+    # Holdings stored before look-through only have a single sector
+    for sector, weight in (holding.sector_weights or {holding.sector: 1.0}).items():
+        _add_to_sector(sector_totals, sector, amount * weight)
+
+
+def _add_to_sector(sector_totals: Dict[str, float], sector: str, amount: float):
+    """Adjust one sector total, dropping it once it is empty."""
+    new_total = sector_totals.get(sector, 0.0) + amount
+    if abs(new_total) < _EMPTY_SECTOR_EPSILON:
+        sector_totals.pop(sector, None)
+    else:
+        sector_totals[sector] = new_total
@@ -0,0 +1,49 @@
+"""
+Shared process pool for CPU-bound portfolio work.
+
+The pool is created lazily on first use and shut down with the app. Workers
+are started with the "spawn" method so they never inherit the server's
+threads or open database connections.
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 2)))
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get or create the global process pool.
+
+    Returns:
+        ProcessPoolExecutor instance
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            logger.info(f"Starting process pool with {PROCESS_POOL_WORKERS} workers")
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """Shut down the global process pool, if it was started."""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Process pool shut down")
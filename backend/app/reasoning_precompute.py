@@ -0,0 +1,270 @@
+"""
+Offline precomputation of rebalancing reasoning for common recommendation shapes.
+
+Recommendations repeat across users in shape: the same sector, action, rough
+current and target allocation and model (e.g. "sell Technology from ~45% to
+25% for growth"). Every reasoning lookup counts its shape (see
+PrecomputedReasoning). A nightly job folds those counts into the
+reasoning_templates table, sends the frequent shapes that have no reasoning yet
+to the Message Batches API as a single batch, and stores the answers. The
+table is then loaded into memory, where LLMService checks it before making a
+live call.
+
+A batch's id is stored on its rows when it is submitted. If the job stops
+waiting (shutdown, or REASONING_BATCH_MAX_WAIT_SECONDS) the next run resumes
+polling that batch instead of paying to submit the same shapes again. Shape
+counts are also flushed on shutdown so restarts don't lose them.
+"""
+
+from datetime import datetime
+from threading import Event
+from typing import Dict, List, Optional
+import os
+import time
+import logging
+
+from anthropic import NotFoundError
+from sqlalchemy.orm import Session
+
+from .background import PeriodicTask
+from .database import SessionLocal
+from .llm_cache import precomputed_reasoning
+from .llm_telemetry import llm_telemetry
+from .llm_service import LLMService, get_llm_service
+from .models import ReasoningTemplate
+
+logger = logging.getLogger(__name__)
+
+REASONING_PRECOMPUTE_INTERVAL_SECONDS = float(os.getenv("REASONING_PRECOMPUTE_INTERVAL_SECONDS", "86400"))  # 0 disables
+REASONING_PRECOMPUTE_MIN_USAGE = int(os.getenv("REASONING_PRECOMPUTE_MIN_USAGE", "3"))
+REASONING_PRECOMPUTE_MAX_SHAPES = int(os.getenv("REASONING_PRECOMPUTE_MAX_SHAPES", "200"))
+REASONING_BATCH_POLL_SECONDS = float(os.getenv("REASONING_BATCH_POLL_SECONDS", "60"))
+REASONING_BATCH_MAX_WAIT_SECONDS = float(os.getenv("REASONING_BATCH_MAX_WAIT_SECONDS", "7200"))
+
+FEATURE_PRECOMPUTE = "precompute"  # Telemetry feature tag
+
+_task: Optional[PeriodicTask] = None
+_stop_event = Event()  # Interrupts batch polling on shutdown
+
+
+def flush_usage(db: Session) -> int:
+    """
+    Add the shape usage counted since the last flush to the reasoning_templates table.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of distinct shapes updated
+    """
+    usage = precomputed_reasoning.take_usage()
+    for (sector, action, current, target, model_type), count in usage.items():
+        row = db.query(ReasoningTemplate).filter(
+            ReasoningTemplate.sector == sector,
+            ReasoningTemplate.action == action,
+            ReasoningTemplate.current_bucket == current,
+            ReasoningTemplate.target_bucket == target,
+            ReasoningTemplate.model_type == model_type
+        ).first()
+        if row is None:
+            row = ReasoningTemplate(
+                sector=sector, action=action, current_bucket=current,
+                target_bucket=target, model_type=model_type, usage_count=0
+            )
+            db.add(row)
+        row.usage_count += count
+    db.commit()
+    return len(usage)
+
+
+def load_templates(db: Session) -> int:
+    """
+    Load every precomputed reasoning into the in-memory lookup.
+
+    Returns:
+        Number of shapes loaded
+    """
+    rows = db.query(ReasoningTemplate).filter(ReasoningTemplate.reasoning.isnot(None)).all()
+    precomputed_reasoning.replace({_shape(row): row.reasoning for row in rows})
+    return len(rows)
+
+
+def run_precompute(
+    db: Session,
+    service: Optional[LLMService] = None,
+    min_usage: int = REASONING_PRECOMPUTE_MIN_USAGE,
+    max_shapes: int = REASONING_PRECOMPUTE_MAX_SHAPES,
+    poll_seconds: float = REASONING_BATCH_POLL_SECONDS,
+    max_wait_seconds: float = REASONING_BATCH_MAX_WAIT_SECONDS
+) -> Dict:
+    """
+    Precompute reasoning for the most used shapes that do not have any yet.
+
+    Args:
+        db: Database session
+        service: LLM service whose client submits the batch (default: the global one)
+        min_usage: Requests a shape needs before it is precomputed
+        max_shapes: Most shapes submitted per run
+        poll_seconds: Interval between batch status checks
+        max_wait_seconds: Stop waiting on batches after this long (the next run resumes them)
+
+    Returns:
+        Summary dict with counts of shapes flushed, submitted and stored, and
+        of earlier batches resumed
+    """
+    service = service or get_llm_service()
+    summary = {"shapes_flushed": flush_usage(db), "batches_resumed": 0, "shapes_submitted": 0, "shapes_stored": 0}
+
+    if service.client is not None:
+        deadline = time.monotonic() + max_wait_seconds
+        for batch_id in _pending_batch_ids(db):
+            summary["batches_resumed"] += 1
+            summary["shapes_stored"] += _collect_batch(db, service, batch_id, poll_seconds, deadline)
+
+        rows = _shapes_to_precompute(db, min_usage, max_shapes)
+        if rows and not _stop_event.is_set():
+            summary["shapes_submitted"] = len(rows)
+            batch_id = _submit_batch(db, service, rows)
+            summary["shapes_stored"] += _collect_batch(db, service, batch_id, poll_seconds, deadline)
+
+    summary["shapes_loaded"] = load_templates(db)
+    logger.info(f"Reasoning precompute: {summary}")
+    return summary
+
+
+def _shapes_to_precompute(db: Session, min_usage: int, max_shapes: int) -> List[ReasoningTemplate]:
+    return (
+        db.query(ReasoningTemplate)
+        .filter(
+            ReasoningTemplate.reasoning.is_(None),
+            ReasoningTemplate.batch_id.is_(None),
+            ReasoningTemplate.usage_count >= min_usage
+        )
+        .order_by(ReasoningTemplate.usage_count.desc())
+        .limit(max_shapes)
+        .all()
+    )
+
+
+def _pending_batch_ids(db: Session) -> List[str]:
+    """Ids of batches submitted by an earlier run whose results were never collected."""
+    rows = db.query(ReasoningTemplate.batch_id).filter(ReasoningTemplate.batch_id.isnot(None)).distinct().all()
+    return [batch_id for (batch_id,) in rows]
+
+
+def _submit_batch(db: Session, service: LLMService, rows: List[ReasoningTemplate]) -> str:
+    """Submit one message batch for the rows and mark them pending on it."""
+    requests = [
+        {"custom_id": f"shape-{row.id}", "params": service.shape_request(_shape(row))}
+        for row in rows
+    ]
+    batch = service.client.messages.batches.create(requests=requests)
+    for row in rows:
+        row.batch_id = batch.id
+    db.commit()
+    logger.info(f"Submitted reasoning batch {batch.id} with {len(rows)} shapes")
+    return batch.id
+
+
+def _collect_batch(db: Session, service: LLMService, batch_id: str, poll_seconds: float, deadline: float) -> int:
+    """
+    Wait for a batch and store its answers on the rows pending on it.
+
+    Rows stay pending if the batch is still running at the deadline or on
+    shutdown; otherwise they are released, so shapes whose request failed are
+    submitted again by a later run.
+
+    Returns:
+        Number of shapes stored
+    """
+    batches = service.client.messages.batches
+    try:
+        batch = batches.retrieve(batch_id)
+    except NotFoundError:
+        logger.warning(f"Reasoning batch {batch_id} no longer exists; releasing its shapes")
+        _release(db, batch_id)
+        return 0
+    while batch.processing_status != "ended":
+        if time.monotonic() >= deadline or _stop_event.wait(poll_seconds):
+            logger.warning(f"Stopped waiting for reasoning batch {batch_id}; the next run resumes it")
+            return 0
+        batch = batches.retrieve(batch_id)
+
+    rows = db.query(ReasoningTemplate).filter(ReasoningTemplate.batch_id == batch_id).all()
+    by_id = {f"shape-{row.id}": row for row in rows}
+    model = service.shape_request(_shape(rows[0]))["model"] if rows else None
+
+    stored = 0
+    now = datetime.utcnow()
+    for entry in batches.results(batch_id):
+        row = by_id.get(entry.custom_id)
+        if row is None:
+            continue
+        if entry.result.type != "succeeded":
+            llm_telemetry.record_call(FEATURE_PRECOMPUTE, model, "error", None, batch=True)
+            continue
+        llm_telemetry.record_call(
+            FEATURE_PRECOMPUTE, model, "success", None, getattr(entry.result.message, "usage", None), batch=True
+        )
+        text = entry.result.message.content[0].text.strip()
+        if text:
+            row.reasoning = text
+            row.generated_at = now
+            stored += 1
+    _release(db, batch_id)
+    return stored
+
+
+def _release(db: Session, batch_id: str):
+    """Clear the pending batch from its rows."""
+    db.query(ReasoningTemplate).filter(ReasoningTemplate.batch_id == batch_id).update({"batch_id": None})
+    db.commit()
+
+
+def _shape(row: ReasoningTemplate) -> tuple:
+    return (row.sector, row.action, row.current_bucket, row.target_bucket, row.model_type)
+
+
+def _scheduled_precompute():
+    """Run one precompute with its own database session."""
+    db = SessionLocal()
+    try:
+        run_precompute(db)
+    finally:
+        db.close()
+
+
+def start_reasoning_precompute():
+    """Load stored reasoning and start the periodic precompute unless disabled by configuration."""
+    global _task
+    db = SessionLocal()
+    try:
+        load_templates(db)
+    finally:
+        db.close()
+
+    if REASONING_PRECOMPUTE_INTERVAL_SECONDS <= 0:
+        logger.info("Reasoning precompute disabled")
+        return
+    _stop_event.clear()
+    if _task is None:
+        # Not on startup: restarts and reloads would otherwise each submit a batch
+        _task = PeriodicTask(
+            "reasoning-precompute", _scheduled_precompute, REASONING_PRECOMPUTE_INTERVAL_SECONDS, run_immediately=False
+        )
+    _task.start()
+
+
+def stop_reasoning_precompute():
+    """Stop the periodic precompute if it is running and save the shape counts seen since the last run."""
+    _stop_event.set()
+    if _task is not None:
+        _task.stop()
+
+    db = SessionLocal()
+    try:
+        flush_usage(db)
+    except Exception as e:
+        logger.error(f"Failed to save reasoning shape usage: {str(e)}")
+    finally:
+        db.close()
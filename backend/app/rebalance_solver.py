@@ -0,0 +1,194 @@
+"""
+Optimization-based rebalancing solver.
+
+Solves, for every sector s with current value c_s and target value t_s:
+
+    minimize   ((X_s - g_s) / V)^2 + lambda * |X_s| / V      where g_s = t_s - c_s
+
+i.e. squared tracking error to the target sector weights plus an L1 turnover
+penalty (lambda = turnover_penalty + transaction cost). The problem separates
+by sector and has a closed-form soft-threshold solution, so the whole holdings
+vector is solved with a handful of NumPy operations:
+
+    X_s = sign(g_s) * max(|g_s| - lambda * V / 2, 0)
+
+Each sector trade is split pro rata across the positions already held in that
+sector (sectors with no holdings are bought through a sector fund). Current
+sector values may include look-through exposure from diversified funds, which
+count toward the targets but are not traded themselves. Trades are then
+rounded down to whole lots. Trades under the minimum trade size are dropped and
+their residual is re-assigned to the largest position in the sector so small
+sectors are not silently skipped.
+
+Targets may be a single target vector (S,) or a matrix (M, S); all M target
+models are solved in the same vectorized pass.
+"""
+
+from typing import Dict
+import numpy as np
+
+# Sector fund used to buy into a sector the portfolio does not hold yet
+SECTOR_FUNDS = {
+    "Technology": "XLK",
+    "Healthcare": "XLV",
+    "Financials": "XLF",
+    "Consumer Discretionary": "XLY",
+    "Consumer Staples": "XLP",
+    "Industrials": "XLI",
+    "Materials": "XLB",
+    "Energy": "XLE",
+    "Utilities": "XLU",
+    "Real Estate": "XLRE",
+    "Communication Services": "XLC"
+}
+
+# Solver defaults
+DEFAULT_DRIFT_THRESHOLD = 5.0  # Leave sectors within +/-5 percentage points alone
+DEFAULT_TURNOVER_PENALTY = 0.01  # Weight of turnover relative to squared tracking error
+DEFAULT_TRANSACTION_COST_BPS = 10.0  # Per-trade cost, in basis points of traded value
+DEFAULT_LOT_SIZE = 1  # Whole shares
+DEFAULT_MIN_TRADE_AMOUNT = 100.0  # Skip trades smaller than $100
+
+
+def solve_rebalance(
+    values: np.ndarray,
+    prices: np.ndarray,
+    sector_index: np.ndarray,
+    targets: np.ndarray,
+    num_sectors: int,
+    drift_threshold: float = DEFAULT_DRIFT_THRESHOLD,
+    turnover_penalty: float = DEFAULT_TURNOVER_PENALTY,
+    transaction_cost_bps: float = DEFAULT_TRANSACTION_COST_BPS,
+    lot_size: float = DEFAULT_LOT_SIZE,
+    min_trade_amount: float = DEFAULT_MIN_TRADE_AMOUNT,
+    tracked_sectors: np.ndarray = None,
+    sector_values: np.ndarray = None
+) -> Dict[str, np.ndarray]:
+    """
+    Solve for the trades that move a portfolio toward target sector weights.
+
+    Args:
+        values: (N,) current market value of each position (0 for candidate funds)
+        prices: (N,) current price per share of each position
+        sector_index: (N,) sector id of each position, in [0, num_sectors)
+        targets: (S,) or (M, S) target sector weights in percent
+        num_sectors: Number of sectors S
+        drift_threshold: Sectors within this many percentage points of target are not traded
+        turnover_penalty: Extra L1 penalty on traded value (fraction of portfolio)
+        transaction_cost_bps: Transaction cost in basis points, added to the turnover penalty
+        lot_size: Trade size granularity in shares
+        min_trade_amount: Drop trades with a smaller dollar amount
+        tracked_sectors: Optional (S,) bool mask; untracked sectors are never traded
+        sector_values: Optional (S,) current value exposed to each sector (e.g. with
+            fund look-through); defaults to the values of the positions in each sector
+
+    Returns:
+        Dict with:
+            "shares": (M, N) signed shares to trade (positive = buy)
+            "amounts": (M, N) signed dollar amount of each trade
+            "current_percentage": (S,) current sector weights in percent
+            "target_percentage": (M, S) target sector weights in percent
+    """
+    values = np.asarray(values, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    sector_index = np.asarray(sector_index, dtype=np.intp)
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    num_models, num_positions = targets.shape[0], values.shape[0]
+
+    total_value = values.sum()
+    held_value = np.bincount(sector_index, weights=values, minlength=num_sectors)
+    current = held_value if sector_values is None else np.asarray(sector_values, dtype=float)
+
+    if total_value <= 0 or num_positions == 0:
+        empty = np.zeros((num_models, num_positions))
+        return {
+            "shares": empty,
+            "amounts": empty.copy(),
+            "current_percentage": np.zeros(num_sectors),
+            "target_percentage": targets
+        }
+
+    current_pct = current / total_value * 100
+    gap = targets / 100 * total_value - current  # (M, S)
+
+    # Closed-form solution of the per-sector tracking error + L1 turnover problem
+    penalty = turnover_penalty + transaction_cost_bps / 10000
+    sector_trade = np.sign(gap) * np.maximum(np.abs(gap) - penalty * total_value / 2, 0.0)
+
+    active = np.abs(targets - current_pct) > drift_threshold
+    if tracked_sectors is not None:
+        active &= np.asarray(tracked_sectors, dtype=bool)
+    sector_trade = np.where(active, sector_trade, 0.0)
+
+    # Split each sector trade pro rata over held positions; unheld sectors use their fund
+    sector_value = held_value[sector_index]
+    held = values > 0
+    split = np.where(
+        sector_value > 0,
+        np.divide(values, sector_value, out=np.zeros(num_positions), where=sector_value > 0),
+        (~held).astype(float)
+    )
+    desired = sector_trade[:, sector_index] * split  # (M, N) dollars
+
+    held_shares = np.divide(values, prices, out=np.zeros(num_positions), where=prices > 0)
+    shares = _round_lots(desired, prices, held_shares, lot_size)
+    shares = np.where(np.abs(shares * prices) < min_trade_amount, 0.0, shares)
+
+    # Re-assign what rounding and the minimum trade size left over to the largest position
+    residual = sector_trade - _sector_sum(shares * prices, sector_index, num_sectors)
+    anchor = _largest_position_per_sector(values, held, sector_index, num_sectors)
+    has_anchor = anchor >= 0
+    if has_anchor.any():
+        anchor_pos = anchor[has_anchor]
+        top_up = residual[:, has_anchor]
+        extra = _round_lots(
+            top_up,
+            prices[anchor_pos],
+            held_shares[anchor_pos] + np.minimum(shares[:, anchor_pos], 0.0),
+            lot_size
+        )
+        combined = shares[:, anchor_pos] + extra
+        combined = np.where(np.abs(combined * prices[anchor_pos]) < min_trade_amount, 0.0, combined)
+        shares[:, anchor_pos] = combined
+
+    return {
+        "shares": shares,
+        "amounts": shares * prices,
+        "current_percentage": current_pct,
+        "target_percentage": targets
+    }
+
+
+def _round_lots(desired: np.ndarray, prices: np.ndarray, held_shares: np.ndarray, lot_size: float) -> np.ndarray:
+    """Round dollar trades toward zero to whole lots, never selling more than is held."""
+    raw = np.divide(desired, prices, out=np.zeros_like(desired), where=prices > 0)
+    lots = np.trunc(raw / lot_size) * lot_size
+    return np.maximum(lots, -held_shares)
+
+
+def _sector_sum(matrix: np.ndarray, sector_index: np.ndarray, num_sectors: int) -> np.ndarray:
+    """Sum (M, N) position values into (M, S) sector values."""
+    out = np.zeros((matrix.shape[0], num_sectors))
+    np.add.at(out, (slice(None), sector_index), matrix)
+    return out
+
+
+def _largest_position_per_sector(
+    values: np.ndarray,
+    held: np.ndarray,
+    sector_index: np.ndarray,
+    num_sectors: int
+) -> np.ndarray:
+    """
+    Pick one position per sector to absorb residual trades.
+
+    The largest held position is used; sectors with no holdings fall back to
+    their candidate fund. Returns -1 for sectors with no position at all.
+    """
+    anchor = np.full(num_sectors, -1, dtype=np.intp)
+    # Sort by sector, then held, then value: the last entry of each sector run is the pick
+    order = np.lexsort((values, held, sector_index))
+    sorted_sectors = sector_index[order]
+    last_in_sector = np.r_[sorted_sectors[1:] != sorted_sectors[:-1], True]
+    anchor[sorted_sectors[last_in_sector]] = order[last_in_sector]
+    return anchor
@@ -0,0 +1,68 @@
+"""
+Fast JSON responses for large analysis payloads.
+
+Routes that already hold plain dicts shaped like their response_model (from
+the analysis modules or the market data cache) can return them through
+fast_response() instead of building pydantic models. The dicts are encoded
+straight to bytes with orjson when installed (stdlib json otherwise), which
+skips response model validation and FastAPI's jsonable_encoder pass. The
+route's response_model is still used for the OpenAPI schema.
+
+Set FAST_RESPONSES=false to route everything through the response models
+again (e.g. when debugging a schema mismatch).
+"""
+
+from typing import Any
+import json
+import os
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "true").lower() not in ("0", "false", "no")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes with orjson, handling NumPy scalars and arrays."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=_encode_numpy
+        ).encode("utf-8")
+
+
+def fast_response(content: Any, status_code: int = 200):
+    """
+    Return pre-validated content, bypassing response model serialization.
+
+    Args:
+        content: JSON-compatible data already matching the route's response_model
+        status_code: HTTP status code
+
+    Returns:
+        A FastJSONResponse, or the content itself when fast responses are disabled
+        (so FastAPI validates it against the response_model as usual)
+    """
+    if not FAST_RESPONSES:
+        return content
+    return FastJSONResponse(content, status_code=status_code)
+
+
+def _encode_numpy(value: Any):
+    """json.dumps fallback for NumPy values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,205 @@
+"""
+Historical risk analytics for portfolios.
+
+This module handles:
+- Building date-aligned price and return matrices from cached historical series
+- Covariance estimation (cached per symbol set and time range)
+- Portfolio volatility, beta vs SPY, historical and parametric VaR
+- Per-holding risk contribution
+
+All statistics are computed with vectorized NumPy over the returns matrix.
+"""
+
+from statistics import NormalDist
+from typing import Dict, List, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .market_data import get_historical_data, TTLCache
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_SYMBOL = "SPY"
+DEFAULT_VAR_CONFIDENCE = 0.95
+
+# Return periods per year for each granularity returned by get_historical_data
+PERIODS_PER_YEAR = {
+    "weekly": 52,
+    "monthly": 12
+}
+
+# Return statistics cache: (symbols, time_range) -> stats
+_stats_cache = TTLCache()
+
+
+def build_price_matrix(symbols: List[str], time_range: str = "1y") -> Tuple[List[str], np.ndarray, str]:
+    """
+    Build a date-aligned closing price matrix for a set of symbols.
+
+    Only dates present for every symbol are kept.
+
+    Args:
+        symbols: Ticker symbols
+        time_range: "1y", "3y", "5y", or "10y"
+
+    Returns:
+        Tuple of (dates, prices, granularity) where prices is (T, N) in symbol order
+
+    Raises:
+        ValueError: If a symbol has no history or the series do not overlap
+    """
+    closes = {}
+    granularity = "weekly" if time_range == "1y" else "monthly"
+
+    for symbol in symbols:
+        historical = get_historical_data(symbol, time_range)
+        if not historical or not historical.get("data"):
+            raise ValueError(f"No historical data available for {symbol}")
+        granularity = historical.get("granularity", granularity)
+        closes[symbol] = pd.Series(
+            {point["date"]: point["close"] for point in historical["data"]},
+            dtype=float
+        )
+
+    frame = pd.DataFrame(closes).sort_index().dropna()
+    if len(frame) < 3:
+        raise ValueError("Not enough overlapping history to compute risk statistics")
+
+    return list(frame.index), frame[symbols].to_numpy(), granularity
+
+
+def build_returns_matrix(symbols: List[str], time_range: str = "1y") -> Tuple[np.ndarray, str]:
+    """
+    Build a (T-1, N) matrix of simple periodic returns.
+
+    Args:
+        symbols: Ticker symbols
+        time_range: "1y", "3y", "5y", or "10y"
+
+    Returns:
+        Tuple of (returns, granularity)
+    """
+    _, prices, granularity = build_price_matrix(symbols, time_range)
+    return prices[1:] / prices[:-1] - 1.0, granularity
+
+
+def get_return_statistics(symbols: List[str], time_range: str = "1y") -> Dict:
+    """
+    Get the returns matrix, mean vector and covariance matrix for a symbol set.
+
+    Results are cached per (symbol set, time range); symbol order in the
+    result is sorted so the same set always hits the same entry.
+
+    Args:
+        symbols: Ticker symbols
+        time_range: "1y", "3y", "5y", or "10y"
+
+    Returns:
+        Dict with symbols, returns (T, N), mean (N,), cov (N, N), periods_per_year
+    """
+    key = (tuple(sorted({s.upper() for s in symbols})), time_range)
+
+    cached = _stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    ordered = list(key[0])
+    returns, granularity = build_returns_matrix(ordered, time_range)
+    stats = {
+        "symbols": ordered,
+        "returns": returns,
+        "mean": returns.mean(axis=0),
+        "cov": np.cov(returns, rowvar=False).reshape(len(ordered), len(ordered)),
+        "periods_per_year": PERIODS_PER_YEAR.get(granularity, 12)
+    }
+
+    _stats_cache.set(key, stats)
+
+    return stats
+
+
+def calculate_portfolio_risk(
+    position_values: Dict[str, float],
+    time_range: str = "1y",
+    confidence: float = DEFAULT_VAR_CONFIDENCE
+) -> Dict:
+    """
+    Calculate price-risk metrics for a portfolio.
+
+    Args:
+        position_values: Mapping of ticker to current market value
+        time_range: History window used for estimation
+        confidence: VaR confidence level (e.g. 0.95)
+
+    Returns:
+        Dict with annualized volatility, beta, one-period historical and
+        parametric VaR (percent and dollars), and per-holding breakdown
+    """
+    tickers = [t.upper() for t in position_values]
+    values = np.array([position_values[t] for t in position_values], dtype=float)
+    total_value = values.sum()
+    if total_value <= 0:
+        raise ValueError("Portfolio has no value")
+
+    stats = get_return_statistics(tickers + [BENCHMARK_SYMBOL], time_range)
+    index = {symbol: i for i, symbol in enumerate(stats["symbols"])}
+    holding_idx = np.array([index[t] for t in tickers])
+    bench_idx = index[BENCHMARK_SYMBOL]
+
+    weights = values / total_value
+    returns = stats["returns"][:, holding_idx]  # (T, N)
+    mean = stats["mean"][holding_idx]
+    cov = stats["cov"][np.ix_(holding_idx, holding_idx)]
+    periods = stats["periods_per_year"]
+
+    # Portfolio moments
+    portfolio_returns = returns @ weights
+    marginal = cov @ weights
+    variance = float(weights @ marginal)
+    sigma = np.sqrt(max(variance, 0.0))
+    mu = float(weights @ mean)
+
+    # Beta vs benchmark, for the portfolio and each holding
+    bench_cov = stats["cov"][holding_idx, bench_idx]
+    bench_var = stats["cov"][bench_idx, bench_idx]
+    holding_betas = bench_cov / bench_var if bench_var > 0 else np.zeros(len(tickers))
+    beta = float(weights @ holding_betas)
+
+    # One-period VaR, reported as a positive loss
+    var_historical = max(0.0, -float(np.quantile(portfolio_returns, 1.0 - confidence)))
+    z = NormalDist().inv_cdf(confidence)
+    var_parametric = max(0.0, z * sigma - mu)
+
+    # Euler risk contribution: w_i * (Cov w)_i / variance, sums to 1
+    contributions = weights * marginal / variance if variance > 0 else np.zeros(len(tickers))
+    holding_vols = np.sqrt(np.clip(np.diag(cov), 0.0, None)) * np.sqrt(periods)
+
+    return {
+        "time_range": time_range,
+        "confidence": confidence,
+        "observations": int(returns.shape[0]),
+        "volatility": round(sigma * np.sqrt(periods) * 100, 2),
+        "expected_return": round(mu * periods * 100, 2),
+        "beta": round(beta, 3),
+        "var_historical_pct": round(var_historical * 100, 2),
+        "var_historical_amount": round(var_historical * total_value, 2),
+        "var_parametric_pct": round(var_parametric * 100, 2),
+        "var_parametric_amount": round(var_parametric * total_value, 2),
+        "holdings": [
+            {
+                "ticker": ticker,
+                "weight": round(float(weights[i]) * 100, 2),
+                "volatility": round(float(holding_vols[i]) * 100, 2),
+                "beta": round(float(holding_betas[i]), 3),
+                "risk_contribution": round(float(contributions[i]) * 100, 2)
+            }
+            for i, ticker in enumerate(tickers)
+        ]
+    }
+
+
+def clear_risk_cache():
+    """Clear cached return statistics. Useful for testing."""
+    _stats_cache.clear()
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from typing import List
+
+from ..models import User
+from ..schemas import LLMTelemetryResponse, ReasoningCacheStats, LLMRouteStats
+from ..auth import get_current_admin
+from ..llm_service import get_llm_service
+from ..llm_telemetry import llm_telemetry
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/llm-telemetry", response_model=LLMTelemetryResponse)
+def get_llm_telemetry(current_user: User = Depends(get_current_admin)):
+    """
+    Get rolling LLM call telemetry grouped by calling feature and model.
+
+    Each group reports request counts by outcome and cache status, token and
+    estimated cost totals, and a latency histogram with percentiles. Groups
+    are ordered by p95 latency, slowest first. Only available to users listed
+    in ADMIN_EMAILS.
+    """
+    return {**llm_telemetry.snapshot(), "circuit_breaker": get_llm_service().breaker_stats()}
+
+
+@router.get("/llm-cache-stats", response_model=ReasoningCacheStats)
+def get_reasoning_cache_stats(current_user: User = Depends(get_current_admin)):
+    """Get size and hit-rate statistics for the AI reasoning cache, plus prompt-cache token usage."""
+    return get_llm_service().cache_stats()
+
+
+@router.get("/llm-route-stats", response_model=List[LLMRouteStats])
+def get_reasoning_route_stats(current_user: User = Depends(get_current_admin)):
+    """Get the model, token budget and recent call latency for each AI reasoning route."""
+    return get_llm_service().route_stats()
@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from ..database import get_db
+from ..models import User
+from ..schemas import PortfolioUpload, ProjectionRequest, BacktestRequest, JobResponse
+from ..auth import get_current_user
+from ..portfolio import MODEL_PORTFOLIOS
+from ..jobs import submit_job, get_user_job, list_user_jobs, cancel_job
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.post("/rebalance", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_rebalance_job(
+    portfolio: PortfolioUpload,
+    model_type: str = "balanced",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a rebalance with AI reasoning and return the job immediately.
+
+    The deterministic trades appear in partial_result as soon as the job
+    starts; reasoning is filled in one recommendation at a time.
+    """
+    if current_user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio rebalancing is only available for Persona B users"
+        )
+
+    if model_type not in MODEL_PORTFOLIOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="model_type must be 'conservative', 'balanced', or 'growth'"
+        )
+
+    payload = {"holdings": [h.model_dump() for h in portfolio.holdings], "model_type": model_type}
+    return submit_job(db, current_user, "rebalance", payload)
+
+
+@router.post("/projection", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_projection_job(
+    request: ProjectionRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a Monte Carlo projection (same input as /portfolio/projection)."""
+    if current_user.persona not in ("A", "B"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio projections are only available for Persona A and B users"
+        )
+
+    return submit_job(db, current_user, "projection", request.model_dump())
+
+
+@router.post("/backtest", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def submit_backtest_job(
+    request: BacktestRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a backtest (same input as /portfolio/backtest); results appear per strategy."""
+    if current_user.persona not in ("A", "B"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Backtests are only available for Persona A and B users"
+        )
+
+    invalid = [m for m in request.model_types if m not in MODEL_PORTFOLIOS]
+    if invalid or (not request.model_types and not request.holdings):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="model_types must contain 'conservative', 'balanced', or 'growth', or holdings must be provided"
+        )
+
+    return submit_job(db, current_user, "backtest", request.model_dump())
+
+
+@router.get("", response_model=List[JobResponse])
+def list_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's most recent jobs."""
+    return list_user_jobs(db, current_user, limit)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a job's status, progress, partial result and final result."""
+    job = get_user_job(db, current_user, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    # Workers update the row from their own sessions
+    db.refresh(job)
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+def cancel_user_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel a job.
+
+    Queued jobs are cancelled at once; running jobs stop at their next step
+    and keep whatever partial result they had published.
+    """
+    job = get_user_job(db, current_user, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return cancel_job(db, job)
@@ -4,6 +4,7 @@ from typing import List
 from ..schemas import TickerSearch, TickerDetail, HistoricalDataResponse
 from ..market_data import search_ticker, get_ticker_overview, get_historical_data
 from ..auth import get_current_user
+from ..responses import fast_response
 from ..models import User
 
 router = APIRouter(prefix="/market", tags=["Market Data"])
@@ -98,4 +99,5 @@ def get_ticker_history(
             detail=f"Historical data for {symbol} not available"
         )
 
-    return historical_data
+    # Cached series already match HistoricalDataResponse; skip per-point model construction
+    return fast_response(historical_data)
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import List
+import asyncio
+import json
 
 from ..database import get_db
 from ..models import User
@@ -8,17 +12,54 @@ from ..schemas import (
     PortfolioAnalysis,
     SectorAllocation,
     RebalanceResponse,
-    RebalanceRecommendation
+    RebalanceComparisonResponse,
+    SavedPortfolioCreate,
+    SavedPortfolioResponse,
+    SavedPortfolioSummary,
+    HoldingDeltaRequest,
+    BatchPortfolioRequest,
+    BatchPortfolioResult,
+    PortfolioRiskResponse,
+    PortfolioPerformanceResponse,
+    CorrelationResponse,
+    ProjectionRequest,
+    ProjectionResponse,
+    BacktestRequest,
+    BacktestResponse,
+    FrontierRequest,
+    FrontierResponse,
+    WhatIfRequest,
+    WhatIfResponse
 )
 from ..auth import get_current_user
+from ..responses import fast_response
 from ..portfolio import (
     parse_csv_portfolio,
     calculate_portfolio_value,
     analyze_sector_allocation,
     detect_concentration_risks,
     calculate_diversification_score,
-    recommend_rebalancing
+    recommend_rebalancing_async,
+    recommend_rebalancing_all_async,
+    stream_rebalancing,
+    build_target_allocation,
+    MODEL_PORTFOLIOS
 )
+from ..batch import analyze_portfolios, MAX_BATCH_PORTFOLIOS
+from ..risk import calculate_portfolio_risk
+from ..correlation import analyze_correlation, DEFAULT_CORRELATION_THRESHOLD
+from ..performance import aggregate_shares, calculate_performance
+from ..simulation import project_portfolio
+from ..backtest import backtest_strategies
+from ..frontier import compute_frontier
+from ..portfolio_store import (
+    create_portfolio,
+    get_user_portfolio,
+    apply_holding_deltas,
+    portfolio_analysis,
+    portfolio_holdings
+)
+from ..what_if import simulate_scenarios
 
 router = APIRouter(prefix="/portfolio", tags=["Portfolio Analysis"])
 
@@ -78,12 +119,12 @@ async def upload_portfolio(
         diversification_score = calculate_diversification_score(sectors)
 
         # Build response
-        return PortfolioAnalysis(
-            total_value=round(total_value, 2),
-            sectors=[SectorAllocation(**s) for s in sectors],
-            concentrated_sectors=concentrated_sectors,
-            diversification_score=diversification_score
-        )
+        return fast_response({
+            "total_value": round(total_value, 2),
+            "sectors": sectors,
+            "concentrated_sectors": concentrated_sectors,
+            "diversification_score": diversification_score
+        })
 
     except ValueError as e:
         raise HTTPException(
@@ -132,12 +173,12 @@ def analyze_portfolio(
         # Calculate diversification score
         diversification_score = calculate_diversification_score(sectors)
 
-        return PortfolioAnalysis(
-            total_value=round(total_value, 2),
-            sectors=[SectorAllocation(**s) for s in sectors],
-            concentrated_sectors=concentrated_sectors,
-            diversification_score=diversification_score
-        )
+        return fast_response({
+            "total_value": round(total_value, 2),
+            "sectors": sectors,
+            "concentrated_sectors": concentrated_sectors,
+            "diversification_score": diversification_score
+        })
 
     except Exception as e:
         raise HTTPException(
@@ -147,7 +188,7 @@ def analyze_portfolio(
 
 
 @router.post("/rebalance", response_model=RebalanceResponse)
-def get_rebalancing_recommendations(
+async def get_rebalancing_recommendations(
     portfolio: PortfolioUpload,
     model_type: str = "balanced",
     current_user: User = Depends(get_current_user)
@@ -175,37 +216,692 @@ def get_rebalancing_recommendations(
         )
 
     try:
-        # Calculate values
-        total_value, ticker_details = calculate_portfolio_value(portfolio.holdings)
+        # Calculate values (market data lookups stay off the event loop)
+        loop = asyncio.get_running_loop()
+        total_value, ticker_details = await loop.run_in_executor(None, calculate_portfolio_value, portfolio.holdings)
 
         # Analyze current sectors
         current_sectors = analyze_sector_allocation(ticker_details, total_value)
 
         # Get target allocation from model
-        from ..portfolio import MODEL_PORTFOLIOS
-        target_model = MODEL_PORTFOLIOS[model_type]
-        target_sectors = [
-            SectorAllocation(sector=sector, percentage=pct, amount=total_value * pct / 100)
-            for sector, pct in target_model.items()
-        ]
+        target_sectors = build_target_allocation(model_type, total_value)
 
         # Generate recommendations
-        recommendations = recommend_rebalancing(
+        recommendations = await recommend_rebalancing_async(
             current_sectors,
             ticker_details,
             total_value,
             model_type
         )
 
-        return RebalanceResponse(
-            model_type=model_type,
-            current_allocation=[SectorAllocation(**s) for s in current_sectors],
-            target_allocation=target_sectors,
-            recommendations=[RebalanceRecommendation(**r) for r in recommendations]
+        return fast_response({
+            "model_type": model_type,
+            "current_allocation": current_sectors,
+            "target_allocation": target_sectors,
+            "recommendations": recommendations
+        })
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating recommendations: {str(e)}"
+        )
+
+
+@router.post(
+    "/rebalance/stream",
+    response_class=StreamingResponse,
+    responses={200: {
+        "description": "Newline-delimited JSON events: plan, reasoning_delta, reasoning, done",
+        "content": {"application/x-ndjson": {}}
+    }}
+)
+def stream_rebalancing_recommendations(
+    portfolio: PortfolioUpload,
+    model_type: str = "balanced",
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Rebalancing recommendations with AI reasoning streamed as it is generated.
+
+    The deterministic plan is sent immediately, then reasoning for each
+    recommendation streams token by token (interleaved, tagged by index):
+
+    {"type": "plan", "model_type": "balanced", "current_allocation": [...], "target_allocation": [...], "recommendations": [...]}
+    {"type": "reasoning_delta", "index": 0, "ticker": "AAPL", "text": "Trimming "}
+    {"type": "reasoning", "index": 0, "ticker": "AAPL", "reasoning": "...", "ai_generated": true}
+    {"type": "done"}
+
+    Recommendations whose reasoning fails or misses the deadline finish with
+    their basic reasoning and ai_generated false.
+    """
+    if current_user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio rebalancing is only available for Persona B users"
+        )
+
+    if model_type not in ["conservative", "balanced", "growth"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="model_type must be 'conservative', 'balanced', or 'growth'"
         )
 
+    try:
+        total_value, ticker_details = calculate_portfolio_value(portfolio.holdings)
+        current_sectors = analyze_sector_allocation(ticker_details, total_value)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating recommendations: {str(e)}"
         )
+
+    def stream_events():
+        for event in stream_rebalancing(current_sectors, ticker_details, total_value, model_type):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+
+@router.post("/rebalance/compare", response_model=RebalanceComparisonResponse)
+async def compare_rebalancing_models(
+    portfolio: PortfolioUpload,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get rebalancing plans for every model portfolio in one call.
+
+    Valuation and current sectors are computed once and all models are solved
+    in a single vectorized pass, instead of three /portfolio/rebalance calls.
+
+    Returns:
+        Current allocation plus one plan per model (conservative, balanced, growth)
+    """
+    if current_user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio rebalancing is only available for Persona B users"
+        )
+
+    try:
+        loop = asyncio.get_running_loop()
+        total_value, ticker_details = await loop.run_in_executor(None, calculate_portfolio_value, portfolio.holdings)
+        current_sectors = analyze_sector_allocation(ticker_details, total_value)
+
+        plans = await recommend_rebalancing_all_async(current_sectors, ticker_details, total_value)
+
+        return fast_response({
+            "current_allocation": current_sectors,
+            "plans": [
+                {
+                    "model_type": model_type,
+                    "current_allocation": current_sectors,
+                    "target_allocation": build_target_allocation(model_type, total_value),
+                    "recommendations": recommendations
+                }
+                for model_type, recommendations in plans.items()
+            ]
+        })
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating recommendations: {str(e)}"
+        )
+
+
+@router.post("/risk", response_model=PortfolioRiskResponse)
+def get_portfolio_risk(
+    portfolio: PortfolioUpload,
+    time_range: str = Query("1y", pattern="^(1y|3y|5y|10y)$"),
+    confidence: float = Query(0.95, gt=0.5, lt=1.0),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get historical price-risk metrics for a portfolio.
+
+    Uses cached historical series for the holdings and SPY to compute:
+    - Annualized volatility and historical mean return
+    - Beta vs SPY
+    - One-period historical and parametric Value at Risk
+    - Per-holding volatility, beta and contribution to portfolio risk
+
+    Args:
+        portfolio: Current portfolio holdings
+        time_range: History window - "1y" (weekly returns), "3y", "5y", "10y" (monthly)
+        confidence: VaR confidence level (default 0.95)
+    """
+    if current_user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio analysis is only available for Persona B users"
+        )
+
+    try:
+        _, ticker_details = calculate_portfolio_value(portfolio.holdings)
+        position_values = {ticker: d["value"] for ticker, d in ticker_details.items()}
+
+        return fast_response(calculate_portfolio_risk(position_values, time_range, confidence))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error calculating portfolio risk: {str(e)}"
+        )
+
+
+@router.post("/correlation", response_model=CorrelationResponse)
+def get_portfolio_correlation(
+    portfolio: PortfolioUpload,
+    time_range: str = Query("1y", pattern="^(1y|3y|5y|10y)$"),
+    threshold: float = Query(DEFAULT_CORRELATION_THRESHOLD, gt=0, le=1.0),
+    include_matrix: bool = Query(True, description="Omit the N x N matrix for large portfolios"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the pairwise return correlation matrix for a portfolio's holdings.
+
+    Flags pairs correlated at or above the threshold and groups them into
+    clusters, so holdings that move together (e.g. SPY and VOO) show up as
+    one combined exposure.
+
+    Args:
+        portfolio: Current portfolio holdings
+        time_range: History window - "1y" (weekly returns), "3y", "5y", "10y" (monthly)
+        threshold: Minimum correlation to flag (default 0.9)
+        include_matrix: Include the full matrix in the response
+    """
+    if current_user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio analysis is only available for Persona B users"
+        )
+
+    try:
+        _, ticker_details = calculate_portfolio_value(portfolio.holdings)
+        position_values = {ticker: d["value"] for ticker, d in ticker_details.items()}
+
+        return fast_response(analyze_correlation(position_values, time_range, threshold, include_matrix))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error calculating correlations: {str(e)}"
+        )
+
+
+@router.post("/performance", response_model=PortfolioPerformanceResponse)
+def get_portfolio_performance(
+    portfolio: PortfolioUpload,
+    time_range: str = Query("1y", pattern="^(1y|3y|5y|10y)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the historical value and return series for the current holdings.
+
+    The holdings' cached price histories are aligned on common dates and
+    combined with the share counts, as if the portfolio had been held
+    unchanged over the window.
+
+    Args:
+        portfolio: Current portfolio holdings
+        time_range: History window - "1y" (weekly points), "3y", "5y", "10y" (monthly)
+    """
+    if current_user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio analysis is only available for Persona B users"
+        )
+
+    try:
+        return fast_response(calculate_performance(aggregate_shares(portfolio.holdings), time_range))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error calculating portfolio performance: {str(e)}"
+        )
+
+
+@router.post("/projection", response_model=ProjectionResponse)
+def get_portfolio_projection(
+    request: ProjectionRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Project where a portfolio could be in N years with a Monte Carlo simulation.
+
+    Simulates correlated paths from the holdings' historical return and
+    covariance estimates and returns 5th/25th/50th/75th/95th percentile
+    values for every year. Pass a seed for reproducible results; the
+    simulation stops early if latency_budget_ms is exceeded.
+
+    Available for Persona A and B users.
+    """
+    if current_user.persona not in ("A", "B"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio projections are only available for Persona A and B users"
+        )
+
+    try:
+        _, ticker_details = calculate_portfolio_value(request.holdings)
+        position_values = {ticker: d["value"] for ticker, d in ticker_details.items()}
+
+        return fast_response(project_portfolio(
+            position_values,
+            years=request.years,
+            num_paths=request.num_paths,
+            time_range=request.time_range,
+            seed=request.seed,
+            parallel=request.parallel,
+            latency_budget_ms=request.latency_budget_ms
+        ))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error projecting portfolio: {str(e)}"
+        )
+
+
+@router.post("/backtest", response_model=BacktestResponse)
+def backtest_portfolios(
+    request: BacktestRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Backtest model portfolios (and optionally current holdings) on historical data.
+
+    Model portfolios are replayed through sector funds with the chosen
+    rebalance rule: "none" (buy and hold), "monthly", "quarterly", or
+    "threshold" (rebalance when any weight drifts more than `threshold`
+    percentage points). Returns equity curves, drawdowns and turnover.
+
+    Available for Persona A and B users.
+    """
+    if current_user.persona not in ("A", "B"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Backtests are only available for Persona A and B users"
+        )
+
+    invalid = [m for m in request.model_types if m not in MODEL_PORTFOLIOS]
+    if invalid or (not request.model_types and not request.holdings):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="model_types must contain 'conservative', 'balanced', or 'growth', or holdings must be provided"
+        )
+
+    try:
+        holdings_weights = None
+        if request.holdings:
+            _, ticker_details = calculate_portfolio_value(request.holdings)
+            holdings_weights = {ticker: d["value"] for ticker, d in ticker_details.items()}
+
+        results = backtest_strategies(
+            request.model_types,
+            holdings_weights,
+            time_range=request.time_range,
+            rule=request.rebalance,
+            threshold=request.threshold,
+            initial_value=request.initial_value
+        )
+
+        return fast_response({
+            "time_range": request.time_range,
+            "rebalance": request.rebalance,
+            "results": results
+        })
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error running backtest: {str(e)}"
+        )
+
+
+@router.post("/frontier", response_model=FrontierResponse)
+def get_efficient_frontier(
+    request: FrontierRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Compute the long-only mean-variance efficient frontier.
+
+    The universe is the candidate sector funds plus any holdings provided.
+    Also returns the frontier portfolio nearest each model portfolio's risk
+    level (the historical volatility of its sector-fund mix).
+
+    Available for Persona A and B users.
+    """
+    if current_user.persona not in ("A", "B"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio suggestions are only available for Persona A and B users"
+        )
+
+    try:
+        tickers = [h.ticker for h in request.holdings or []]
+        return fast_response(compute_frontier(tickers, request.time_range, request.num_points))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing efficient frontier: {str(e)}"
+        )
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    responses={200: {
+        "description": "One BatchPortfolioResult JSON object per line, in completion order",
+        "content": {"application/x-ndjson": {"schema": BatchPortfolioResult.model_json_schema()}}
+    }}
+)
+async def analyze_portfolio_batch(
+    batch: BatchPortfolioRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Analyze many portfolios in one request.
+
+    Ticker lookups are deduplicated across all portfolios, and valuation,
+    sector analysis and rebalance planning run in a process pool. Results are
+    streamed back as newline-delimited JSON as each portfolio finishes:
+
+    {"id": "client-1", "analysis": {...}, "recommendations": [...]}
+    {"id": "client-2", "error": "..."}
+
+    Recommendations carry basic reasoning only (no AI calls in bulk mode).
+    """
+    if current_user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Portfolio analysis is only available for Persona B users"
+        )
+
+    if batch.model_type not in ["conservative", "balanced", "growth"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="model_type must be 'conservative', 'balanced', or 'growth'"
+        )
+
+    if not batch.portfolios or len(batch.portfolios) > MAX_BATCH_PORTFOLIOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch must contain between 1 and {MAX_BATCH_PORTFOLIOS} portfolios"
+        )
+
+    async def stream_results():
+        portfolios = [(p.id, p.holdings) for p in batch.portfolios]
+        async for result in analyze_portfolios(portfolios, batch.model_type):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+def _require_persona_b(user: User):
+    """Saved portfolios are a Persona B feature."""
+    if user.persona != "B":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Saved portfolios are only available for Persona B users"
+        )
+
+
+def _saved_portfolio_response(portfolio) -> SavedPortfolioResponse:
+    """Build the API response for a stored portfolio."""
+    analysis = portfolio_analysis(portfolio)
+    return SavedPortfolioResponse(
+        id=portfolio.id,
+        name=portfolio.name,
+        model_type=portfolio.model_type,
+        holdings=portfolio_holdings(portfolio),
+        analysis=PortfolioAnalysis(
+            total_value=analysis["total_value"],
+            sectors=[SectorAllocation(**s) for s in analysis["sectors"]],
+            concentrated_sectors=analysis["concentrated_sectors"],
+            diversification_score=analysis["diversification_score"]
+        ),
+        drift=portfolio.drift,
+        drift_flagged=bool(portfolio.drift_flagged),
+        drift_checked_at=portfolio.drift_checked_at,
+        updated_at=portfolio.updated_at
+    )
+
+
+@router.post("/saved", response_model=SavedPortfolioResponse, status_code=status.HTTP_201_CREATED)
+def save_portfolio(
+    portfolio_data: SavedPortfolioCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Store a portfolio so later changes can be applied as deltas.
+
+    Returns the stored holdings together with the current analysis.
+    """
+    _require_persona_b(current_user)
+
+    try:
+        portfolio = create_portfolio(
+            db,
+            current_user,
+            portfolio_data.holdings,
+            name=portfolio_data.name,
+            model_type=portfolio_data.model_type
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return _saved_portfolio_response(portfolio)
+
+
+@router.get("/saved", response_model=List[SavedPortfolioSummary])
+def list_saved_portfolios(
+    flagged_only: bool = Query(False, description="Only return portfolios flagged by the drift monitor"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List the current user's stored portfolios.
+
+    Drift fields are filled in by the background drift monitor.
+    """
+    _require_persona_b(current_user)
+
+    return [
+        SavedPortfolioSummary(
+            id=p.id,
+            name=p.name,
+            model_type=p.model_type,
+            total_value=round(p.total_value, 2),
+            holdings_count=len(p.holdings),
+            drift=p.drift,
+            drift_flagged=bool(p.drift_flagged),
+            drift_checked_at=p.drift_checked_at,
+            updated_at=p.updated_at
+        )
+        for p in current_user.portfolios
+        if p.drift_flagged or not flagged_only
+    ]
+
+
+@router.get("/saved/{portfolio_id}", response_model=SavedPortfolioResponse)
+def get_saved_portfolio(
+    portfolio_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a stored portfolio and its analysis."""
+    _require_persona_b(current_user)
+
+    portfolio = get_user_portfolio(db, current_user, portfolio_id)
+    if not portfolio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Portfolio not found"
+        )
+
+    return _saved_portfolio_response(portfolio)
+
+
+@router.post("/saved/{portfolio_id}/holdings", response_model=SavedPortfolioResponse)
+def update_saved_portfolio_holdings(
+    portfolio_id: int,
+    delta_request: HoldingDeltaRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply holding changes to a stored portfolio.
+
+    Accepts:
+    {
+        "deltas": [
+            {"ticker": "NVDA", "action": "add", "shares": 10, "purchase_price": 450.00},
+            {"ticker": "AAPL", "action": "set", "shares": 80},
+            {"ticker": "SPY", "action": "remove"}
+        ]
+    }
+
+    Only the changed holdings are revalued and only their sectors are re-aggregated.
+    """
+    _require_persona_b(current_user)
+
+    portfolio = get_user_portfolio(db, current_user, portfolio_id)
+    if not portfolio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Portfolio not found"
+        )
+
+    try:
+        portfolio = apply_holding_deltas(db, portfolio, delta_request.deltas)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return _saved_portfolio_response(portfolio)
+
+
+@router.get("/saved/{portfolio_id}/performance", response_model=PortfolioPerformanceResponse)
+def get_saved_portfolio_performance(
+    portfolio_id: int,
+    time_range: str = Query("1y", pattern="^(1y|3y|5y|10y)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the historical value and return series for a stored portfolio's holdings."""
+    _require_persona_b(current_user)
+
+    portfolio = get_user_portfolio(db, current_user, portfolio_id)
+    if not portfolio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Portfolio not found"
+        )
+
+    try:
+        return fast_response(calculate_performance(aggregate_shares(portfolio.holdings), time_range))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/saved/{portfolio_id}/what-if", response_model=WhatIfResponse)
+def what_if_saved_portfolio(
+    portfolio_id: int,
+    what_if: WhatIfRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Preview hypothetical trades against a stored portfolio without saving them.
+
+    Accepts:
+    {
+        "scenarios": [
+            {"name": "Trim tech", "trades": [{"ticker": "AAPL", "action": "sell", "shares": 20}]},
+            {"trades": [{"ticker": "XLV", "action": "buy", "shares": 15, "price": 140.0}]}
+        ]
+    }
+
+    Each scenario is applied independently to the stored sector totals, so the
+    cost depends on the number of trades rather than the number of holdings.
+    """
+    _require_persona_b(current_user)
+
+    portfolio = get_user_portfolio(db, current_user, portfolio_id)
+    if not portfolio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Portfolio not found"
+        )
+
+    try:
+        return fast_response(simulate_scenarios(db, portfolio, what_if.scenarios))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.delete("/saved/{portfolio_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_saved_portfolio(
+    portfolio_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete a stored portfolio."""
+    _require_persona_b(current_user)
+
+    portfolio = get_user_portfolio(db, current_user, portfolio_id)
+    if not portfolio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Portfolio not found"
+        )
+
+    db.delete(portfolio)
+    db.commit()
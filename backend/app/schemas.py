@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
@@ -88,6 +88,371 @@ class RebalanceResponse(BaseModel):
     target_allocation: list[SectorAllocation]
     recommendations: list[RebalanceRecommendation]
 
+    class Config:
+        protected_namespaces = ()  # Allow model_* field names
+
+
+class RebalanceComparisonResponse(BaseModel):
+    current_allocation: list[SectorAllocation]
+    plans: list[RebalanceResponse]  # One plan per model portfolio
+
+
+# Risk Analytics Schemas (Persona B)
+class HoldingRisk(BaseModel):
+    ticker: str
+    weight: float  # Percent of portfolio value
+    volatility: float  # Annualized, percent
+    beta: float
+    risk_contribution: float  # Percent of portfolio variance
+
+
+class PortfolioRiskResponse(BaseModel):
+    time_range: str
+    confidence: float
+    observations: int
+    volatility: float  # Annualized, percent
+    expected_return: float  # Annualized historical mean, percent
+    beta: float  # vs SPY
+    var_historical_pct: float  # One-period loss at the confidence level
+    var_historical_amount: float
+    var_parametric_pct: float
+    var_parametric_amount: float
+    holdings: list[HoldingRisk]
+
+
+# Correlation Schemas (Persona B)
+class CorrelatedPair(BaseModel):
+    symbols: list[str]
+    correlation: float
+
+
+class CorrelationCluster(BaseModel):
+    symbols: list[str]
+    combined_weight: float  # Percent of portfolio value
+    average_correlation: float  # Mean pairwise correlation within the cluster
+    concentrated: bool  # Combined weight above the sector concentration threshold
+
+
+class CorrelationResponse(BaseModel):
+    time_range: str
+    threshold: float
+    symbols: list[str]
+    matrix: Optional[list[list[float]]] = None  # Row/column order follows symbols
+    correlated_pairs: list[CorrelatedPair]  # Strongest first
+    clusters: list[CorrelationCluster]  # Largest first
+
+
+# Performance Schemas (Persona B)
+class PerformancePoint(BaseModel):
+    date: str
+    value: float
+    period_return: float  # Percent change from the previous point
+    cumulative_return: float  # Percent change from the first point
+
+
+class PortfolioPerformanceResponse(BaseModel):
+    portfolio_hash: str
+    time_range: str
+    granularity: str  # "weekly" or "monthly"
+    symbols: list[str]
+    start_value: float
+    end_value: float
+    total_return: float  # Percent
+    series: list[PerformancePoint]
+
+
+# Projection Schemas (Personas A and B)
+class ProjectionRequest(BaseModel):
+    holdings: list[PortfolioHolding]
+    years: int = Field(10, ge=1, le=30)
+    num_paths: int = Field(20000, ge=100, le=100000)
+    time_range: str = Field("5y", pattern="^(1y|3y|5y|10y)$")  # History used for estimates
+    seed: Optional[int] = None  # Fix for reproducible results
+    parallel: bool = False  # Shard paths across the process pool
+    latency_budget_ms: float = Field(2000, gt=0, le=30000)
+
+
+class ProjectionBand(BaseModel):
+    year: int
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+
+
+class ProjectionResponse(BaseModel):
+    initial_value: float
+    years: int
+    time_range: str
+    seed: Optional[int] = None
+    paths_requested: int
+    paths_simulated: int  # Lower than requested if the latency budget ran out
+    elapsed_ms: float
+    probability_of_loss: float  # Share of paths ending below today's value
+    bands: list[ProjectionBand]
+
+
+# Backtest Schemas (Personas A and B)
+class BacktestRequest(BaseModel):
+    model_types: list[str] = ["conservative", "balanced", "growth"]
+    holdings: Optional[list[PortfolioHolding]] = None  # Also backtest these at current weights
+    time_range: str = Field("5y", pattern="^(1y|3y|5y|10y)$")
+    rebalance: str = Field("quarterly", pattern="^(none|monthly|quarterly|threshold)$")
+    threshold: float = Field(5.0, gt=0, le=50)  # Drift trigger (percentage points) for "threshold"
+    initial_value: float = Field(10000.0, gt=0)
+
+    class Config:
+        protected_namespaces = ()  # Allow model_* field names
+
+
+class BacktestPoint(BaseModel):
+    date: str
+    value: float
+    drawdown: float  # Percent below running peak
+
+
+class BacktestResult(BaseModel):
+    strategy: str  # Model type or "current"
+    symbols: list[str]
+    total_return: float  # Percent
+    annualized_return: float  # Percent
+    volatility: float  # Annualized, percent
+    max_drawdown: float  # Percent (negative)
+    turnover: float  # Total one-way turnover, percent of portfolio
+    rebalances: int
+    equity_curve: list[BacktestPoint]
+
+
+class BacktestResponse(BaseModel):
+    time_range: str
+    rebalance: str
+    results: list[BacktestResult]
+
+
+# Efficient Frontier Schemas (Personas A and B)
+class FrontierRequest(BaseModel):
+    holdings: Optional[list[PortfolioHolding]] = None  # Added to the candidate sector funds
+    time_range: str = Field("5y", pattern="^(1y|3y|5y|10y)$")
+    num_points: int = Field(25, ge=5, le=100)
+
+
+class FrontierPoint(BaseModel):
+    expected_return: float  # Annualized, percent
+    volatility: float  # Annualized, percent
+    weights: dict[str, float]  # Symbol -> percent of portfolio
+
+
+class FrontierSuggestion(BaseModel):
+    model_type: str
+    target_volatility: float  # Volatility of the model's sector-fund mix, percent
+    model_expected_return: float  # Annualized, percent
+    portfolio: FrontierPoint  # Frontier portfolio nearest the target volatility
+
+    class Config:
+        protected_namespaces = ()  # Allow model_* field names
+
+
+class FrontierResponse(BaseModel):
+    time_range: str
+    symbols: list[str]
+    frontier: list[FrontierPoint]  # Lowest risk first
+    suggestions: list[FrontierSuggestion]
+
+
+# Batch Analysis Schemas (Persona B / advisors)
+class BatchPortfolio(BaseModel):
+    id: str
+    holdings: list[PortfolioHolding]
+
+
+class BatchPortfolioRequest(BaseModel):
+    portfolios: list[BatchPortfolio]
+    model_type: str = "balanced"  # "conservative", "balanced", "growth"
+
+    class Config:
+        protected_namespaces = ()  # Allow model_* field names
+
+
+class BatchPortfolioResult(BaseModel):
+    id: str
+    analysis: Optional[PortfolioAnalysis] = None
+    recommendations: list[RebalanceRecommendation] = []
+    error: Optional[str] = None
+
+
+# Saved Portfolio Schemas (Persona B)
+class SavedPortfolioCreate(BaseModel):
+    name: str = "My Portfolio"
+    model_type: str = "balanced"  # "conservative", "balanced", "growth"
+    holdings: list[PortfolioHolding]
+
+    class Config:
+        protected_namespaces = ()  # Allow model_* field names
+
+
+class HoldingDelta(BaseModel):
+    ticker: str
+    action: str  # "add", "remove", or "set"
+    shares: Optional[float] = None  # Required for "add"/"set"; omit on "remove" to drop the whole position
+    purchase_price: Optional[float] = None  # Required when adding a new ticker
+
+
+class HoldingDeltaRequest(BaseModel):
+    deltas: list[HoldingDelta]
+
+
+class SavedPortfolioResponse(BaseModel):
+    id: int
+    name: str
+    model_type: str
+    holdings: list[PortfolioHolding]
+    analysis: PortfolioAnalysis
+    drift: Optional[float] = None
+    drift_flagged: bool = False
+    drift_checked_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        protected_namespaces = ()  # Allow model_* field names
+
+
+class SavedPortfolioSummary(BaseModel):
+    id: int
+    name: str
+    model_type: str
+    total_value: float
+    holdings_count: int
+    drift: Optional[float] = None
+    drift_flagged: bool = False
+    drift_checked_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        protected_namespaces = ()  # Allow model_* field names
+
+
+# What-if Schemas (Persona B)
+class WhatIfTrade(BaseModel):
+    ticker: str
+    action: str  # "buy" or "sell"
+    shares: float = Field(..., gt=0)
+    price: Optional[float] = Field(None, gt=0)  # Defaults to the stored price, or the latest quote for new tickers
+
+
+class WhatIfScenario(BaseModel):
+    name: Optional[str] = None
+    trades: list[WhatIfTrade]
+
+
+class WhatIfRequest(BaseModel):
+    scenarios: list[WhatIfScenario] = Field(..., min_length=1, max_length=100)
+
+
+class WhatIfResult(BaseModel):
+    name: Optional[str] = None
+    analysis: PortfolioAnalysis
+    herfindahl: float  # Sum of squared sector weights (0-1)
+    diversification_change: float  # vs the stored portfolio
+    newly_concentrated: list[str]  # Sectors that cross the concentration threshold
+
+
+class WhatIfResponse(BaseModel):
+    portfolio_id: int
+    base: PortfolioAnalysis
+    base_herfindahl: float
+    scenarios: list[WhatIfResult]
+
+
+# AI Reasoning Cache Schemas
+class PromptCacheUsage(BaseModel):
+    calls: int
+    input_tokens: int  # Uncached input tokens
+    cache_read_input_tokens: int
+    cache_creation_input_tokens: int
+    output_tokens: int
+    cached_input_ratio: float  # Cache reads / all input tokens (0-1)
+
+
+class ReasoningCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    hit_rate: float  # Hits / lookups (0-1)
+    disk_enabled: bool
+    precomputed_shapes: int  # Recommendation shapes with precomputed reasoning
+    precomputed_hits: int
+    prompt_cache: PromptCacheUsage
+
+
+class LLMRouteStats(BaseModel):
+    route: str  # simple, medium or complex
+    model: str
+    max_tokens: int  # Output budget per recommendation
+    calls: int
+    failures: int
+    latency_ms_p50: Optional[float] = None
+    latency_ms_p95: Optional[float] = None
+    latency_ms_mean: Optional[float] = None
+
+
+class LatencySummary(BaseModel):
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+
+
+class LatencyBucket(BaseModel):
+    le_ms: Optional[int] = None  # Upper bound; None for the overflow bucket
+    count: int
+
+
+class LLMTelemetryGroup(BaseModel):
+    feature: str  # rebalance, rebalance_stream, precompute, rag
+    model: Optional[str] = None  # None for requests answered without a call
+    requests: int
+    outcomes: dict[str, int]  # success, error, timeout, cancelled
+    cache: dict[str, int]  # miss, hit, precomputed
+    input_tokens: int
+    output_tokens: int
+    cache_read_input_tokens: int
+    cache_creation_input_tokens: int
+    cost_usd: float
+    latency_ms: LatencySummary
+    latency_histogram: list[LatencyBucket]
+
+
+class LLMTelemetryResponse(BaseModel):
+    window_seconds: float
+    total_requests: int
+    total_cost_usd: float
+    groups: list[LLMTelemetryGroup]  # Slowest (p95) first
+    circuit_breaker: dict[str, str | int]  # state, consecutive_failures, times_opened
+
+
+# Job Schemas
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, succeeded, failed, cancelled
+    progress_completed: int
+    progress_total: int
+    partial_result: Optional[dict] = None  # Available while running
+    result: Optional[dict] = None  # Set once succeeded
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 
 # Market Data Schemas
 class TickerSearch(BaseModel):
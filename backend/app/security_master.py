@@ -0,0 +1,327 @@
+"""
+Local security master for sector classification.
+
+Keeps a compact in-memory table of symbol -> normalized GICS sector weights:
+single stocks map to one sector with weight 1.0, while ETFs carry the sector
+weights of their constituents (look-through), so broad funds such as SPY or
+VTI spread across real sectors instead of a catch-all "Index Fund" bucket.
+
+The table is seeded with common symbols and refreshed periodically in the
+background from market data. Sector allocation is a sparse matrix-vector
+product of position values and sector weights, with no network call on the
+hot path; a symbol seen for the first time is resolved once and then served
+locally.
+"""
+
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional
+import os
+import logging
+
+import numpy as np
+
+from .background import PeriodicTask
+from .market_data import get_ticker_overview, get_etf_profile
+from .rebalance_solver import SECTOR_FUNDS
+
+logger = logging.getLogger(__name__)
+
+GICS_SECTORS = list(SECTOR_FUNDS.keys())
+UNKNOWN_SECTOR = "Unknown"
+# Label for positions spread over several sectors (broad ETFs); never used as an allocation bucket
+DIVERSIFIED_SECTOR = "Diversified"
+
+SECURITY_MASTER_TTL = timedelta(hours=24)
+SECURITY_MASTER_REFRESH_SECONDS = float(os.getenv("SECURITY_MASTER_REFRESH_SECONDS", "86400"))  # 0 disables
+
+# Provider sector names (lower-cased) -> GICS sector
+SECTOR_ALIASES = {
+    "technology": "Technology",
+    "information technology": "Technology",
+    "healthcare": "Healthcare",
+    "health care": "Healthcare",
+    "life sciences": "Healthcare",
+    "financials": "Financials",
+    "financial": "Financials",
+    "financial services": "Financials",
+    "finance": "Financials",
+    "consumer discretionary": "Consumer Discretionary",
+    "consumer cyclical": "Consumer Discretionary",
+    "trade & services": "Consumer Discretionary",
+    "consumer staples": "Consumer Staples",
+    "consumer defensive": "Consumer Staples",
+    "industrials": "Industrials",
+    "industrial": "Industrials",
+    "manufacturing": "Industrials",
+    "materials": "Materials",
+    "basic materials": "Materials",
+    "energy": "Energy",
+    "energy & transportation": "Energy",
+    "utilities": "Utilities",
+    "real estate": "Real Estate",
+    "real estate & construction": "Real Estate",
+    "communication services": "Communication Services",
+    "communication": "Communication Services",
+    "telecommunication services": "Communication Services",
+    "telecommunications": "Communication Services"
+}
+
+# Seed classification for common single stocks
+SEED_SECTORS = {
+    "AAPL": "Technology", "MSFT": "Technology", "NVDA": "Technology", "INTC": "Technology",
+    "AMD": "Technology", "AVGO": "Technology", "ORCL": "Technology", "CRM": "Technology",
+    "ADBE": "Technology", "CSCO": "Technology",
+    "GOOGL": "Communication Services", "GOOG": "Communication Services", "META": "Communication Services",
+    "NFLX": "Communication Services", "DIS": "Communication Services", "VZ": "Communication Services",
+    "T": "Communication Services",
+    "AMZN": "Consumer Discretionary", "TSLA": "Consumer Discretionary", "HD": "Consumer Discretionary",
+    "MCD": "Consumer Discretionary", "NKE": "Consumer Discretionary", "SBUX": "Consumer Discretionary",
+    "LLY": "Healthcare", "JNJ": "Healthcare", "UNH": "Healthcare", "PFE": "Healthcare",
+    "MRK": "Healthcare", "ABBV": "Healthcare",
+    "JPM": "Financials", "BAC": "Financials", "WFC": "Financials", "GS": "Financials",
+    "V": "Financials", "MA": "Financials", "BRK.B": "Financials",
+    "PG": "Consumer Staples", "KO": "Consumer Staples", "PEP": "Consumer Staples",
+    "WMT": "Consumer Staples", "COST": "Consumer Staples",
+    "CAT": "Industrials", "BA": "Industrials", "GE": "Industrials", "HON": "Industrials", "UPS": "Industrials",
+    "XOM": "Energy", "CVX": "Energy", "COP": "Energy",
+    "LIN": "Materials", "NEM": "Materials",
+    "NEE": "Utilities", "DUK": "Utilities", "SO": "Utilities",
+    "AMT": "Real Estate", "PLD": "Real Estate", "O": "Real Estate"
+}
+
+_SP500_WEIGHTS = {
+    "Technology": 31.7, "Financials": 13.0, "Healthcare": 11.6, "Consumer Discretionary": 10.1,
+    "Communication Services": 9.0, "Industrials": 8.3, "Consumer Staples": 5.8, "Energy": 3.4,
+    "Utilities": 2.4, "Real Estate": 2.2, "Materials": 2.0
+}
+
+# Seed look-through weights for broad ETFs (approximate; replaced on refresh when available)
+SEED_FUND_WEIGHTS = {
+    "SPY": _SP500_WEIGHTS,
+    "VOO": _SP500_WEIGHTS,
+    "IVV": _SP500_WEIGHTS,
+    "VTI": {
+        "Technology": 30.5, "Financials": 13.4, "Healthcare": 11.8, "Consumer Discretionary": 10.6,
+        "Industrials": 9.5, "Communication Services": 8.5, "Consumer Staples": 5.3, "Energy": 3.5,
+        "Real Estate": 2.9, "Utilities": 2.4, "Materials": 2.4
+    },
+    "QQQ": {
+        "Technology": 50.0, "Communication Services": 16.0, "Consumer Discretionary": 14.0,
+        "Healthcare": 6.0, "Consumer Staples": 6.0, "Industrials": 4.5, "Utilities": 1.5,
+        "Materials": 1.3, "Energy": 0.5, "Financials": 0.2
+    },
+    "DIA": {
+        "Financials": 23.0, "Technology": 19.0, "Healthcare": 17.0, "Industrials": 15.0,
+        "Consumer Discretionary": 14.0, "Consumer Staples": 6.0, "Communication Services": 3.0,
+        "Energy": 2.0, "Materials": 1.0
+    },
+    **{fund: {sector: 100.0} for sector, fund in SECTOR_FUNDS.items()}
+}
+
+# symbol -> (sector weights summing to 1, refreshed_at)
+_securities: Dict[str, tuple] = {}
+_securities_lock = Lock()
+
+_refresher: Optional[PeriodicTask] = None
+
+
+def normalize_sector(name: Optional[str]) -> str:
+    """
+    Map a provider sector name onto a GICS sector.
+
+    Args:
+        name: Raw sector name (e.g. "TECHNOLOGY", "Health Care", "Consumer Cyclical")
+
+    Returns:
+        GICS sector name, or "Unknown" if it cannot be mapped
+    """
+    if not name:
+        return UNKNOWN_SECTOR
+    cleaned = name.strip()
+    if cleaned in GICS_SECTORS:
+        return cleaned
+    return SECTOR_ALIASES.get(cleaned.lower(), UNKNOWN_SECTOR)
+
+
+def get_sector_weights(symbol: str) -> Dict[str, float]:
+    """
+    Get the sector weights of a symbol from the security master.
+
+    Args:
+        symbol: Ticker symbol
+
+    Returns:
+        Mapping of GICS sector (or "Unknown") to weight, summing to 1
+    """
+    symbol = symbol.strip().upper()
+    with _securities_lock:
+        entry = _securities.get(symbol)
+    if entry is not None:
+        return entry[0]
+
+    # First sighting: resolve once, then serve locally
+    weights = _resolve_sector_weights(symbol)
+    with _securities_lock:
+        _securities[symbol] = (weights, datetime.utcnow())
+    return weights
+
+
+def get_sector_weights_batch(symbols: List[str]) -> Dict[str, Dict[str, float]]:
+    """Sector weights for several symbols, keyed by upper-cased symbol."""
+    return {symbol.upper(): get_sector_weights(symbol) for symbol in set(symbols)}
+
+
+def primary_sector(sector_weights: Dict[str, float]) -> str:
+    """
+    Single sector label for a position.
+
+    Args:
+        sector_weights: Mapping of sector to weight
+
+    Returns:
+        The sector for single-sector securities, "Diversified" otherwise
+    """
+    if len(sector_weights) == 1:
+        return next(iter(sector_weights))
+    return DIVERSIFIED_SECTOR if sector_weights else UNKNOWN_SECTOR
+
+
+def sector_exposure(values: np.ndarray, sector_weights: List[Dict[str, float]], sectors: List[str]) -> np.ndarray:
+    """
+    Sector exposure of a set of positions as a sparse matrix-vector product.
+
+    The (positions x sectors) weight matrix is held in coordinate form, so the
+    cost is proportional to the number of non-zero weights.
+
+    Args:
+        values: (N,) market value of each position
+        sector_weights: Sector weights of each position, in the same order
+        sectors: Sector order of the result; every weighted sector must appear
+
+    Returns:
+        (S,) value exposed to each sector
+    """
+    sector_ids = {sector: i for i, sector in enumerate(sectors)}
+    rows, cols, data = [], [], []
+    for row, weights in enumerate(sector_weights):
+        for sector, weight in weights.items():
+            rows.append(row)
+            cols.append(sector_ids[sector])
+            data.append(weight)
+
+    values = np.asarray(values, dtype=float)
+    contributions = values[np.array(rows, dtype=np.intp)] * np.array(data, dtype=float)
+    return np.bincount(np.array(cols, dtype=np.intp), weights=contributions, minlength=len(sectors))
+
+
+def refresh_security_master(max_age: timedelta = SECURITY_MASTER_TTL) -> int:
+    """
+    Re-resolve entries older than max_age from market data.
+
+    Entries are only replaced when the provider returns a classification.
+
+    Args:
+        max_age: Refresh entries resolved longer ago than this
+
+    Returns:
+        Number of entries updated
+    """
+    now = datetime.utcnow()
+    with _securities_lock:
+        stale = [
+            symbol for symbol, (_, refreshed_at) in _securities.items()
+            if now - refreshed_at >= max_age
+        ]
+
+    updated = 0
+    for symbol in stale:
+        weights = _resolve_sector_weights(symbol, use_seed=False)
+        if weights is None:
+            continue
+        with _securities_lock:
+            _securities[symbol] = (weights, datetime.utcnow())
+        updated += 1
+
+    if updated:
+        logger.info(f"Security master refreshed {updated}/{len(stale)} symbols")
+    return updated
+
+
+def start_security_master_refresh():
+    """Start the periodic refresh unless disabled by configuration."""
+    global _refresher
+    if SECURITY_MASTER_REFRESH_SECONDS <= 0:
+        return
+    if _refresher is None:
+        _refresher = PeriodicTask("security-master-refresh", refresh_security_master, SECURITY_MASTER_REFRESH_SECONDS)
+    _refresher.start()
+
+
+def stop_security_master_refresh():
+    """Stop the periodic refresh if it is running."""
+    if _refresher is not None:
+        _refresher.stop()
+
+
+def reset_security_master():
+    """Reset the table to its seed data. Useful for testing."""
+    # Seed entries count as fresh so startup does not trigger a burst of lookups
+    seeded_at = datetime.utcnow()
+    with _securities_lock:
+        _securities.clear()
+        for symbol, sector in SEED_SECTORS.items():
+            _securities[symbol] = ({sector: 1.0}, seeded_at)
+        for symbol, weights in SEED_FUND_WEIGHTS.items():
+            _securities[symbol] = (_normalize_weights(weights), seeded_at)
+
+
+def _resolve_sector_weights(symbol: str, use_seed: bool = True) -> Optional[Dict[str, float]]:
+    """
+    Classify a symbol from market data.
+
+    Single stocks use the overview sector; funds (known multi-sector entries,
+    or symbols the overview cannot classify) are looked through via their ETF
+    profile. Falls back to seed data, then "Unknown", unless use_seed is
+    False, in which case None is returned when nothing resolves.
+    """
+    with _securities_lock:
+        entry = _securities.get(symbol)
+    is_fund = symbol in SEED_FUND_WEIGHTS or (entry is not None and len(entry[0]) > 1)
+
+    if not is_fund:
+        overview = get_ticker_overview(symbol)
+        sector = normalize_sector(overview.get("sector") if overview else None)
+        if sector != UNKNOWN_SECTOR:
+            return {sector: 1.0}
+
+    profile = get_etf_profile(symbol)
+    if profile and profile.get("sector_weights"):
+        weights = _normalize_weights(profile["sector_weights"])
+        if weights:
+            return weights
+
+    if not use_seed:
+        return None
+    if symbol in SEED_FUND_WEIGHTS:
+        return _normalize_weights(SEED_FUND_WEIGHTS[symbol])
+    if symbol in SEED_SECTORS:
+        return {SEED_SECTORS[symbol]: 1.0}
+    return {UNKNOWN_SECTOR: 1.0}
+
+
+def _normalize_weights(raw: Dict[str, float]) -> Dict[str, float]:
+    """Merge raw sector names onto GICS sectors and scale weights to sum to 1."""
+    merged: Dict[str, float] = {}
+    for name, weight in raw.items():
+        if weight > 0:
+            sector = normalize_sector(name)
+            merged[sector] = merged.get(sector, 0.0) + float(weight)
+
+    total = sum(merged.values())
+    if total <= 0:
+        return {}
+    return {sector: weight / total for sector, weight in merged.items()}
+
+
+reset_security_master()
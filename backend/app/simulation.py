@@ -0,0 +1,172 @@
+"""
+Monte Carlo projection of portfolio outcomes for Personas A and B.
+
+Holdings are simulated as correlated log-normal assets using the mean and
+covariance estimated from cached historical series (see risk.py). Paths are
+generated in fixed-size chunks of batched NumPy draws; each chunk has its own
+child seed, so results for a given seed are identical whether chunks run in
+this process or are sharded across the shared process pool. Chunks stop being
+scheduled once the latency budget is spent.
+"""
+
+from concurrent.futures import wait
+from typing import Dict, List, Optional
+import time
+import logging
+
+import numpy as np
+
+from .process_pool import get_process_pool
+from .risk import get_return_statistics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NUM_PATHS = 20000
+DEFAULT_YEARS = 10
+DEFAULT_LATENCY_BUDGET_MS = 2000
+PATH_CHUNK_SIZE = 5000
+STEPS_PER_YEAR = 12  # Monthly simulation steps
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def simulate_chunk(
+    initial_values: np.ndarray,
+    log_mean: np.ndarray,
+    chol: np.ndarray,
+    years: int,
+    num_paths: int,
+    seed_sequence: np.random.SeedSequence
+) -> np.ndarray:
+    """
+    Simulate one chunk of buy-and-hold portfolio paths.
+
+    Args:
+        initial_values: (N,) starting value of each holding
+        log_mean: (N,) mean monthly log return of each holding
+        chol: (N, N) Cholesky factor of the monthly log-return covariance
+        years: Projection horizon in years
+        num_paths: Number of paths in this chunk
+        seed_sequence: Seed for this chunk
+
+    Returns:
+        (num_paths, years + 1) portfolio value at each year end (column 0 = today)
+    """
+    rng = np.random.default_rng(seed_sequence)
+    values = np.broadcast_to(initial_values, (num_paths, initial_values.shape[0])).copy()
+    totals = np.empty((num_paths, years + 1))
+    totals[:, 0] = values.sum(axis=1)
+
+    for year in range(1, years + 1):
+        for _ in range(STEPS_PER_YEAR):
+            # Correlated monthly log returns for every path at once: (paths, holdings)
+            shocks = rng.standard_normal(values.shape) @ chol.T
+            values *= np.exp(shocks + log_mean)
+        totals[:, year] = values.sum(axis=1)
+
+    return totals
+
+
+def project_portfolio(
+    position_values: Dict[str, float],
+    years: int = DEFAULT_YEARS,
+    num_paths: int = DEFAULT_NUM_PATHS,
+    time_range: str = "5y",
+    seed: Optional[int] = None,
+    parallel: bool = False,
+    latency_budget_ms: float = DEFAULT_LATENCY_BUDGET_MS
+) -> Dict:
+    """
+    Project portfolio value with a correlated Monte Carlo simulation.
+
+    Args:
+        position_values: Mapping of ticker to current market value
+        years: Projection horizon in years
+        num_paths: Number of simulated paths requested
+        time_range: History window used to estimate returns and covariance
+        seed: Fixed seed for reproducible results (random if None)
+        parallel: Shard chunks across the shared process pool instead of running in-process
+        latency_budget_ms: Stop scheduling new chunks after this much time
+
+    Returns:
+        Dict with percentile bands per year and simulation metadata
+    """
+    start = time.perf_counter()
+    deadline = start + latency_budget_ms / 1000
+
+    tickers = [t.upper() for t in position_values]
+    initial_values = np.array([position_values[t] for t in position_values], dtype=float)
+    initial_value = float(initial_values.sum())
+    if initial_value <= 0:
+        raise ValueError("Portfolio has no value")
+
+    stats = get_return_statistics(tickers, time_range)
+    index = np.array([stats["symbols"].index(t) for t in tickers])
+    periods_per_step = stats["periods_per_year"] / STEPS_PER_YEAR
+
+    # Rescale periodic simple-return moments to monthly log-return moments
+    cov = stats["cov"][np.ix_(index, index)] * periods_per_step
+    log_mean = stats["mean"][index] * periods_per_step - np.diag(cov) / 2
+    chol = _safe_cholesky(cov)
+
+    chunk_sizes = [PATH_CHUNK_SIZE] * (num_paths // PATH_CHUNK_SIZE)
+    if num_paths % PATH_CHUNK_SIZE:
+        chunk_sizes.append(num_paths % PATH_CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    results: List[np.ndarray] = []
+    if parallel and len(chunk_sizes) > 1:
+        pool = get_process_pool()
+        futures = [
+            pool.submit(simulate_chunk, initial_values, log_mean, chol, years, size, child)
+            for size, child in zip(chunk_sizes, seeds)
+        ]
+        done, not_done = wait(futures, timeout=max(deadline - time.perf_counter(), 0))
+        for future in not_done:
+            future.cancel()
+        # Keep submission order so a seed reproduces the same paths when nothing times out
+        results = [f.result() for f in futures if f in done]
+        if not results:
+            # Always return something: wait for the first chunk past the budget
+            results = [futures[0].result()]
+    else:
+        for size, child in zip(chunk_sizes, seeds):
+            results.append(simulate_chunk(initial_values, log_mean, chol, years, size, child))
+            if time.perf_counter() >= deadline:
+                break
+
+    totals = np.vstack(results)
+    bands = np.percentile(totals, PERCENTILES, axis=0)  # (len(PERCENTILES), years + 1)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if totals.shape[0] < num_paths:
+        logger.info(f"Projection hit latency budget: {totals.shape[0]}/{num_paths} paths in {elapsed_ms:.0f}ms")
+
+    return {
+        "initial_value": round(initial_value, 2),
+        "years": years,
+        "time_range": time_range,
+        "seed": seed,
+        "paths_requested": num_paths,
+        "paths_simulated": int(totals.shape[0]),
+        "elapsed_ms": round(elapsed_ms, 1),
+        "probability_of_loss": round(float((totals[:, -1] < initial_value).mean()), 4),
+        "bands": [
+            {
+                "year": year,
+                **{f"p{p}": round(float(bands[i, year]), 2) for i, p in enumerate(PERCENTILES)}
+            }
+            for year in range(years + 1)
+        ]
+    }
+
+
+def _safe_cholesky(cov: np.ndarray) -> np.ndarray:
+    """Cholesky factor, nudging the diagonal if the sample covariance is not positive definite."""
+    jitter = 0.0
+    scale = max(float(np.mean(np.diag(cov))), 1e-12)
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + np.eye(cov.shape[0]) * jitter)
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-6 if jitter == 0 else jitter * 10
+    raise ValueError("Covariance matrix is not positive definite")
@@ -0,0 +1,141 @@
+"""
+What-if trade simulation on stored portfolios (Persona B).
+
+Starts from a stored portfolio's running sector totals and applies
+hypothetical trades without touching the database. Each trade only adjusts
+the sectors its ticker is exposed to, along with the running sum of squared
+sector values (the Herfindahl numerator) and the count of non-empty sectors,
+so a scenario costs O(trades) regardless of how many holdings the portfolio
+has. Only the traded tickers are loaded from the database.
+"""
+
+from typing import Dict, List
+import logging
+
+from sqlalchemy.orm import Session
+
+from .market_data import get_latest_price
+from .models import Holding, Portfolio
+from .portfolio import build_sector_allocation, detect_concentration_risks, diversification_score_from
+from .schemas import WhatIfScenario
+from .security_master import get_sector_weights
+
+logger = logging.getLogger(__name__)
+
+TRADE_ACTIONS = ("buy", "sell")
+
+# Sector totals below this are treated as empty (matches the stored aggregates)
+_EMPTY_SECTOR_EPSILON = 1e-6
+
+
+def simulate_scenarios(db: Session, portfolio: Portfolio, scenarios: List[WhatIfScenario]) -> Dict:
+    """
+    Apply each scenario's trades to the stored portfolio aggregates.
+
+    Args:
+        db: Database session
+        portfolio: Stored portfolio used as the base
+        scenarios: Independent sets of hypothetical trades
+
+    Returns:
+        Dict matching the WhatIfResponse schema
+
+    Raises:
+        ValueError: If a trade is invalid (unknown action, overselling, no price)
+    """
+    tickers = {trade.ticker.strip().upper() for scenario in scenarios for trade in scenario.trades}
+    held = {
+        h.ticker: h
+        for h in db.query(Holding).filter(Holding.portfolio_id == portfolio.id, Holding.ticker.in_(tickers))
+    }
+
+    base_totals = dict(portfolio.sector_totals or {})
+    base_value = portfolio.total_value or 0.0
+    base_sum_sq = sum(amount * amount for amount in base_totals.values())
+    base = _analysis(base_totals, base_value, base_sum_sq)
+
+    results = []
+    for index, scenario in enumerate(scenarios):
+        name = scenario.name or f"Scenario {index + 1}"
+        totals, total_value, sum_sq = _apply_trades(scenario, name, held, dict(base_totals), base_value, base_sum_sq)
+        analysis = _analysis(totals, total_value, sum_sq)
+        results.append({
+            "name": name,
+            "analysis": analysis,
+            "herfindahl": _herfindahl(sum_sq, total_value),
+            "diversification_change": round(analysis["diversification_score"] - base["diversification_score"], 2),
+            "newly_concentrated": [
+                s for s in analysis["concentrated_sectors"] if s not in base["concentrated_sectors"]
+            ]
+        })
+
+    return {
+        "portfolio_id": portfolio.id,
+        "base": base,
+        "base_herfindahl": _herfindahl(base_sum_sq, base_value),
+        "scenarios": results
+    }
+
+
+def _apply_trades(
+    scenario: WhatIfScenario,
+    name: str,
+    held: Dict[str, Holding],
+    totals: Dict[str, float],
+    total_value: float,
+    sum_sq: float
+):
+    """Apply one scenario's trades, returning (sector_totals, total_value, sum_sq)."""
+    # Shares held per ticker as the scenario progresses (only traded tickers)
+    shares: Dict[str, float] = {}
+
+    for trade in scenario.trades:
+        ticker = trade.ticker.strip().upper()
+        if trade.action not in TRADE_ACTIONS:
+            raise ValueError(f"{name}: invalid action '{trade.action}' for {ticker}; must be 'buy' or 'sell'")
+
+        holding = held.get(ticker)
+        current_shares = shares.get(ticker, holding.shares if holding else 0.0)
+        if trade.action == "sell" and trade.shares > current_shares + 1e-9:
+            raise ValueError(f"{name}: cannot sell {trade.shares:g} shares of {ticker}; only {current_shares:g} held")
+
+        price = trade.price or (holding.current_price if holding else get_latest_price(ticker))
+        if not price:
+            raise ValueError(f"{name}: no price available for {ticker}")
+
+        if holding is not None:
+            weights = holding.sector_weights or {holding.sector: 1.0}
+        else:
+            weights = get_sector_weights(ticker)
+
+        change = trade.shares * price * (1 if trade.action == "buy" else -1)
+        shares[ticker] = current_shares + (trade.shares if trade.action == "buy" else -trade.shares)
+        total_value += change
+
+        for sector, weight in weights.items():
+            old = totals.get(sector, 0.0)
+            new = old + change * weight
+            sum_sq += new * new - old * old
+            if abs(new) < _EMPTY_SECTOR_EPSILON:
+                totals.pop(sector, None)
+            else:
+                totals[sector] = new
+
+    return totals, max(total_value, 0.0), max(sum_sq, 0.0)
+
+
+def _herfindahl(sum_sq: float, total_value: float) -> float:
+    """Herfindahl index (sum of squared sector weights) from the running sum of squares."""
+    return round(sum_sq / (total_value * total_value), 4) if total_value > 0 else 0.0
+
+
+def _analysis(totals: Dict[str, float], total_value: float, sum_sq: float) -> Dict:
+    """PortfolioAnalysis dict; the score uses the running Herfindahl sum instead of re-summing sectors."""
+    sectors = build_sector_allocation(totals, total_value)
+    herfindahl = sum_sq / (total_value * total_value) if total_value > 0 else 0.0
+    return {
+        "total_value": round(total_value, 2),
+        "sectors": sectors,
+        "concentrated_sectors": detect_concentration_risks(sectors),
+        "diversification_score": diversification_score_from(len(totals), herfindahl)
+    }
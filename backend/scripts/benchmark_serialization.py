@@ -0,0 +1,77 @@
+"""
+Measure response serialization cost: response models vs the fast path.
+
+Compares, for the same payload:
+- model: build the pydantic response model, run FastAPI's serialization
+  (jsonable_encoder on the validated model) and encode with json.dumps,
+  as FastAPI does for a route with a response_model
+- fast: encode the internal dicts directly with FastJSONResponse
+
+Usage (from backend/):
+    python -m scripts.benchmark_serialization
+"""
+
+import json
+import random
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from app.market_data import get_historical_data
+from app.portfolio import calculate_portfolio_value, analyze_sector_allocation, plan_rebalancing_all, build_target_allocation
+from app.responses import FastJSONResponse
+from app.schemas import HistoricalDataResponse, PortfolioHolding, RebalanceComparisonResponse
+from app.security_master import SEED_SECTORS
+
+REPEATS = 50
+
+
+def _model_path(model_cls, content):
+    model = model_cls(**content)
+    return json.dumps(jsonable_encoder(model), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _fast_path(content):
+    return FastJSONResponse(content).body
+
+
+def _time(label, model_cls, content):
+    model_ms = timeit.timeit(lambda: _model_path(model_cls, content), number=REPEATS) / REPEATS * 1000
+    fast_ms = timeit.timeit(lambda: _fast_path(content), number=REPEATS) / REPEATS * 1000
+    size_kb = len(_fast_path(content)) / 1024
+    print(f"{label:<40} {size_kb:>8.1f} KB  model {model_ms:>8.2f} ms  fast {fast_ms:>7.2f} ms  ({model_ms / fast_ms:.1f}x)")
+
+
+def main():
+    history = get_historical_data("AAPL", "10y")
+    _time("10y history (1 symbol)", HistoricalDataResponse, history)
+
+    random.seed(0)
+    sectors_pool = list(set(SEED_SECTORS.values()))
+    holdings = [
+        PortfolioHolding(ticker=f"T{i:04d}", shares=random.randint(1, 500), purchase_price=random.uniform(10, 500))
+        for i in range(2000)
+    ]
+    lookup = {h.ticker: {random.choice(sectors_pool): 1.0} for h in holdings}
+
+    total_value, details = calculate_portfolio_value(holdings, lookup)
+    sectors = analyze_sector_allocation(details, total_value)
+    plans = plan_rebalancing_all(details, fund_prices={})
+    comparison = {
+        "current_allocation": sectors,
+        "plans": [
+            {
+                "model_type": model_type,
+                "current_allocation": sectors,
+                "target_allocation": build_target_allocation(model_type, total_value),
+                "recommendations": recommendations
+            }
+            for model_type, recommendations in plans.items()
+        ]
+    }
+    num_recs = sum(len(p["recommendations"]) for p in comparison["plans"])
+    _time(f"rebalance compare ({len(holdings)} holdings, {num_recs} recs)", RebalanceComparisonResponse, comparison)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Local stand-in for the Anthropic Messages API, for load and latency testing.
+
+Serves POST /v1/messages (plain and streaming) and /v1/messages/count_tokens
+with answers shaped like the real API, so LLMService runs its normal code path
+(batched JSON prompts, streaming, prompt-cache usage reporting, retries,
+timeouts and the circuit breaker) without spending quota. Response latency is drawn from a configurable
+distribution, and a configurable share of requests fail with 500 or 429.
+
+Latency specs (milliseconds):
+    fixed:800   uniform:200:1500   normal:800:200   lognormal:800:0.5   exponential:800
+
+Usage (from backend/):
+    python -m scripts.fake_anthropic_server --port 8090 --latency lognormal:1500:0.5 \\
+        --model-latency haiku=lognormal:500:0.4 --error-rate 0.02 --rate-limit-rate 0.05
+
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8090 ANTHROPIC_API_KEY=fake uvicorn app.main:app
+
+The same settings can be given as FAKE_LLM_* environment variables (see
+FakeServerConfig.from_env) when serving `scripts.fake_anthropic_server:app`
+with uvicorn directly. GET /stats reports request counts by outcome.
+"""
+
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TOKENS_PER_WORD = 1.3
+STREAM_CHUNK_WORDS = 4
+FIRST_TOKEN_SHARE = 0.3  # Share of a streamed response's latency spent before the first delta
+FILLER = (
+    "This adjustment moves the portfolio toward its target allocation, reduces concentration "
+    "in the overweight sector and improves diversification while keeping the overall risk "
+    "profile consistent with the selected model strategy over a long investment horizon."
+).split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency sampler for a spec such as "lognormal:800:0.5".
+
+    Args:
+        spec: Distribution name and parameters in milliseconds (lognormal takes the median and sigma)
+
+    Returns:
+        Function drawing a latency in seconds from a random generator
+    """
+    kind, *raw = spec.split(":")
+    args = [float(a) for a in raw]
+    samplers = {
+        "fixed": (1, lambda rng: args[0]),
+        "uniform": (2, lambda rng: rng.uniform(args[0], args[1])),
+        "normal": (2, lambda rng: rng.gauss(args[0], args[1])),
+        "lognormal": (2, lambda rng: rng.lognormvariate(math.log(args[0]), args[1])),
+        "exponential": (1, lambda rng: rng.expovariate(1.0 / args[0]))
+    }
+    if kind not in samplers or len(args) != samplers[kind][0]:
+        raise ValueError(f"Invalid latency spec '{spec}'")
+    sampler = samplers[kind][1]
+    return lambda rng: max(sampler(rng), 0.0) / 1000
+
+
+class FakeServerConfig:
+    """Latency, failure and rate-limit settings for the fake server."""
+
+    def __init__(
+        self,
+        latency: str = "lognormal:800:0.5",
+        model_latency: Optional[Dict[str, str]] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_seconds: float = 1.0,
+        seed: Optional[int] = None
+    ):
+        self.latency = parse_latency(latency)
+        # Model-name substring -> sampler, checked before the default
+        self.model_latency = {name: parse_latency(spec) for name, spec in (model_latency or {}).items()}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeServerConfig":
+        """Settings from FAKE_LLM_LATENCY, FAKE_LLM_MODEL_LATENCY ("haiku=fixed:300,sonnet=..."),
+        FAKE_LLM_ERROR_RATE, FAKE_LLM_RATE_LIMIT_RATE, FAKE_LLM_RETRY_AFTER_SECONDS and FAKE_LLM_SEED."""
+        seed = os.getenv("FAKE_LLM_SEED")
+        return cls(
+            latency=os.getenv("FAKE_LLM_LATENCY", "lognormal:800:0.5"),
+            model_latency=_parse_model_latency(os.getenv("FAKE_LLM_MODEL_LATENCY", "")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0")),
+            retry_after_seconds=float(os.getenv("FAKE_LLM_RETRY_AFTER_SECONDS", "1")),
+            seed=int(seed) if seed else None
+        )
+
+    def sample_latency(self, model: str) -> float:
+        for name, sampler in self.model_latency.items():
+            if name in model:
+                return sampler(self.rng)
+        return self.latency(self.rng)
+
+
+def create_app(config: Optional[FakeServerConfig] = None) -> FastAPI:
+    """Build the fake Messages API app."""
+    config = config or FakeServerConfig.from_env()
+    fake = FastAPI(title="Fake Anthropic Messages API")
+    stats = {"requests": 0, "success": 0, "errors": 0, "rate_limited": 0, "streamed": 0}
+    cached_prefixes = set()
+    lock = Lock()
+
+    def count(name: str):
+        with lock:
+            stats[name] += 1
+
+    @fake.get("/stats")
+    def get_stats():
+        with lock:
+            return dict(stats)
+
+    @fake.post("/v1/messages")
+    async def create_message(request: Request):
+        body = await request.json()
+        count("requests")
+
+        draw = config.rng.random()
+        if draw < config.rate_limit_rate:
+            count("rate_limited")
+            return _error(429, "rate_limit_error", "Fake rate limit", {"retry-after": str(config.retry_after_seconds)})
+        if draw < config.rate_limit_rate + config.error_rate:
+            await asyncio.sleep(config.sample_latency(body["model"]) * config.rng.random())
+            count("errors")
+            return _error(500, "api_error", "Fake internal server error")
+
+        latency = config.sample_latency(body["model"])
+        text = _response_text(body)
+        with lock:
+            usage = _usage(body, text, cached_prefixes)
+
+        if body.get("stream"):
+            count("streamed")
+            count("success")
+            return StreamingResponse(_stream_events(body, text, usage, latency), media_type="text/event-stream")
+
+        await asyncio.sleep(latency)
+        count("success")
+        return _message(body, text, usage)
+
+    @fake.post("/v1/messages/count_tokens")
+    async def count_tokens(request: Request):
+        body = await request.json()
+        system = body.get("system") or ""
+        system_text = system if isinstance(system, str) else " ".join(block.get("text", "") for block in system)
+        return {"input_tokens": _tokens(json.dumps(body["messages"])) + _tokens(system_text)}
+
+    return fake
+
+
+def _response_text(body: Dict) -> str:
+    """Reasoning text, or a JSON object keyed by recommendation number for batched prompts."""
+    prompt = body["messages"][-1]["content"]
+    if isinstance(prompt, list):
+        prompt = " ".join(block.get("text", "") for block in prompt)
+    budget_words = max(int(body.get("max_tokens", 500) / TOKENS_PER_WORD), 1)
+
+    if "Respond with only a JSON object" in prompt:
+        numbers = re.findall(r"Recommendation (\d+):", prompt)
+        per_item = max(budget_words // max(len(numbers), 1) - 4, 1)
+        return json.dumps({n: " ".join(FILLER[:per_item]) for n in numbers})
+
+    return " ".join(FILLER[:budget_words])
+
+
+def _usage(body: Dict, text: str, cached_prefixes: set) -> Dict:
+    """Token usage, treating a cache_control system prefix as written once and read afterwards."""
+    system = body.get("system") or ""
+    system_text = system if isinstance(system, str) else " ".join(block.get("text", "") for block in system)
+    prefix_tokens = _tokens(system_text)
+    cacheable = isinstance(system, list) and any("cache_control" in block for block in system)
+
+    usage = {
+        "input_tokens": _tokens(json.dumps(body["messages"])),
+        "output_tokens": _tokens(text),
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0
+    }
+    if not cacheable:
+        usage["input_tokens"] += prefix_tokens
+    elif system_text in cached_prefixes:
+        usage["cache_read_input_tokens"] = prefix_tokens
+    else:
+        cached_prefixes.add(system_text)
+        usage["cache_creation_input_tokens"] = prefix_tokens
+    return usage
+
+
+def _tokens(text: str) -> int:
+    return int(len(text.split()) * TOKENS_PER_WORD)
+
+
+def _message(body: Dict, text: str, usage: Dict) -> Dict:
+    return {
+        "id": f"msg_fake_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body["model"],
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": usage
+    }
+
+
+async def _stream_events(body: Dict, text: str, usage: Dict, latency: float):
+    """Server-sent events in the Messages streaming format, spread over the sampled latency."""
+    words = text.split(" ")
+    chunks = [" ".join(words[i:i + STREAM_CHUNK_WORDS]) + " " for i in range(0, len(words), STREAM_CHUNK_WORDS)]
+    chunks[-1] = chunks[-1].rstrip()
+    start_message = {**_message(body, "", {**usage, "output_tokens": 0}), "content": []}
+
+    await asyncio.sleep(latency * FIRST_TOKEN_SHARE)
+    yield _sse("message_start", {"type": "message_start", "message": start_message})
+    yield _sse("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+    for chunk in chunks:
+        yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}})
+        await asyncio.sleep(latency * (1 - FIRST_TOKEN_SHARE) / len(chunks))
+    yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield _sse("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+        "usage": {"output_tokens": usage["output_tokens"]}
+    })
+    yield _sse("message_stop", {"type": "message_stop"})
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _error(status_code: int, error_type: str, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"type": "error", "error": {"type": error_type, "message": message}},
+        headers=headers
+    )
+
+
+def _parse_model_latency(value: str) -> Dict[str, str]:
+    pairs = [item.split("=", 1) for item in value.split(",") if "=" in item]
+    return {name.strip(): spec.strip() for name, spec in pairs}
+
+
+app = create_app()
+
+
+def main(argv: Optional[List[str]] = None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default=os.getenv("FAKE_LLM_LATENCY", "lognormal:800:0.5"))
+    parser.add_argument("--model-latency", action="append", default=[], metavar="NAME=SPEC",
+                        help="Latency for models whose name contains NAME (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")))
+    parser.add_argument("--rate-limit-rate", type=float, default=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0")))
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after header on 429s, in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = FakeServerConfig(
+        latency=args.latency,
+        model_latency=_parse_model_latency(",".join(args.model_latency)),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import time
+import threading
+
+import pytest
+from fastapi import status
+from sqlalchemy.orm import sessionmaker
+
+from app import jobs as jobs_module
+
+
+@pytest.fixture(autouse=True)
+def job_store(db_session):
+    """Point worker threads at the test database."""
+    jobs_module.configure_job_store(sessionmaker(autocommit=False, autoflush=False, bind=db_session.get_bind()))
+    yield
+    jobs_module.shutdown_job_queue()
+    jobs_module.configure_job_store(jobs_module.SessionLocal)
+
+
+@pytest.fixture
+def auth_token_persona_b(client):
+    """Register, login, and assign Persona B."""
+    client.post(
+        "/auth/register",
+        json={"email": "jobs@example.com", "password": "password123"}
+    )
+    token = client.post(
+        "/auth/login",
+        json={"email": "jobs@example.com", "password": "password123"}
+    ).json()["access_token"]
+
+    answers = [
+        {"question_id": 1, "answer": "intermediate"},
+        {"question_id": 2, "answer": "substantial"},
+        {"question_id": 3, "answer": "moderate"},
+        {"question_id": 4, "answer": "growth"},
+        {"question_id": 5, "answer": "moderate"},
+        {"question_id": 6, "answer": "medium"},
+        {"question_id": 7, "answer": "concerned"},
+        {"question_id": 8, "answer": "analysis"},
+        {"question_id": 9, "answer": "important"},
+        {"question_id": 10, "answer": "middle"}
+    ]
+    client.post(
+        "/onboarding/submit",
+        json={"answers": answers},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    return token
+
+
+@pytest.fixture
+def sample_portfolio():
+    """Sample portfolio JSON."""
+    return {
+        "holdings": [
+            {"ticker": "AAPL", "shares": 100, "purchase_price": 150.00},
+            {"ticker": "MSFT", "shares": 50, "purchase_price": 280.00},
+            {"ticker": "SPY", "shares": 25, "purchase_price": 400.00}
+        ]
+    }
+
+
+def _wait_for(client, job_id, headers, statuses=("succeeded", "failed", "cancelled"), timeout=30):
+    """Poll a job until it reaches one of the given statuses."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish: {job}")
+
+
+def test_rebalance_job_matches_sync_endpoint(client, auth_token_persona_b, sample_portfolio):
+    """Test a rebalance job returns an ID at once and ends with the same plan as the sync endpoint."""
+    headers = {"Authorization": f"Bearer {auth_token_persona_b}"}
+    response = client.post("/jobs/rebalance?model_type=growth", json=sample_portfolio, headers=headers)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = _wait_for(client, response.json()["id"], headers)
+    assert job["status"] == "succeeded"
+    assert job["progress_completed"] == job["progress_total"]
+
+    expected = client.post("/portfolio/rebalance?model_type=growth", json=sample_portfolio, headers=headers).json()
+    def trades(recommendations):
+        return [(r["ticker"], r["action"], r["shares"], r["reasoning"]) for r in recommendations]
+
+    assert trades(job["result"]["recommendations"]) == trades(expected["recommendations"])
+    assert job["result"]["current_allocation"] == expected["current_allocation"]
+
+    listed = client.get("/jobs", headers=headers).json()
+    assert [j["id"] for j in listed] == [job["id"]]
+
+
+def test_rebalance_job_reasons_in_chunks(client, auth_token_persona_b, sample_portfolio, monkeypatch):
+    """Test a rebalance job asks for reasoning a chunk of recommendations at a time."""
+    headers = {"Authorization": f"Bearer {auth_token_persona_b}"}
+    chunks = []
+    monkeypatch.setattr(jobs_module, "JOB_REASONING_CHUNK_SIZE", 2)
+    monkeypatch.setattr(jobs_module, "attach_ai_reasoning", lambda recommendations, *args: chunks.append(len(recommendations)))
+
+    job_id = client.post("/jobs/rebalance", json=sample_portfolio, headers=headers).json()["id"]
+    job = _wait_for(client, job_id, headers)
+
+    total = len(job["result"]["recommendations"])
+    assert job["status"] == "succeeded" and job["progress_completed"] == total
+    assert sum(chunks) == total and len(chunks) == (total + 1) // 2
+    assert all(size <= 2 for size in chunks)
+
+
+def test_job_partial_results_and_cancel(client, auth_token_persona_b, sample_portfolio, monkeypatch):
+    """Test a running job publishes partial results and stops when cancelled."""
+    headers = {"Authorization": f"Bearer {auth_token_persona_b}"}
+    release = threading.Event()
+
+    def slow_handler(context, payload):
+        for step in range(100):
+            context.check_cancelled()
+            context.report_progress(step, 100, {"steps": step})
+            release.wait(0.05)
+        return {"steps": 100}
+
+    monkeypatch.setitem(jobs_module.JOB_HANDLERS, "rebalance", slow_handler)
+
+    job_id = client.post("/jobs/rebalance", json=sample_portfolio, headers=headers).json()["id"]
+    _wait_for(client, job_id, headers, statuses=("running",))
+
+    cancelled = client.post(f"/jobs/{job_id}/cancel", headers=headers).json()
+    assert cancelled["cancel_requested"] is True
+
+    job = _wait_for(client, job_id, headers)
+    assert job["status"] == "cancelled"
+    assert job["result"] is None
+    assert job["partial_result"]["steps"] < 100
+
+
+def test_job_failure_is_reported(client, auth_token_persona_b, sample_portfolio, monkeypatch):
+    """Test handler errors mark the job failed with the error message."""
+    headers = {"Authorization": f"Bearer {auth_token_persona_b}"}
+
+    def failing_handler(context, payload):
+        raise ValueError("boom")
+
+    monkeypatch.setitem(jobs_module.JOB_HANDLERS, "rebalance", failing_handler)
+
+    job_id = client.post("/jobs/rebalance", json=sample_portfolio, headers=headers).json()["id"]
+    job = _wait_for(client, job_id, headers)
+
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+
+
+def test_job_not_found(client, auth_token_persona_b):
+    """Test accessing a job that does not exist."""
+    response = client.get("/jobs/does-not-exist", headers={"Authorization": f"Bearer {auth_token_persona_b}"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,808 @@
+import os
+import re
+import asyncio
+import functools
+import json
+import time
+import threading
+from contextlib import closing
+from types import SimpleNamespace
+
+import pytest
+
+from app import portfolio as portfolio_module
+from app.routers import admin as admin_router
+from app.llm_cache import precomputed_reasoning
+from app.llm_telemetry import llm_telemetry
+from app.llm_service import LLMService
+from app.portfolio import calculate_portfolio_value, analyze_sector_allocation, recommend_rebalancing
+from app.schemas import PortfolioHolding
+
+
+class FakeMessages:
+    """Stand-in for client.messages that answers after a per-ticker delay."""
+
+    def __init__(self, delays=None, default_delay=0.0):
+        self.delays = delays or {}
+        self.default_delay = default_delay
+        self.omit_from_batch = set()  # Tickers left out of batched JSON responses
+        self.error = None  # Raised by every call when set
+        self.calls = []
+        self.token_counts = []
+        self.active = 0
+        self.max_active = 0
+        self.cached_prefixes = set()
+        self._lock = threading.Lock()
+
+    def _usage(self, kwargs):
+        """Token usage as reported with prompt caching: the first call writes the prefix, later calls read it."""
+        system = kwargs.get("system")
+        prefix_tokens = len(str(system).split()) if system else 0
+        cacheable = isinstance(system, list) and "cache_control" in system[-1]
+        with self._lock:
+            hit = cacheable and str(system) in self.cached_prefixes
+            if cacheable:
+                self.cached_prefixes.add(str(system))
+        return SimpleNamespace(
+            input_tokens=len(kwargs["messages"][-1]["content"].split()) + (0 if cacheable else prefix_tokens),
+            cache_read_input_tokens=prefix_tokens if hit else 0,
+            cache_creation_input_tokens=prefix_tokens if cacheable and not hit else 0,
+            output_tokens=10
+        )
+
+    def count_tokens(self, **kwargs):
+        """Token count at ~1.3 tokens per word, like the local fake server."""
+        self.token_counts.append(kwargs)
+        text = str(kwargs.get("system", "")) + " " + kwargs["messages"][-1]["content"]
+        return SimpleNamespace(input_tokens=int(len(text.split()) * 1.3))
+
+    def create(self, **kwargs):
+        delay = self._start(kwargs)
+        try:
+            time.sleep(delay)
+        finally:
+            self._finish()
+        return self._answer(kwargs)
+
+    def _start(self, kwargs):
+        """Record the call and return how long it should take."""
+        with self._lock:
+            self.calls.append(kwargs)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        if self.error:
+            self._finish()
+            raise self.error
+        prompt = kwargs["messages"][-1]["content"]
+        if "Respond with only a JSON object" in prompt:
+            return 0.0
+        return self.delays.get(re.search(r"shares of (\w+)", prompt).group(1), self.default_delay)
+
+    def _finish(self):
+        with self._lock:
+            self.active -= 1
+
+    def _answer(self, kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "Respond with only a JSON object" in prompt:
+            tickers = re.findall(r"Recommendation (\d+):\n- Action: \w+ [\d.]+ shares of (\w+)", prompt)
+            answer = {n: f"AI reasoning for {t}" for n, t in tickers if t not in self.omit_from_batch}
+            text = f"```json\n{json.dumps(answer)}\n```"
+        else:
+            ticker = re.search(r"shares of (\w+)", prompt).group(1)
+            text = f"AI reasoning for {ticker}"
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=self._usage(kwargs))
+
+    def stream(self, **kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        ticker = re.search(r"shares of (\w+)", prompt).group(1)
+        with self._lock:
+            self.calls.append(kwargs)
+        delay = self.delays.get(ticker, self.default_delay)
+        return FakeStream(["AI ", "reasoning ", "for ", ticker], delay, self._usage(kwargs))
+
+
+class FakeBatches:
+    """Stand-in for client.messages.batches that finishes on the first status check."""
+
+    def __init__(self):
+        self.submitted = []
+        self.ready = True  # False keeps every batch in progress
+
+    def create(self, requests):
+        self.submitted.append(requests)
+        return SimpleNamespace(id=f"batch-{len(self.submitted)}", processing_status="in_progress")
+
+    def retrieve(self, batch_id):
+        return SimpleNamespace(id=batch_id, processing_status="ended" if self.ready else "in_progress")
+
+    def results(self, batch_id):
+        for request in self.submitted[int(batch_id.split("-")[1]) - 1]:
+            sector = re.search(r"Action: \w+ (\w+) holdings", request["params"]["messages"][-1]["content"]).group(1)
+            message = SimpleNamespace(content=[SimpleNamespace(text=f"Precomputed reasoning for {sector}")])
+            yield SimpleNamespace(custom_id=request["custom_id"], result=SimpleNamespace(type="succeeded", message=message))
+
+
+class FakeAsyncMessages:
+    """Stand-in for the async client's messages, sharing calls and delays with a FakeMessages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def create(self, **kwargs):
+        delay = self.messages._start(kwargs)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.messages._finish()
+        return self.messages._answer(kwargs)
+
+
+class FakeStream:
+    """Context manager mimicking MessageStream.text_stream and get_final_message."""
+
+    def __init__(self, chunks, delay, usage=None):
+        self.chunks = chunks
+        self.delay = delay
+        self.usage = usage
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay / len(self.chunks))
+            yield chunk
+
+    def get_final_message(self):
+        return SimpleNamespace(content=[SimpleNamespace(text="".join(self.chunks))], usage=self.usage)
+
+
+@pytest.fixture
+def llm_service(monkeypatch):
+    """LLMService with a fake client, used by the portfolio module."""
+    service = LLMService()
+    service.client = SimpleNamespace(messages=FakeMessages())
+    service.client.messages.batches = FakeBatches()
+    service.async_client = SimpleNamespace(messages=FakeAsyncMessages(service.client.messages))
+    monkeypatch.setattr(portfolio_module, "get_llm_service", lambda: service)
+    monkeypatch.setattr(admin_router, "get_llm_service", lambda: service)
+    precomputed_reasoning.clear()
+    llm_telemetry.clear()
+    yield service
+    precomputed_reasoning.clear()
+    llm_telemetry.clear()
+
+
+@pytest.fixture
+def auth_token_persona_b(client):
+    """Register, login, and assign Persona B."""
+    client.post(
+        "/auth/register",
+        json={"email": "llm@example.com", "password": "password123"}
+    )
+    token = client.post(
+        "/auth/login",
+        json={"email": "llm@example.com", "password": "password123"}
+    ).json()["access_token"]
+
+    answers = [
+        {"question_id": 1, "answer": "intermediate"},
+        {"question_id": 2, "answer": "substantial"},
+        {"question_id": 3, "answer": "moderate"},
+        {"question_id": 4, "answer": "growth"},
+        {"question_id": 5, "answer": "moderate"},
+        {"question_id": 6, "answer": "medium"},
+        {"question_id": 7, "answer": "concerned"},
+        {"question_id": 8, "answer": "analysis"},
+        {"question_id": 9, "answer": "important"},
+        {"question_id": 10, "answer": "middle"}
+    ]
+    client.post(
+        "/onboarding/submit",
+        json={"answers": answers},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    return token
+
+
+@pytest.fixture
+def concentrated_portfolio():
+    """Single-sector portfolio so every model produces several trades."""
+    holdings = [
+        PortfolioHolding(ticker="AAPL", shares=100, purchase_price=150.00),
+        PortfolioHolding(ticker="MSFT", shares=50, purchase_price=280.00),
+        PortfolioHolding(ticker="NVDA", shares=30, purchase_price=450.00)
+    ]
+    total_value, ticker_details = calculate_portfolio_value(holdings)
+    return analyze_sector_allocation(ticker_details, total_value), ticker_details, total_value
+
+
+def test_reasoning_calls_run_concurrently(llm_service, concentrated_portfolio, monkeypatch):
+    """Test reasoning calls overlap instead of running one after another."""
+    from app import llm_service as llm_module
+
+    monkeypatch.setattr(llm_module, "LLM_BATCH_REASONING", False)
+    llm_service.client.messages.default_delay = 0.2
+
+    start = time.perf_counter()
+    recommendations = recommend_rebalancing(*concentrated_portfolio, model_type="balanced")
+    elapsed = time.perf_counter() - start
+
+    assert len(recommendations) >= 4
+    assert all(r["ai_generated"] for r in recommendations)
+    assert llm_service.client.messages.max_active > 1
+    assert elapsed < 0.2 * len(recommendations) * 0.75
+
+
+def test_slow_call_falls_back_to_basic_reasoning(llm_service, concentrated_portfolio):
+    """Test a call that misses the overall deadline keeps its basic reasoning."""
+    from app import llm_service as llm_module
+
+    llm_service.client.messages.delays = {"XLV": 3.0}
+
+    recommendations = portfolio_module.plan_rebalancing(concentrated_portfolio[1], "balanced")
+    context = portfolio_module.build_portfolio_context(*concentrated_portfolio)
+    items = [
+        {"holding": {"ticker": r["ticker"]}, "recommendation": r, "model_type": "balanced"}
+        for r in recommendations
+    ]
+
+    start = time.perf_counter()
+    results = llm_service.generate_reasoning_concurrently(items, context, total_timeout=0.5)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.5
+    by_ticker = {r["ticker"]: result for r, result in zip(recommendations, results)}
+    assert by_ticker["XLV"] is None
+    assert all(text == f"AI reasoning for {t}" for t, text in by_ticker.items() if t != "XLV")
+    # Every call gets its own deadline
+    assert all(call["timeout"].read == llm_module.LLM_CALL_TIMEOUT_SECONDS for call in llm_service.client.messages.calls)
+    assert all(call["timeout"].connect == llm_module.LLM_CONNECT_TIMEOUT_SECONDS for call in llm_service.client.messages.calls)
+
+
+def test_batched_reasoning_uses_one_call_per_model(llm_service, concentrated_portfolio):
+    """Test each model's recommendations share one prompt with the context sent once."""
+    from app.portfolio import recommend_rebalancing_all
+
+    plans = recommend_rebalancing_all(*concentrated_portfolio)
+
+    calls = llm_service.client.messages.calls
+    assert len(calls) == len(plans)
+    for call in calls:
+        assert call["messages"][0]["content"].count("Current Portfolio Context:") == 1
+    for model_type, recommendations in plans.items():
+        assert all(r["ai_generated"] for r in recommendations)
+        assert all(r["reasoning"] == f"AI reasoning for {r['ticker']}" for r in recommendations)
+
+
+def test_batched_reasoning_retries_unparsed_items(llm_service, concentrated_portfolio):
+    """Test only items missing from the batched response are retried individually."""
+    llm_service.client.messages.omit_from_batch = {"XLV"}
+
+    recommendations = recommend_rebalancing(*concentrated_portfolio, model_type="balanced")
+
+    calls = llm_service.client.messages.calls
+    assert len(calls) == 2
+    assert "shares of XLV" in calls[1]["messages"][0]["content"]
+    assert all(r["reasoning"] == f"AI reasoning for {r['ticker']}" for r in recommendations)
+
+
+def test_parse_batch_response():
+    """Test structured output parsing tolerates fences and rejects bad items."""
+    from app.llm_service import _parse_batch_response
+
+    text = 'Here you go:\n```json\n{"1": " First ", "2": "", "3": 7}\n```'
+    assert _parse_batch_response(text, 4) == ["First", None, None, None]
+    assert _parse_batch_response("not json", 2) == [None, None]
+
+
+def test_streaming_rebalance_sends_plan_then_reasoning(client, auth_token_persona_b, llm_service, monkeypatch):
+    """Test the plan arrives first and each reasoning equals its streamed deltas."""
+    llm_service.client.messages.default_delay = 0.05
+    llm_service.client.messages.delays = {"XLV": 5.0}
+    monkeypatch.setattr(
+        llm_service, "stream_reasoning", functools.partial(LLMService.stream_reasoning, llm_service, total_timeout=1.0)
+    )
+
+    response = client.post(
+        "/portfolio/rebalance/stream?model_type=balanced",
+        json={"holdings": [
+            {"ticker": "AAPL", "shares": 100, "purchase_price": 150.00},
+            {"ticker": "MSFT", "shares": 50, "purchase_price": 280.00}
+        ]},
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    plan = events[0]
+    assert plan["type"] == "plan"
+    assert all(not r["ai_generated"] for r in plan["recommendations"])
+    assert events[-1] == {"type": "done"}
+
+    deltas = {}
+    finals = {}
+    for event in events[1:-1]:
+        if event["type"] == "reasoning_delta":
+            deltas[event["index"]] = deltas.get(event["index"], "") + event["text"]
+        else:
+            finals[event["index"]] = event
+    assert sorted(finals) == list(range(len(plan["recommendations"])))
+
+    for index, final in finals.items():
+        recommendation = plan["recommendations"][index]
+        if recommendation["ticker"] == "XLV":
+            # Missed the deadline: basic reasoning is kept
+            assert not final["ai_generated"]
+            assert final["reasoning"] == recommendation["reasoning"]
+        else:
+            assert final["ai_generated"]
+            assert final["reasoning"] == deltas[index] == f"AI reasoning for {final['ticker']}"
+
+
+def _recommendation(**overrides):
+    recommendation = {
+        "ticker": "XLV", "action": "buy", "shares": 40, "sector": "Healthcare",
+        "current_percentage": 0.0, "target_percentage": 15.0, "amount": 5600.0
+    }
+    recommendation.update(overrides)
+    return recommendation
+
+
+def _item(recommendation, model_type="balanced"):
+    return {"holding": {}, "recommendation": recommendation, "model_type": model_type}
+
+
+CONTEXT = {"total_holdings": 3, "diversification_score": 0.31, "concentrated_sectors": ["Technology"], "total_value": 37000.0}
+MEDIUM_CONTEXT = {**CONTEXT, "total_holdings": 10}  # Routed to a model that can cache the system prefix
+
+
+def test_reasoning_fingerprint_buckets_numbers():
+    """Test tiny numeric changes share a fingerprint but context changes do not."""
+    from app.llm_cache import reasoning_fingerprint
+
+    base = reasoning_fingerprint(_recommendation(), "balanced", CONTEXT)
+    assert reasoning_fingerprint(_recommendation(shares=41, amount=5640.0, current_percentage=0.2), "balanced", CONTEXT) == base
+    assert reasoning_fingerprint(_recommendation(), "balanced", {**CONTEXT, "total_value": 37200.0}) == base
+
+    assert reasoning_fingerprint(_recommendation(shares=80), "balanced", CONTEXT) != base
+    assert reasoning_fingerprint(_recommendation(), "growth", CONTEXT) != base
+    assert reasoning_fingerprint(_recommendation(), "balanced", {**CONTEXT, "concentrated_sectors": []}) != base
+
+
+def test_reasoning_cache_lru_and_ttl(monkeypatch):
+    """Test least recently used entries are evicted and expired entries miss."""
+    from app import llm_cache
+    from app.llm_cache import ReasoningCache
+
+    cache = ReasoningCache(max_entries=2, ttl_seconds=60, path="")
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")  # Evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+
+    now = time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 120)
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_reasoning_cache_disk_tier_survives_restart(tmp_path):
+    """Test a new cache instance is served from the SQLite tier."""
+    from app.llm_cache import ReasoningCache
+
+    path = str(tmp_path / "llm_cache.db")
+    ReasoningCache(path=path).set("key", "cached reasoning")
+
+    restarted = ReasoningCache(path=path)
+    assert restarted.get("key") == "cached reasoning"
+    assert restarted.get("key") == "cached reasoning"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.stats()["memory_hits"] == 1
+
+
+def test_reasoning_cache_disk_tier_is_pruned(tmp_path, monkeypatch):
+    """Test the SQLite tier drops expired rows and keeps at most max_entries."""
+    import sqlite3
+    from app import llm_cache
+    from app.llm_cache import ReasoningCache
+
+    path = str(tmp_path / "llm_cache.db")
+    now = time.time()
+    cache = ReasoningCache(max_entries=2, ttl_seconds=60, path=path)
+    for i, key in enumerate(["a", "b", "c"]):
+        monkeypatch.setattr(llm_cache.time, "time", lambda i=i: now + i)
+        cache.set(key, key.upper())
+
+    def disk_keys():
+        with closing(sqlite3.connect(path)) as conn:
+            return sorted(row[0] for row in conn.execute("SELECT key FROM reasoning_cache"))
+
+    assert disk_keys() == ["b", "c"]
+
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 61.5)
+    ReasoningCache(max_entries=2, ttl_seconds=60, path=path)
+    assert disk_keys() == ["c"]
+
+
+def test_similar_recommendation_hits_cache(client, auth_token_persona_b, llm_service, monkeypatch):
+    """Test a near-identical recommendation is answered from the cache, with stats for admins only."""
+    from app import auth
+
+    first = llm_service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", CONTEXT)
+    second = llm_service.generate_rebalancing_reasoning(
+        {}, _recommendation(shares=41, amount=5740.0), "balanced", {**CONTEXT, "total_value": 37200.0}
+    )
+    assert second == first
+    assert len(llm_service.client.messages.calls) == 1
+
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(), "growth", CONTEXT)
+    assert len(llm_service.client.messages.calls) == 2
+
+    headers = {"Authorization": f"Bearer {auth_token_persona_b}"}
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", set())
+    assert client.get("/admin/llm-cache-stats", headers=headers).status_code == 403
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"llm@example.com"})
+    stats = client.get("/admin/llm-cache-stats", headers=headers).json()
+    assert stats == llm_service.cache_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_system_prefix_is_prompt_cached(llm_service):
+    """Test the advisor instructions are a cached system block and usage is split by cache status."""
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", MEDIUM_CONTEXT)
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(ticker="XOM", sector="Energy"), "growth", MEDIUM_CONTEXT)
+
+    calls = llm_service.client.messages.calls
+    assert calls[0]["system"] == calls[1]["system"]
+    assert calls[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert "financial advisor" not in calls[0]["messages"][-1]["content"]
+
+    usage = llm_service.usage_stats()
+    assert usage["calls"] == 2
+    assert usage["cache_creation_input_tokens"] > 0
+    assert usage["cache_read_input_tokens"] == usage["cache_creation_input_tokens"]
+    assert 0 < usage["cached_input_ratio"] < 1
+
+
+def test_long_prefix_only_sent_where_it_caches(llm_service):
+    """Test routes below their model's cache minimum keep the short prompt, counted once per model."""
+    from app.llm_service import CACHED_SYSTEM_PROMPT, PROMPT_GUIDE, SYSTEM_PROMPT
+    from app.portfolio import MODEL_PORTFOLIOS
+
+    for targets in MODEL_PORTFOLIOS.values():
+        assert ", ".join(f"{sector} {weight:.0f}%" for sector, weight in targets.items()) in PROMPT_GUIDE
+
+    for context in (CONTEXT, MEDIUM_CONTEXT, CONTEXT, MEDIUM_CONTEXT):
+        llm_service.clear_cache()
+        llm_service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", context)
+
+    calls = llm_service.client.messages.calls
+    assert calls[0]["system"] == calls[2]["system"] == SYSTEM_PROMPT  # Haiku needs 4096 tokens
+    assert calls[1]["system"][0]["text"] == CACHED_SYSTEM_PROMPT and "cache_control" in calls[1]["system"][0]
+    assert len(llm_service.client.messages.token_counts) == 4  # With and without the prefix, per model
+
+
+@pytest.mark.skipif(not os.getenv("ANTHROPIC_API_KEY"), reason="Counting tokens needs ANTHROPIC_API_KEY")
+def test_cached_prefix_reaches_sonnet_minimum():
+    """Test the long prefix is cacheable on the medium and complex routes, by the API's token count."""
+    from app.llm_service import LLM_ROUTES, _prompt_cache_min_tokens
+
+    service = LLMService()
+    for route in ("medium", "complex"):
+        model = LLM_ROUTES[route]["model"]
+        assert service._cached_prefix_tokens(model) >= _prompt_cache_min_tokens(model)
+
+
+def test_rebalance_endpoint_uses_async_client(client, auth_token_persona_b, llm_service, monkeypatch):
+    """Test the rebalance route gets its reasoning from the async client."""
+    monkeypatch.setattr(llm_service, "client", None)
+
+    response = client.post(
+        "/portfolio/rebalance?model_type=balanced",
+        json={"holdings": [
+            {"ticker": "AAPL", "shares": 100, "purchase_price": 150.00},
+            {"ticker": "MSFT", "shares": 50, "purchase_price": 280.00}
+        ]},
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+    assert response.status_code == 200
+    recommendations = response.json()["recommendations"]
+    assert recommendations
+    assert all(r["reasoning"] == f"AI reasoning for {r['ticker']}" for r in recommendations)
+
+
+def test_async_reasoning_cancels_calls_at_deadline(llm_service, concentrated_portfolio, monkeypatch):
+    """Test a slow async call is cancelled at the deadline and keeps basic reasoning."""
+    from app import llm_service as llm_module
+
+    monkeypatch.setattr(llm_module, "LLM_BATCH_REASONING", False)
+    llm_service.client.messages.delays = {"XLV": 3.0}
+
+    recommendations = portfolio_module.plan_rebalancing(concentrated_portfolio[1], "balanced")
+    context = portfolio_module.build_portfolio_context(*concentrated_portfolio)
+    items = [{"holding": {}, "recommendation": r, "model_type": "balanced"} for r in recommendations]
+
+    start = time.perf_counter()
+    results = asyncio.run(llm_service.agenerate_reasoning(items, context, total_timeout=0.5))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.5
+    assert llm_service.client.messages.active == 0
+    by_ticker = {r["ticker"]: result for r, result in zip(recommendations, results)}
+    assert by_ticker["XLV"] is None
+    assert all(text == f"AI reasoning for {t}" for t, text in by_ticker.items() if t != "XLV")
+
+
+def test_circuit_breaker_skips_calls_during_cooldown(llm_service, monkeypatch):
+    """Test consecutive failures open the breaker and calls resume after the cool-down."""
+    from app import circuit_breaker
+    from app.circuit_breaker import CircuitBreaker
+
+    llm_service._breaker = CircuitBreaker("test", failure_threshold=2, cooldown_seconds=30)
+    messages = llm_service.client.messages
+    messages.error = RuntimeError("overloaded")
+
+    for ticker in ["XLV", "XLE"]:
+        assert llm_service.generate_rebalancing_reasoning({}, _recommendation(ticker=ticker), "balanced", CONTEXT) is None
+    assert llm_service.breaker_stats()["state"] == "open"
+
+    # Open: answered immediately without calling the API, sync or async
+    assert llm_service.generate_rebalancing_reasoning({}, _recommendation(ticker="XLU"), "balanced", CONTEXT) is None
+    items = [{"holding": {}, "recommendation": _recommendation(ticker="XLU"), "model_type": "balanced"}]
+    assert asyncio.run(llm_service.agenerate_reasoning(items, CONTEXT)) == [None]
+    assert len(messages.calls) == 2
+
+    now = time.monotonic()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now + 60)
+    messages.error = None
+    assert llm_service.generate_rebalancing_reasoning({}, _recommendation(ticker="XLU"), "balanced", CONTEXT) == "AI reasoning for XLU"
+    assert llm_service.breaker_stats() == {"state": "closed", "consecutive_failures": 0, "times_opened": 1}
+
+
+
+def test_cached_reasoning_served_without_api(llm_service):
+    """Test cached and precomputed reasoning is still served while the breaker is open or no key is set."""
+    from app.circuit_breaker import CircuitBreaker
+    from app.llm_cache import recommendation_shape
+
+    cached = _recommendation(ticker="XLV")
+    precomputed = _recommendation(ticker="XLE", sector="Energy")
+    assert llm_service.generate_rebalancing_reasoning({}, cached, "balanced", CONTEXT) == "AI reasoning for XLV"
+    precomputed_reasoning.replace({recommendation_shape(precomputed, "balanced"): "Precomputed Energy"})
+    items = [
+        {"holding": {}, "recommendation": r, "model_type": "balanced"}
+        for r in [cached, precomputed, _recommendation(ticker="XLU", sector="Utilities")]
+    ]
+    expected = ["AI reasoning for XLV", "Precomputed Energy", None]
+
+    llm_service._breaker = CircuitBreaker("test", failure_threshold=1, cooldown_seconds=30)
+    llm_service._breaker.record_failure()
+    calls = len(llm_service.client.messages.calls)
+    assert llm_service.generate_reasoning(items, CONTEXT) == expected
+    assert asyncio.run(llm_service.agenerate_reasoning(items, CONTEXT)) == expected
+    assert list(llm_service.stream_rebalancing_reasoning({}, precomputed, "balanced", CONTEXT)) == ["Precomputed Energy"]
+    done = {index: text for kind, index, text in llm_service.stream_reasoning(items, CONTEXT) if kind == "done"}
+    assert [done[i] for i in range(3)] == expected
+    assert len(llm_service.client.messages.calls) == calls
+
+    llm_service.client = llm_service.async_client = None
+    assert llm_service.generate_rebalancing_reasoning({}, precomputed, "balanced", CONTEXT) == "Precomputed Energy"
+
+def test_reasoning_routed_by_portfolio_complexity(client, auth_token_persona_b, llm_service, monkeypatch):
+    """Test simple portfolios use the cheap route, complex ones the large model, with latency per route."""
+    from app import auth
+    from app.llm_service import LLM_ROUTES
+
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", CONTEXT)
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", {**CONTEXT, "total_holdings": 20})
+
+    simple_call, complex_call = llm_service.client.messages.calls
+    assert simple_call["model"] == LLM_ROUTES["simple"]["model"]
+    assert simple_call["max_tokens"] == LLM_ROUTES["simple"]["max_tokens"]
+    assert complex_call["model"] == LLM_ROUTES["complex"]["model"]
+    assert complex_call["max_tokens"] == LLM_ROUTES["complex"]["max_tokens"]
+    assert simple_call["max_tokens"] < complex_call["max_tokens"]
+
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"llm@example.com"})
+    response = client.get(
+        "/admin/llm-route-stats",
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+    assert response.status_code == 200
+    stats = {route["route"]: route for route in response.json()}
+    assert stats["simple"]["calls"] == stats["complex"]["calls"] == 1
+    assert stats["medium"]["calls"] == 0 and stats["medium"]["latency_ms_p50"] is None
+    assert stats["simple"]["latency_ms_p95"] is not None
+
+
+def test_frequent_shapes_are_precomputed_in_a_batch(db_session, llm_service):
+    """Test shapes seen often enough get batch-generated reasoning that later requests use."""
+    from app.models import ReasoningTemplate
+    from app.reasoning_precompute import run_precompute
+
+    # Same shape (Healthcare buy ~0% -> 15%, balanced) from three different portfolios
+    for ticker, shares, value in [("XLV", 40, 37000.0), ("VHT", 20, 52000.0), ("IYH", 90, 81000.0)]:
+        llm_service.generate_reasoning(
+            [_item(_recommendation(ticker=ticker, shares=shares, current_percentage=1.0))],
+            {**CONTEXT, "total_value": value}
+        )
+    llm_service.generate_reasoning([_item(_recommendation(sector="Energy", ticker="XLE"))], CONTEXT)
+    live_calls = len(llm_service.client.messages.calls)
+
+    summary = run_precompute(db_session, llm_service, min_usage=3, poll_seconds=0)
+
+    assert summary["shapes_flushed"] == 2
+    assert summary["shapes_submitted"] == summary["shapes_stored"] == 1
+    row = db_session.query(ReasoningTemplate).filter(ReasoningTemplate.sector == "Healthcare").one()
+    assert row.usage_count == 3
+    assert (row.current_bucket, row.target_bucket) == (0.0, 15.0)
+    assert row.reasoning == "Precomputed reasoning for Healthcare"
+    assert db_session.query(ReasoningTemplate).filter(ReasoningTemplate.sector == "Energy").one().reasoning is None
+
+    # A new portfolio with the same shape is answered without a live call
+    reasoning = llm_service.generate_rebalancing_reasoning(
+        {}, _recommendation(ticker="FHLC", shares=7), "balanced", {**CONTEXT, "total_value": 12000.0}
+    )
+    assert reasoning == "Precomputed reasoning for Healthcare"
+    assert len(llm_service.client.messages.calls) == live_calls
+    assert llm_service.cache_stats()["precomputed_hits"] == 1
+
+
+def test_unfinished_batch_is_resumed_not_resubmitted(db_session, llm_service, monkeypatch):
+    """Test a batch still running when the job stops waiting is collected by the next run, and shutdown saves counts."""
+    from app import reasoning_precompute
+    from app.models import ReasoningTemplate
+    from app.reasoning_precompute import run_precompute, stop_reasoning_precompute
+
+    for ticker in ["XLV", "VHT", "IYH"]:
+        llm_service.generate_reasoning([_item(_recommendation(ticker=ticker))], CONTEXT)
+    batches = llm_service.client.messages.batches
+    batches.ready = False
+
+    summary = run_precompute(db_session, llm_service, min_usage=3, poll_seconds=0, max_wait_seconds=0)
+    assert summary["shapes_submitted"] == 1 and summary["shapes_stored"] == 0
+    row = db_session.query(ReasoningTemplate).one()
+    assert row.batch_id == "batch-1" and row.reasoning is None
+
+    batches.ready = True
+    summary = run_precompute(db_session, llm_service, min_usage=3, poll_seconds=0)
+    assert summary["batches_resumed"] == summary["shapes_stored"] == 1
+    assert summary["shapes_submitted"] == 0
+    assert len(batches.submitted) == 1
+    db_session.refresh(row)
+    assert row.batch_id is None and row.reasoning == "Precomputed reasoning for Healthcare"
+
+    # Shape counts since the last run survive a shutdown
+    llm_service.generate_reasoning([_item(_recommendation(sector="Energy", ticker="XLE"))], CONTEXT)
+    monkeypatch.setattr(reasoning_precompute, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(db_session, "close", lambda: None)
+    monkeypatch.setattr(reasoning_precompute, "_stop_event", threading.Event())
+    stop_reasoning_precompute()
+    assert db_session.query(ReasoningTemplate).filter(ReasoningTemplate.sector == "Energy").one().usage_count == 1
+
+
+def test_shape_counted_once_per_request(llm_service):
+    """Test a recommendation retried individually after a batch miss still counts as one use of its shape."""
+    from app.llm_cache import recommendation_shape
+
+    llm_service.client.messages.omit_from_batch = {"XLV"}
+    recommendations = [_recommendation(), _recommendation(ticker="XLE", sector="Energy")]
+    results = llm_service.generate_reasoning([_item(r) for r in recommendations], CONTEXT)
+
+    assert results == ["AI reasoning for XLV", "AI reasoning for XLE"]
+    assert len(llm_service.client.messages.calls) == 2  # The batch, then XLV on its own
+    assert precomputed_reasoning.take_usage() == {recommendation_shape(r, "balanced"): 1 for r in recommendations}
+
+
+def test_admin_telemetry_groups_calls_by_feature_and_model(client, auth_token_persona_b, llm_service, monkeypatch):
+    """Test calls, cache hits and failures are aggregated per feature and model for admins only."""
+    from app import auth
+    from app.llm_service import LLM_ROUTES
+
+    headers = {"Authorization": f"Bearer {auth_token_persona_b}"}
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", set())
+    assert client.get("/admin/llm-telemetry", headers=headers).status_code == 403
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"llm@example.com"})
+
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", CONTEXT)
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", CONTEXT)  # Cache hit
+    list(llm_service.stream_rebalancing_reasoning({}, _recommendation(ticker="XLE", sector="Energy"), "balanced", CONTEXT))
+    llm_service.client.messages.error = RuntimeError("overloaded")
+    llm_service.generate_rebalancing_reasoning({}, _recommendation(ticker="XLU", sector="Utilities"), "balanced", CONTEXT)
+
+    response = client.get("/admin/llm-telemetry", headers=headers)
+    assert response.status_code == 200
+    telemetry = response.json()
+    assert telemetry["total_requests"] == 4
+    assert telemetry["circuit_breaker"]["consecutive_failures"] == 1
+
+    groups = {(g["feature"], g["model"]): g for g in telemetry["groups"]}
+    model = LLM_ROUTES["simple"]["model"]
+    live = groups[("rebalance", model)]
+    assert live["outcomes"] == {"success": 1, "error": 1}
+    assert live["cache"] == {"miss": 2}
+    assert live["input_tokens"] > 0 and live["cost_usd"] > 0
+    assert sum(bucket["count"] for bucket in live["latency_histogram"]) == 2
+    assert live["latency_ms"]["p95"] is not None
+
+    assert groups[("rebalance", None)]["cache"] == {"hit": 1}
+    assert groups[("rebalance", None)]["cost_usd"] == 0
+    assert groups[("rebalance_stream", model)]["outcomes"] == {"success": 1}
+    assert telemetry["total_cost_usd"] == pytest.approx(sum(g["cost_usd"] for g in telemetry["groups"]), abs=1e-6)
+
+
+
+def test_service_builds_real_clients_with_api_key():
+    """Test a configured key builds real SDK clients whose timeouts the SDK accepts."""
+    from anthropic import Anthropic, APIConnectionError, AsyncAnthropic
+
+    service = LLMService(api_key="x", base_url="http://127.0.0.1:9")
+    assert isinstance(service.client, Anthropic)
+    assert isinstance(service.async_client, AsyncAnthropic)
+    assert service.client.timeout.read == service.client.timeout.write
+
+    # Per-call timeouts go through the SDK too; nothing listens on the port, so it fails to connect
+    client = service.client.with_options(max_retries=0)
+    with pytest.raises(APIConnectionError):
+        client.messages.create(**service._message_params("prompt", "simple", 10, 1.0))
+
+
+def test_service_against_local_fake_server():
+    """Test LLMService pointed at the local stand-in server by base URL, through the real SDK."""
+    import socket
+    import uvicorn
+    from scripts.fake_anthropic_server import FakeServerConfig, create_app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    config = FakeServerConfig(latency="fixed:20", retry_after_seconds=0.01, seed=1)
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    try:
+        service = LLMService(api_key="fake", base_url=f"http://127.0.0.1:{port}")
+        reasoning = service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", MEDIUM_CONTEXT)
+        assert reasoning and reasoning.startswith("This adjustment")
+        assert service.usage_stats()["cache_creation_input_tokens"] > 0
+
+        service.clear_cache()
+        deltas = list(service.stream_rebalancing_reasoning({}, _recommendation(), "balanced", MEDIUM_CONTEXT))
+        assert len(deltas) > 1 and "".join(deltas) == reasoning
+        assert service.usage_stats()["cache_read_input_tokens"] > 0
+
+        # Rate limited: the SDK retries once on the retry-after header, then the basic reasoning is kept
+        service.clear_cache()
+        config.rate_limit_rate = 1.0
+        assert service.generate_rebalancing_reasoning({}, _recommendation(), "balanced", CONTEXT) is None
+        stats = asyncio.run(_fake_server_stats(port))
+        assert stats["rate_limited"] == 1 + service.client.max_retries
+        assert stats["success"] == 2 and stats["streamed"] == 1
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+async def _fake_server_stats(port):
+    import httpx
+
+    async with httpx.AsyncClient() as http:
+        return (await http.get(f"http://127.0.0.1:{port}/stats")).json()
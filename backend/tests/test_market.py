@@ -242,3 +242,36 @@ def test_historical_data_no_auth(client):
     """Test getting historical data without authentication fails."""
     response = client.get("/market/ticker/AAPL/history?time_range=1y")
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_historical_data_fast_response_matches_model(client, auth_token, monkeypatch):
+    """Test the fast serialization path returns the same body as the response model path."""
+    from app import responses
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    fast = client.get("/market/ticker/AAPL/history?time_range=10y", headers=headers)
+
+    monkeypatch.setattr(responses, "FAST_RESPONSES", False)
+    validated = client.get("/market/ticker/AAPL/history?time_range=10y", headers=headers)
+
+    assert fast.status_code == validated.status_code == status.HTTP_200_OK
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json() == validated.json()
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    """Test TTLCache serves entries until the TTL passes, then drops them."""
+    from datetime import datetime, timedelta
+    from app import market_data
+    from app.market_data import TTLCache
+
+    now = datetime(2024, 1, 1)
+    monkeypatch.setattr(market_data, "datetime", type("FakeDatetime", (), {"utcnow": staticmethod(lambda: now)}))
+
+    cache = TTLCache(ttl=timedelta(hours=1))
+    cache.set(("AAPL", "1y"), {"value": 1})
+    assert cache.get(("AAPL", "1y")) == {"value": 1}
+
+    now += timedelta(hours=2)
+    assert cache.get(("AAPL", "1y")) is None
+    assert cache.get("missing") is None
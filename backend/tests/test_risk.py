@@ -0,0 +1,378 @@
+import pytest
+import numpy as np
+from fastapi import status
+
+from app.market_data import clear_cache
+from app.risk import calculate_portfolio_risk, get_return_statistics, clear_risk_cache
+from app.backtest import clear_backtest_cache
+from app.performance import calculate_performance, clear_performance_cache
+from app.correlation import (
+    correlation_from_covariance,
+    find_correlated_clusters,
+    get_correlation_matrix,
+    clear_correlation_cache
+)
+from app.frontier import solve_frontier, compute_frontier, precompute_frontiers, clear_frontier_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Clear market data and risk caches before each test."""
+    clear_cache()
+    clear_risk_cache()
+    clear_backtest_cache()
+    clear_performance_cache()
+    clear_correlation_cache()
+    clear_frontier_cache()
+    yield
+    clear_cache()
+    clear_risk_cache()
+    clear_backtest_cache()
+    clear_performance_cache()
+    clear_correlation_cache()
+    clear_frontier_cache()
+
+
+@pytest.fixture
+def auth_token_persona_b(client):
+    """Register, login, and assign Persona B."""
+    client.post(
+        "/auth/register",
+        json={"email": "risk@example.com", "password": "password123"}
+    )
+    token = client.post(
+        "/auth/login",
+        json={"email": "risk@example.com", "password": "password123"}
+    ).json()["access_token"]
+
+    answers = [
+        {"question_id": 1, "answer": "intermediate"},
+        {"question_id": 2, "answer": "substantial"},
+        {"question_id": 3, "answer": "moderate"},
+        {"question_id": 4, "answer": "growth"},
+        {"question_id": 5, "answer": "moderate"},
+        {"question_id": 6, "answer": "medium"},
+        {"question_id": 7, "answer": "concerned"},
+        {"question_id": 8, "answer": "analysis"},
+        {"question_id": 9, "answer": "important"},
+        {"question_id": 10, "answer": "middle"}
+    ]
+    client.post(
+        "/onboarding/submit",
+        json={"answers": answers},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    return token
+
+
+@pytest.fixture
+def sample_portfolio():
+    """Sample portfolio JSON."""
+    return {
+        "holdings": [
+            {"ticker": "AAPL", "shares": 100, "purchase_price": 150.00},
+            {"ticker": "MSFT", "shares": 50, "purchase_price": 280.00},
+            {"ticker": "LLY", "shares": 10, "purchase_price": 500.00}
+        ]
+    }
+
+
+def test_portfolio_risk_endpoint(client, auth_token_persona_b, sample_portfolio):
+    """Test risk metrics are returned for a portfolio."""
+    response = client.post(
+        "/portfolio/risk?time_range=1y",
+        json=sample_portfolio,
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["volatility"] > 0
+    assert data["var_parametric_amount"] >= 0
+    assert len(data["holdings"]) == 3
+    # Risk contributions decompose total variance
+    assert abs(sum(h["risk_contribution"] for h in data["holdings"]) - 100) < 0.1
+
+
+def test_single_holding_risk_matches_direct_calculation():
+    """Test volatility and beta against a direct computation for one holding."""
+    risk = calculate_portfolio_risk({"AAPL": 10000.0}, "3y")
+    stats = get_return_statistics(["AAPL", "SPY"], "3y")
+
+    aapl, spy = stats["returns"][:, 0], stats["returns"][:, 1]
+    expected_vol = np.std(aapl, ddof=1) * np.sqrt(12) * 100
+    expected_beta = np.cov(aapl, spy)[0, 1] / np.var(spy, ddof=1)
+
+    assert risk["volatility"] == pytest.approx(expected_vol, abs=0.01)
+    assert risk["beta"] == pytest.approx(expected_beta, abs=0.001)
+    assert risk["holdings"][0]["risk_contribution"] == pytest.approx(100.0)
+
+
+def test_return_statistics_cached_per_symbol_set():
+    """Test covariance is reused for the same symbol set in any order."""
+    first = get_return_statistics(["MSFT", "AAPL"], "1y")
+    second = get_return_statistics(["AAPL", "MSFT"], "1y")
+    assert first is second
+    assert first["cov"].shape == (2, 2)
+
+
+def test_projection_endpoint(client, auth_token_persona_b, sample_portfolio):
+    """Test projection returns ordered percentile bands for every year."""
+    response = client.post(
+        "/portfolio/projection",
+        json={**sample_portfolio, "years": 5, "num_paths": 2000, "seed": 11},
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["paths_simulated"] == 2000
+    assert len(data["bands"]) == 6
+    assert data["bands"][0]["p50"] == pytest.approx(data["initial_value"], rel=1e-6)
+    for band in data["bands"]:
+        assert band["p5"] <= band["p25"] <= band["p50"] <= band["p75"] <= band["p95"]
+
+
+def test_projection_seed_is_reproducible_across_pool():
+    """Test a fixed seed gives the same bands in-process and sharded across the pool."""
+    from app.simulation import project_portfolio
+
+    positions = {"AAPL": 16500.0, "MSFT": 15400.0, "LLY": 5500.0}
+    local = project_portfolio(positions, years=3, num_paths=12000, seed=123)
+    again = project_portfolio(positions, years=3, num_paths=12000, seed=123)
+    sharded = project_portfolio(
+        positions, years=3, num_paths=12000, seed=123,
+        parallel=True, latency_budget_ms=30000
+    )
+
+    assert local["bands"] == again["bands"]
+    assert local["bands"] == sharded["bands"]
+
+
+def test_projection_respects_latency_budget():
+    """Test the simulation stops scheduling chunks once the budget is spent."""
+    from app.simulation import project_portfolio, PATH_CHUNK_SIZE
+
+    result = project_portfolio({"AAPL": 10000.0}, years=30, num_paths=100000, seed=1, latency_budget_ms=1)
+    assert result["paths_simulated"] == PATH_CHUNK_SIZE
+
+
+def test_backtest_endpoint(client, auth_token_persona_b, sample_portfolio):
+    """Test backtesting all models plus current holdings in one request."""
+    response = client.post(
+        "/portfolio/backtest",
+        json={"holdings": sample_portfolio["holdings"], "time_range": "3y", "rebalance": "quarterly"},
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    strategies = [r["strategy"] for r in data["results"]]
+    assert strategies == ["conservative", "balanced", "growth", "current"]
+    for result in data["results"]:
+        assert result["equity_curve"][0]["value"] == 10000.0
+        assert result["max_drawdown"] <= 0
+        assert result["rebalances"] > 0
+
+
+def test_backtest_replay_matches_step_by_step_simulation():
+    """Test vectorized replay against an explicit period-by-period simulation."""
+    from app.backtest import find_rebalance_points, replay
+
+    rng = np.random.default_rng(5)
+    prices = 100 * np.cumprod(1 + rng.normal(0.005, 0.04, (60, 4)), axis=0)
+    weights = np.array([0.4, 0.3, 0.2, 0.1])
+    dates = [f"{2020 + m // 12}-{m % 12 + 1:02d}-28" for m in range(60)]
+
+    for rule in ("none", "quarterly", "threshold"):
+        points = find_rebalance_points(dates, prices, weights, rule, threshold=3.0)
+        equity, turnover = replay(prices, weights, points, 1000.0)
+
+        units = 1000.0 * weights / prices[0]
+        expected = []
+        for t in range(60):
+            value = units @ prices[t]
+            expected.append(value)
+            if t in points[1:]:
+                units = value * weights / prices[t]
+        assert np.allclose(equity, expected)
+        assert len(turnover) == len(points) - 1
+
+
+def test_backtest_results_are_cached():
+    """Test repeated backtests of the same strategy reuse the cached result."""
+    from app.backtest import run_backtest, model_fund_weights
+
+    first = run_backtest("growth", model_fund_weights("growth"), "1y", "monthly")
+    second = run_backtest("growth", model_fund_weights("growth"), "1y", "monthly")
+    assert first["equity_curve"] is second["equity_curve"]
+
+
+def test_performance_endpoint(client, auth_token_persona_b, sample_portfolio):
+    """Test the portfolio value series equals the share-weighted sum of closing prices."""
+    from app.market_data import get_historical_data
+
+    response = client.post(
+        "/portfolio/performance?time_range=1y",
+        json=sample_portfolio,
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["symbols"] == ["AAPL", "LLY", "MSFT"]
+    assert data["series"][0]["cumulative_return"] == 0.0
+
+    closes = {
+        h["ticker"]: {p["date"]: p["close"] for p in get_historical_data(h["ticker"], "1y")["data"]}
+        for h in sample_portfolio["holdings"]
+    }
+    for point in data["series"]:
+        expected = sum(h["shares"] * closes[h["ticker"]][point["date"]] for h in sample_portfolio["holdings"])
+        assert point["value"] == pytest.approx(expected, abs=0.01)
+    assert data["total_return"] == pytest.approx(
+        (data["end_value"] / data["start_value"] - 1) * 100, abs=0.01
+    )
+
+
+def test_performance_cached_per_portfolio_hash():
+    """Test the same positions in any order share a cache entry."""
+    first = calculate_performance({"AAPL": 100.0, "MSFT": 50.0}, "3y")
+    second = calculate_performance({"MSFT": 50.0, "AAPL": 100.0}, "3y")
+    assert first is second
+    assert calculate_performance({"AAPL": 101.0, "MSFT": 50.0}, "3y") is not first
+
+
+def test_correlation_endpoint(client, auth_token_persona_b, sample_portfolio):
+    """Test the correlation matrix is symmetric with a unit diagonal."""
+    response = client.post(
+        "/portfolio/correlation?time_range=3y&threshold=0.5",
+        json=sample_portfolio,
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    matrix = np.array(data["matrix"])
+    assert data["symbols"] == ["AAPL", "LLY", "MSFT"]
+    assert np.allclose(matrix, matrix.T)
+    assert np.allclose(np.diag(matrix), 1.0)
+    for pair in data["correlated_pairs"]:
+        assert pair["correlation"] >= 0.5
+
+
+def test_correlated_clusters_at_scale():
+    """Test clusters are recovered from 600 symbols driven by a few shared factors."""
+    rng = np.random.default_rng(11)
+    factors = rng.normal(0, 0.04, (120, 5))
+    membership = np.repeat(np.arange(5), 4)  # First 20 symbols: 5 clusters of 4
+    returns = np.hstack([
+        factors[:, membership] + rng.normal(0, 0.004, (120, 20)),
+        rng.normal(0, 0.04, (120, 580))
+    ])
+
+    corr = correlation_from_covariance(np.cov(returns, rowvar=False))
+    assert np.allclose(corr, np.corrcoef(returns, rowvar=False))
+
+    clusters = find_correlated_clusters(corr, threshold=0.9)
+    assert sorted(clusters) == [list(range(k * 4, k * 4 + 4)) for k in range(5)]
+
+
+def test_clusters_are_connected_components():
+    """Test symbols linked through a shared neighbour end up in one cluster."""
+    corr = np.array([
+        [1.0, 0.95, 0.2, 0.1],
+        [0.95, 1.0, 0.92, 0.0],
+        [0.2, 0.92, 1.0, 0.3],
+        [0.1, 0.0, 0.3, 1.0]
+    ])
+    assert find_correlated_clusters(corr, 0.9) == [[0, 1, 2]]
+    assert find_correlated_clusters(corr, 0.99) == []
+
+
+def test_correlation_matrix_cached_per_symbol_set():
+    """Test the same symbol set in any order reuses the cached matrix."""
+    first = get_correlation_matrix(["MSFT", "AAPL", "SPY"], "5y")
+    second = get_correlation_matrix(["spy", "AAPL", "MSFT"], "5y")
+    assert first is second
+
+
+def test_frontier_endpoint(client, auth_token_persona_b, sample_portfolio):
+    """Test the frontier covers holdings plus funds and suggests a portfolio per model."""
+    response = client.post(
+        "/portfolio/frontier",
+        json={**sample_portfolio, "time_range": "5y", "num_points": 20},
+        headers={"Authorization": f"Bearer {auth_token_persona_b}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert {"AAPL", "MSFT", "LLY", "XLK", "XLV"} <= set(data["symbols"])
+
+    volatilities = [p["volatility"] for p in data["frontier"]]
+    assert volatilities == sorted(volatilities)
+    for point in data["frontier"]:
+        assert abs(sum(point["weights"].values()) - 100) < 0.5
+        assert min(point["weights"].values()) >= 0
+
+    assert [s["model_type"] for s in data["suggestions"]] == ["conservative", "balanced", "growth"]
+    for suggestion in data["suggestions"]:
+        nearest = min(abs(v - suggestion["target_volatility"]) for v in volatilities)
+        assert abs(suggestion["portfolio"]["volatility"] - suggestion["target_volatility"]) == pytest.approx(nearest, abs=0.01)
+
+
+def test_frontier_is_efficient():
+    """Test no random long-only portfolio beats a frontier point on both risk and return."""
+    rng = np.random.default_rng(3)
+    n = 8
+    returns = rng.normal(0.006, 0.04, (80, n)) * rng.uniform(0.5, 2.0, n)
+    mean, cov = returns.mean(axis=0), np.cov(returns, rowvar=False)
+
+    weights = solve_frontier(mean, cov, num_points=15)
+    assert np.all(weights >= 0)
+    assert np.allclose(weights.sum(axis=1), 1.0)
+    # Ends at the highest-return asset and the minimum-variance portfolio
+    assert weights[0] @ mean == pytest.approx(mean.max(), rel=1e-6)
+
+    samples = rng.dirichlet(np.ones(n), 5000)
+    sample_returns = samples @ mean
+    sample_vars = np.einsum("kn,nm,km->k", samples, cov, samples)
+    assert weights[-1] @ cov @ weights[-1] <= sample_vars.min() + 1e-9
+    for w in weights:
+        dominated = (sample_vars <= w @ cov @ w) & (sample_returns > w @ mean + 1e-7)
+        assert not dominated.any()
+
+
+def test_frontier_precompute_warms_cache(monkeypatch):
+    """Test the funds-only frontier is served from the precomputed cache."""
+    from app import frontier
+
+    monkeypatch.setattr(frontier, "FRONTIER_PRECOMPUTE_RANGES", ["1y"])
+    precompute_frontiers()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("frontier should come from the cache")
+
+    monkeypatch.setattr(frontier, "solve_frontier", fail)
+    assert compute_frontier(None, "1y")["suggestions"]
+
+
+def test_fast_responses_match_response_models(client, auth_token_persona_b, sample_portfolio, monkeypatch):
+    """Test historical analytics fast-path bodies match the response models."""
+    from app import responses
+
+    headers = {"Authorization": f"Bearer {auth_token_persona_b}"}
+    requests = [
+        ("/portfolio/risk?time_range=5y", sample_portfolio),
+        ("/portfolio/performance?time_range=3y", sample_portfolio),
+        ("/portfolio/correlation?time_range=5y&threshold=0.3", sample_portfolio),
+        ("/portfolio/projection", {**sample_portfolio, "years": 5, "num_paths": 500, "seed": 7}),
+        ("/portfolio/backtest", {**sample_portfolio, "time_range": "10y"}),
+        ("/portfolio/frontier", {**sample_portfolio, "time_range": "3y"})
+    ]
+
+    fast = [client.post(url, json=body, headers=headers).json() for url, body in requests]
+    monkeypatch.setattr(responses, "FAST_RESPONSES", False)
+    validated = [client.post(url, json=body, headers=headers).json() for url, body in requests]
+
+    for f, v in zip(fast, validated):
+        f.pop("elapsed_ms", None)
+        v.pop("elapsed_ms", None)
+        assert f == v